@@ -0,0 +1,45 @@
+"""
+A simplified chess game with bitboard move generation and search engines.
+
+Importing the package only loads the game and its bitboard, search and
+snapshot core. The parallel and Monte Carlo engines, process pools, game
+server, self-play runner, PGN, book and endgame table readers and the
+console are imported the first time one of their names is used, so worker
+processes that only need ChessGame start quickly.
+"""
+import importlib
+from .game import ChessGame, STARTING_BOARD
+#loaded by game.py in any case
+from .bitboard import BitboardPosition
+from .search import AlphaBetaSearch, SearchResult, SearchStats
+from .transposition import TranspositionTable
+from .snapshot import PositionSnapshot
+
+#public name -> submodule it is imported from on first use
+_LAZY_NAMES = {
+    'BatchEvaluator': 'batch',
+    'evaluateBatch': 'batch',
+    'MonteCarloSearch': 'mcts',
+    'GameServer': 'server',
+    'Tablebase': 'tablebase',
+    'ParallelSearch': 'parallel',
+    'PgnGame': 'pgn',
+    'PositionBook': 'book',
+    'playGame': 'selfplay',
+    'playMatch': 'selfplay',
+    'readPgn': 'pgn',
+    'runChess': 'console',
+}
+
+__all__ = ['AlphaBetaSearch', 'BitboardPosition', 'ChessGame',
+           'PositionSnapshot', 'STARTING_BOARD', 'SearchResult',
+           'SearchStats', 'TranspositionTable'] + sorted(_LAZY_NAMES)
+
+def __getattr__(name:str):
+    """imports lazily loaded names from their submodule"""
+    if name in _LAZY_NAMES:
+        module = importlib.import_module('.' + _LAZY_NAMES[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,4 @@
+"""runs the console game: python -m chessgame"""
+from .console import main
+
+main()
@@ -0,0 +1,89 @@
+"""
+Vectorized evaluation of many positions at once with NumPy, for scoring
+search frontiers and stored games as array operations instead of one
+Python call per position. Scores are identical to ChessGame.boardEvaluation.
+
+Positions are encoded as piece planes: a (positions, 12, squares) array of
+0/1 values with one plane per piece, in the piece order of bitboard.py. The
+evaluation's material term counts captures and promotions since the game's
+first position rather than the pieces on the board (see
+BitboardPosition.material), so each encoded position also gets a material
+offset, which is 0 for positions reached from a position with equal
+material such as the starting board.
+
+Example:
+    from chessgame.batch import evaluateBatch
+    scores = evaluateBatch([game.position for game in games])
+
+NumPy is only needed by this module; the rest of the package does not
+import it.
+"""
+import functools
+import numpy as np
+from .evaluation import getEvaluationTables, SCORE_SCALE
+
+class BatchEvaluator(object):
+    """
+    The evaluation weights of one board shape as tensors: materialWeights[p]
+    is the material value of piece p from white's point of view and
+    squareWeights[p, square] its positional score, both in tenths of a
+    pawn. weights is their sum, so a position's score is the sum of the
+    weights of its occupied planes plus its material offset.
+    """
+    def __init__(self, rows:int, cols:int)->None:
+        self.rows = rows
+        self.cols = cols
+        tables = getEvaluationTables(rows, cols)
+        #captureScore is the swing when a piece is lost, so a piece on the
+        #board is worth the opposite
+        self.materialWeights = -np.array(tables.captureScore, dtype=np.int64)
+        self.squareWeights = np.array(tables.pieceSquare, dtype=np.int64)
+        self.weights = self.squareWeights + self.materialWeights[:, None]
+        self.pieceIndices = np.arange(12, dtype=np.uint8)[None, :, None]
+    def encode(self, positions:list)->tuple:
+        """encodes BitboardPositions of this board shape as (planes,
+        offsets): a (positions, 12, squares) uint8 array of piece planes and
+        the material offset of each position"""
+        squares = np.array([position.squares for position in positions],
+                           dtype=np.uint8).reshape(len(positions),
+                                                   self.rows * self.cols)
+        #EMPTY squares match no plane
+        planes = (squares[:, None, :] == self.pieceIndices).astype(np.uint8)
+        material = np.array([position.material for position in positions],
+                            dtype=np.int64)
+        offsets = material - planes.sum(axis=2, dtype=np.int64) @ \
+                  self.materialWeights
+        return planes, offsets
+    def evaluatePlanes(self, planes:np.ndarray,
+                       offsets:np.ndarray = None)->np.ndarray:
+        """returns the scores of encoded positions from white's point of
+        view in tenths of a pawn, as BitboardPosition.evaluate does"""
+        scores = np.einsum('nps,ps->n', planes, self.weights, dtype=np.int64)
+        if offsets is not None:
+            scores += offsets
+        return scores
+    def evaluate(self, positions:list)->np.ndarray:
+        """returns the scores of BitboardPositions in pawns, as
+        ChessGame.boardEvaluation does"""
+        if not positions:
+            return np.zeros(0)
+        return self.evaluatePlanes(*self.encode(positions)) / SCORE_SCALE
+
+@functools.lru_cache(maxsize=None)
+def getBatchEvaluator(rows:int, cols:int)->BatchEvaluator:
+    """returns the (shared) batch evaluator for a board shape"""
+    return BatchEvaluator(rows, cols)
+
+def encodePositions(positions:list)->tuple:
+    """encodes BitboardPositions, which must all have the same board shape,
+    as (planes, offsets) (see BatchEvaluator.encode)"""
+    first = positions[0]
+    return getBatchEvaluator(first.rows, first.cols).encode(positions)
+
+def evaluateBatch(positions:list)->np.ndarray:
+    """returns the scores in pawns of BitboardPositions of one board shape,
+    identical to ChessGame.boardEvaluation for each"""
+    if not positions:
+        return np.zeros(0)
+    first = positions[0]
+    return getBatchEvaluator(first.rows, first.cols).evaluate(positions)
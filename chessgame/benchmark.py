@@ -0,0 +1,285 @@
+"""
+Throughput benchmarks for the move generator, make/unmake and evaluation,
+with a saved history so that slowdowns show up before engine changes ship.
+Each benchmark is timed over several rounds and the best round is kept, as
+the other rounds only add noise from the rest of the machine.
+
+--selective compares the node counts and speed of the minimax search with
+each combination of its selective search features switched on or off, and
+--parity checks that the root-parallel search picks the same move and
+score as the serial one.
+
+Command line examples (see --help):
+    python -m chessgame.benchmark --save benchmarks.jsonl
+    python -m chessgame.benchmark --compare benchmarks.jsonl --threshold 10
+    python -m chessgame.benchmark --selective 4 --move-time 2
+    python -m chessgame.benchmark --parity 3
+"""
+import argparse
+import itertools
+import json
+import platform
+import random
+import sys
+import time
+from .perft import suitePosition, perft
+from .search import AlphaBetaSearch
+from .parallel import ParallelSearch
+from .transposition import TranspositionTable
+
+#suite positions the throughput benchmarks run over
+BENCHMARK_POSITIONS = ('start', 'kiwipete', 'position3', 'game-standard',
+                       'game-simplified')
+
+def benchmarkPositions()->list:
+    """returns fresh positions for the benchmarks"""
+    return [suitePosition(name) for name in BENCHMARK_POSITIONS]
+
+def moveGeneration(positions:list)->int:
+    """generates the moves of every position and returns the positions
+    handled"""
+    for position in positions:
+        position.generateMoves()
+    return len(positions)
+
+def makeUnmake(positions:list)->int:
+    """makes and takes back every move of every position and returns the
+    moves made"""
+    count = 0
+    for position in positions:
+        for move in position.generateMoves():
+            position.makeMove(move)
+            position.unmakeMove()
+            count += 1
+    return count
+
+def evaluation(positions:list)->int:
+    """evaluates the position after every move of every position, as the
+    search does at its leaves, and returns the evaluations made"""
+    count = 0
+    for position in positions:
+        for move in position.generateMoves():
+            position.makeMove(move)
+            position.evaluate()
+            position.unmakeMove()
+            count += 1
+    return count
+
+def perftThree(positions:list)->int:
+    """runs perft 3 on every position and returns the nodes counted"""
+    return sum(perft(position, 3) for position in positions)
+
+#AlphaBetaSearch options compareSelectiveSearch switches on and off
+SELECTIVE_FEATURES = ('nullMove', 'lateMoveReductions', 'futility')
+#transposition table of each search compareSelectiveSearch runs
+COMPARISON_TABLE_BYTES = 4 * 1024 * 1024
+
+def compareSelectiveSearch(depth:int, moveTime:float = None)->list:
+    """
+    Searches every benchmark position depth plies deep with each on/off
+    combination of SELECTIVE_FEATURES, every search with an empty table,
+    and returns one record per combination: the features, the total nodes
+    and time, and with moveTime, the mean depth iterativeSearch completes
+    in moveTime seconds per position.
+    """
+    records = []
+    for switches in itertools.product((False, True),
+                                      repeat=len(SELECTIVE_FEATURES)):
+        features = dict(zip(SELECTIVE_FEATURES, switches))
+        nodes = 0
+        elapsed = 0.0
+        depths = []
+        for position in benchmarkPositions():
+            search = AlphaBetaSearch(
+                position, TranspositionTable(COMPARISON_TABLE_BYTES),
+                **features)
+            result = search.search(depth)
+            nodes += result.nodes
+            elapsed += result.elapsed
+            if moveTime is not None:
+                search = AlphaBetaSearch(
+                    position, TranspositionTable(COMPARISON_TABLE_BYTES),
+                    **features)
+                depths.append(search.iterativeSearch(moveTime=moveTime).depth)
+        record = {'features': features, 'depth': depth, 'nodes': nodes,
+                  'elapsed': elapsed}
+        if depths:
+            record['timedDepth'] = sum(depths) / len(depths)
+        records.append(record)
+    return records
+
+#random positions checkParity searches besides the benchmark positions, and
+#the random plies played from the 7x8 starting position to reach each
+PARITY_SEEDS = range(8)
+PARITY_PLIES = 10
+
+def parityPositions()->list:
+    """returns (name, position) for the benchmark positions and, for each
+    of PARITY_SEEDS, the game-simplified and game-standard positions after
+    PARITY_PLIES random moves"""
+    positions = list(zip(BENCHMARK_POSITIONS, benchmarkPositions()))
+    for seed in PARITY_SEEDS:
+        for name in ('game-simplified', 'game-standard'):
+            rng = random.Random(seed)
+            position = suitePosition(name)
+            for _ in range(PARITY_PLIES):
+                moves = position.generateMoves()
+                if not moves:
+                    break
+                position.makeMove(rng.choice(moves))
+            positions.append((f"{name}-seed{seed}", position))
+    return positions
+
+def checkParity(depth:int, workers:tuple = (1, 2))->list:
+    """
+    Searches every parity position depth plies deep with AlphaBetaSearch and
+    with ParallelSearch on each number of workers, all with the selective
+    search features off, where ParallelSearch promises the same move and
+    score. Returns (name, workers, serial result, parallel result) for
+    every mismatch.
+    """
+    selective = {'nullMove': False, 'lateMoveReductions': False,
+                 'futility': False}
+    mismatches = []
+    for name, position in parityPositions():
+        serial = AlphaBetaSearch(position,
+                                 TranspositionTable(COMPARISON_TABLE_BYTES),
+                                 **selective).search(depth)
+        for count in workers:
+            parallel = ParallelSearch(position, count,
+                                      **selective).search(depth)
+            if (parallel.bestMove, parallel.score) != \
+               (serial.bestMove, serial.score):
+                mismatches.append((name, count, serial, parallel))
+    return mismatches
+
+#benchmark name -> function(positions) returning the operations it did
+BENCHMARKS = {
+    'movegen': moveGeneration,
+    'makeunmake': makeUnmake,
+    'evaluate': evaluation,
+    'perft3': perftThree,
+}
+
+def runBenchmark(function, rounds:int = 5, minTime:float = 0.2)->dict:
+    """times a benchmark over the given number of rounds, repeating the
+    function within each round until it runs for at least minTime seconds,
+    and returns the operations per second of the best and mean rounds"""
+    positions = benchmarkPositions()
+    rates = []
+    for _ in range(rounds):
+        operations = 0
+        startTime = time.perf_counter()
+        elapsed = 0.0
+        while elapsed < minTime:
+            operations += function(positions)
+            elapsed = time.perf_counter() - startTime
+        rates.append(operations / elapsed)
+    return {'best': max(rates), 'mean': sum(rates) / len(rates),
+            'rounds': rounds}
+
+def runBenchmarks(names:list = None, rounds:int = 5,
+                  minTime:float = 0.2)->dict:
+    """runs the named benchmarks (all by default) and returns a history
+    record of their results"""
+    results = {}
+    for name in names or BENCHMARKS:
+        results[name] = runBenchmark(BENCHMARKS[name], rounds, minTime)
+    return {'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'machine': platform.machine(), 'results': results}
+
+def loadHistory(path:str)->list:
+    """returns the records saved in a history file, oldest first"""
+    try:
+        with open(path, encoding='utf-8') as historyFile:
+            return [json.loads(line) for line in historyFile if line.strip()]
+    except FileNotFoundError:
+        return []
+
+def compareRecords(previous:dict, current:dict, threshold:float)->list:
+    """returns the (name, previous rate, current rate, change in percent) of
+    every benchmark that got more than threshold percent slower"""
+    regressions = []
+    for name, result in current['results'].items():
+        if name not in previous['results']:
+            continue
+        before = previous['results'][name]['best']
+        change = (result['best'] - before) / before * 100
+        if change < -threshold:
+            regressions.append((name, before, result['best'], change))
+    return regressions
+
+def main(arguments:list = None)->None:
+    """command line entry point"""
+    parser = argparse.ArgumentParser(
+        description="Measure move generation, make/unmake and evaluation "
+                    "throughput.")
+    parser.add_argument('--benchmark', action='append',
+                        choices=sorted(BENCHMARKS),
+                        help="benchmark to run (repeatable, default: all)")
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.2,
+                        help="minimum seconds per round")
+    parser.add_argument('--save', metavar='HISTORY',
+                        help="append the results to this JSONL file")
+    parser.add_argument('--compare', metavar='HISTORY',
+                        help="fail if slower than the last saved results")
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help="percent slowdown --compare tolerates")
+    parser.add_argument('--selective', type=int, metavar='DEPTH',
+                        help="compare the selective search features at "
+                             "this depth instead of measuring throughput")
+    parser.add_argument('--move-time', type=float, default=None,
+                        help="with --selective, also report the depth "
+                             "reached in this many seconds per position")
+    parser.add_argument('--parity', type=int, metavar='DEPTH',
+                        help="check that the parallel search matches the "
+                             "serial one at this depth, and fail if not")
+    options = parser.parse_args(arguments)
+    if options.parity is not None:
+        mismatches = checkParity(options.parity)
+        for name, workers, serial, parallel in mismatches:
+            print(f"MISMATCH {name} with {workers} workers: serial "
+                  f"{serial.bestMove} {serial.score}, parallel "
+                  f"{parallel.bestMove} {parallel.score}")
+        if mismatches:
+            sys.exit(1)
+        print(f"parallel search matches the serial search on "
+              f"{len(parityPositions())} positions at depth {options.parity}")
+        return
+    if options.selective is not None:
+        for record in compareSelectiveSearch(options.selective,
+                                             options.move_time):
+            enabled = [name for name, on in record['features'].items() if on]
+            line = (f"{'+'.join(enabled) or 'none':40} "
+                    f"{record['nodes']:>10} nodes {record['elapsed']:>8.2f} s")
+            if 'timedDepth' in record:
+                line += f" depth {record['timedDepth']:.1f} in " \
+                        f"{options.move_time:g} s"
+            print(line)
+        return
+    record = runBenchmarks(options.benchmark, options.rounds,
+                           options.min_time)
+    for name, result in record['results'].items():
+        print(f"{name:12} {result['best']:>12.0f} ops/s best "
+              f"{result['mean']:>12.0f} ops/s mean")
+    failed = False
+    if options.compare:
+        history = loadHistory(options.compare)
+        if history:
+            for name, before, after, change in compareRecords(
+                    history[-1], record, options.threshold):
+                print(f"REGRESSION {name}: {before:.0f} -> {after:.0f} ops/s "
+                      f"({change:+.1f}%)")
+                failed = True
+        else:
+            print(f"no saved results in {options.compare} to compare with")
+    if options.save:
+        with open(options.save, 'a', encoding='utf-8') as historyFile:
+            historyFile.write(json.dumps(record) + '\n')
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1035 @@
+import functools
+from array import array
+from .zobrist import getZobristKeys
+from .evaluation import getEvaluationTables, PIECE_WORTH, SCORE_SCALE
+
+#colors and piece types. A piece is stored as color * 6 + piece type so that
+#it can be used directly as an index into BitboardPosition.pieces
+WHITE, BLACK = 0, 1
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+EMPTY = 12
+COLOR_NAMES = ('white', 'black')
+PIECE_NAMES = ('pawn', 'knight', 'bishop', 'rook', 'queen', 'king')
+#glyphs in piece order: white pawn..king, then black pawn..king
+GLYPHS = '♙♘♗♖♕♔♟♞♝♜♛♚'
+GLYPH_TO_PIECE = {glyph: piece for piece, glyph in enumerate(GLYPHS)}
+
+#(row change, column change) for each of the 8 ray directions. Rows grow
+#downwards, so the first 4 directions increase the square index
+DIRECTIONS = ((0, 1), (1, -1), (1, 0), (1, 1),
+              (0, -1), (-1, 1), (-1, 0), (-1, -1))
+ROOK_DIRECTIONS = (0, 2, 4, 6)
+BISHOP_DIRECTIONS = (1, 3, 5, 7)
+QUEEN_DIRECTIONS = tuple(range(8))
+KNIGHT_JUMPS = ((2,1),(1,2),(-1,2),(-2,1),(-2,-1),(-1,-2),(1,-2),(2,-1))
+KING_STEPS = ((0,1),(0,-1),(1,1),(1,0),(1,-1),(-1,1),(-1,0),(-1,-1))
+#white pawns move up the board (towards row 0), black pawns move down
+PAWN_DIRECTIONS = (-1, 1)
+PROMOTION_PIECES = (QUEEN, ROOK, BISHOP, KNIGHT)
+
+#rule sets. Simplified rules are the ones ChessGame has always used: pawns
+#only move one square, there is no castling, en passant or promotion, kings
+#can be captured and moving into check is allowed. Standard rules are the
+#rules of normal chess and only generate legal moves.
+SIMPLIFIED, STANDARD = 'simplified', 'standard'
+#what kind of move a move is, beyond moving one piece (and capturing)
+NORMAL, DOUBLE_PUSH, EN_PASSANT, CASTLING, PROMOTION = range(5)
+#moves are packed into one int: from and to square (8 bits each), the moved
+#piece and the captured piece (EMPTY if none, 4 bits each), the move kind
+#and, for promotions, the piece type promoted to (3 bits each)
+TO_SHIFT = 8
+PIECE_SHIFT = 16
+CAPTURED_SHIFT = 20
+KIND_SHIFT = 24
+PROMOTION_SHIFT = 27
+SQUARE_MASK = 0xFF
+PIECE_MASK = 0xF
+KIND_MASK = 0x7
+#largest board a packed move can describe
+MAX_SQUARES = SQUARE_MASK + 1
+NO_MOVE = 0 #never a real move, since its captured field is not EMPTY
+#castling rights are bits of an int: 1 << (color * 2 + side), where side is
+#0 for castling towards the higher column and 1 for the lower column
+ALL_CASTLING_RIGHTS = 15
+#piece values by piece type in tenths of a pawn, for static exchange
+#evaluation
+EXCHANGE_VALUES = tuple(worth * SCORE_SCALE for worth in PIECE_WORTH)
+
+def encodeMove(fromSq:int, toSq:int, piece:int, captured:int = EMPTY,
+               kind:int = NORMAL, promotion:int = 0)->int:
+    """packs a move into an int"""
+    return fromSq | toSq << TO_SHIFT | piece << PIECE_SHIFT | \
+           captured << CAPTURED_SHIFT | kind << KIND_SHIFT | \
+           promotion << PROMOTION_SHIFT
+
+def decodeMove(move:int)->tuple:
+    """unpacks a move into (fromSq, toSq, piece, captured, kind, promotion)"""
+    return (move & SQUARE_MASK, move >> TO_SHIFT & SQUARE_MASK,
+            move >> PIECE_SHIFT & PIECE_MASK,
+            move >> CAPTURED_SHIFT & PIECE_MASK, move >> KIND_SHIFT & KIND_MASK,
+            move >> PROMOTION_SHIFT & KIND_MASK)
+
+def squaresOf(bitboard:int)->list:
+    """returns the list of square indices set in a bitboard, lowest first"""
+    squares = []
+    while bitboard:
+        lowBit = bitboard & -bitboard
+        squares.append(lowBit.bit_length() - 1)
+        bitboard ^= lowBit
+    return squares
+
+class AttackTables(object):
+    """
+    Precomputed attack masks for a board with the given number of rows and
+    columns. Square indices run row by row, so the square at (row, col) is
+    row * cols + col and is represented by the bit 1 << (row * cols + col).
+    """
+    def __init__(self, rows:int, cols:int)->None:
+        self.rows = rows
+        self.cols = cols
+        self.squareCount = rows * cols
+        self.fullMask = (1 << self.squareCount) - 1
+        self.knightAttacks = [self.stepMask(sq, KNIGHT_JUMPS)
+                              for sq in range(self.squareCount)]
+        self.kingAttacks = [self.stepMask(sq, KING_STEPS)
+                            for sq in range(self.squareCount)]
+        #pawnPushes/pawnAttacks are indexed by [color][square]
+        self.pawnPushes = [[self.stepMask(sq, ((direction, 0),))
+                            for sq in range(self.squareCount)]
+                           for direction in PAWN_DIRECTIONS]
+        self.pawnAttacks = [[self.stepMask(sq, ((direction, 1),
+                                                (direction, -1)))
+                             for sq in range(self.squareCount)]
+                            for direction in PAWN_DIRECTIONS]
+        #rays[direction][square] holds every square from the given square to
+        #the edge of the board in that direction, excluding the square itself
+        self.rays = [[self.rayMask(sq, dRow, dCol)
+                      for sq in range(self.squareCount)]
+                     for dRow, dCol in DIRECTIONS]
+        self.rayIsPositive = [index < 4 for index in range(len(DIRECTIONS))]
+    def onBoard(self, row:int, col:int)->bool:
+        """returns whether (row, col) is inside the board"""
+        return 0 <= row < self.rows and 0 <= col < self.cols
+    def stepMask(self, sq:int, steps:tuple)->int:
+        """returns the mask of squares one step away from sq for every step
+        that stays on the board"""
+        row, col = divmod(sq, self.cols)
+        mask = 0
+        for dRow, dCol in steps:
+            if self.onBoard(row + dRow, col + dCol):
+                mask |= 1 << ((row + dRow) * self.cols + col + dCol)
+        return mask
+    def rayMask(self, sq:int, dRow:int, dCol:int)->int:
+        """returns the mask of squares from sq to the edge of the board"""
+        row, col = divmod(sq, self.cols)
+        mask = 0
+        row, col = row + dRow, col + dCol
+        while self.onBoard(row, col):
+            mask |= 1 << (row * self.cols + col)
+            row, col = row + dRow, col + dCol
+        return mask
+    def line(self, fromSq:int, toSq:int)->int:
+        """returns the squares after fromSq up to and including toSq if the
+        two squares share a row, column or diagonal, and 0 otherwise"""
+        for direction in QUEEN_DIRECTIONS:
+            if self.rays[direction][fromSq] >> toSq & 1:
+                return self.rays[direction][fromSq] ^ self.rays[direction][toSq]
+        return 0
+    def slidingAttacks(self, sq:int, occupied:int, directions:tuple)->int:
+        """returns the squares a slider on sq attacks along the given
+        directions. Each ray is cut off after the first occupied square,
+        which is found with a bit scan instead of walking the ray."""
+        attacks = 0
+        for direction in directions:
+            ray = self.rays[direction][sq]
+            blockers = ray & occupied
+            if blockers:
+                if self.rayIsPositive[direction]:
+                    first = (blockers & -blockers).bit_length() - 1
+                else:
+                    first = blockers.bit_length() - 1
+                ray ^= self.rays[direction][first]
+            attacks |= ray
+        return attacks
+
+@functools.lru_cache(maxsize=None)
+def getAttackTables(rows:int, cols:int)->AttackTables:
+    """returns the (shared) attack tables for a board shape"""
+    return AttackTables(rows, cols)
+
+#moves the undo stack has room for before it first grows
+UNDO_STACK_SIZE = 256
+
+class BitboardPosition(object):
+    """
+    A chess position stored as one integer bitboard per piece, plus a
+    square -> piece list for constant time lookups. Under SIMPLIFIED rules
+    moves follow the rules ChessGame has always used: pawns move one square
+    forward and capture diagonally, and every other piece moves as in normal
+    chess. Under STANDARD rules the position also tracks castling rights,
+    the en passant square and the fifty-move clock, and only generates legal
+    moves.
+    """
+    def __init__(self, rows:int, cols:int, rules:str = SIMPLIFIED)->None:
+        if rows * cols > MAX_SQUARES:
+            raise ValueError(f"boards have at most {MAX_SQUARES} squares")
+        self.rows = rows
+        self.cols = cols
+        self.rules = rules
+        self.standardRules = rules == STANDARD
+        self.tables = getAttackTables(rows, cols)
+        self.pieces = [0] * 12 #one bitboard per piece
+        self.occupied = [0, 0] #one bitboard per color
+        self.squares = [EMPTY] * (rows * cols)
+        self.sideToMove = WHITE
+        self.zobrist = getZobristKeys(rows, cols)
+        self.key = 0 #Zobrist key, updated whenever the position changes
+        #incremental evaluation from white's point of view, in tenths of a
+        #pawn: material counts captured pieces (as in
+        #ChessGame.materialEvaluation) and promotions, and positional is the
+        #center/edge score
+        self.evaluationTables = getEvaluationTables(rows, cols)
+        self.material = 0
+        self.positional = 0
+        #standard rules state. castlingRooks[right] is the starting square
+        #of the rook for each castling right, and keepRights[square] the
+        #rights that survive a move from or to that square
+        self.castlingRights = 0
+        self.castlingRooks = [-1] * 4
+        self.keepRights = [ALL_CASTLING_RIGHTS] * (rows * cols)
+        self.epSquare = -1 #square a pawn can capture en passant onto
+        self.halfmoveClock = 0 #plies since the last capture or pawn move
+        #(key, color, {fromSq: targets}) of the last legalTargets lookup
+        self.targetCache = (None, None, {})
+        #attack maps and mobility, found when first asked for and kept per
+        #undo stack level (see analysis), so that after unmakeMove those of
+        #the earlier positions are still there
+        self.analysisCache = []
+        #undo stack of the moves made so far, preallocated and grown by
+        #doubling so that making a move does not allocate. Entry i holds the
+        #i-th move and the key and packed castling rights, en passant square
+        #and halfmove clock (see packState) from before it
+        self.undoCount = 0
+        self.undoMoves = array('I', bytes(4 * UNDO_STACK_SIZE))
+        self.undoKeys = array('Q', bytes(8 * UNDO_STACK_SIZE))
+        self.undoStates = array('q', bytes(8 * UNDO_STACK_SIZE))
+    @classmethod
+    def fromBoard(cls, board:list, rules:str = SIMPLIFIED)->'BitboardPosition':
+        """builds a position from a 2D list of piece glyphs. Under standard
+        rules, castling rights are given to every king on its back rank for
+        each rook in a corner of that rank."""
+        position = cls(len(board), len(board[0]), rules)
+        for row in range(len(board)):
+            for col in range(len(board[0])):
+                piece = GLYPH_TO_PIECE.get(board[row][col])
+                if piece is not None:
+                    position.addPiece(piece, row * position.cols + col)
+        if position.standardRules:
+            position.setupCastling()
+        return position
+    def setupCastling(self)->None:
+        """finds the castling rights of the current position: a king on its
+        back rank may castle with a rook in either corner of that rank that
+        is at least 3 columns away"""
+        self.setCastlingRights(0)
+        self.castlingRooks = [-1] * 4
+        self.keepRights = [ALL_CASTLING_RIGHTS] * (self.rows * self.cols)
+        rights = 0
+        for color in (WHITE, BLACK):
+            backRow = self.rows - 1 if color == WHITE else 0
+            for col in range(self.cols):
+                kingSq = self.square(backRow, col)
+                if self.squares[kingSq] != color * 6 + KING:
+                    continue
+                for side, rookCol in enumerate((self.cols - 1, 0)):
+                    rookSq = self.square(backRow, rookCol)
+                    if self.squares[rookSq] == color * 6 + ROOK and \
+                       abs(rookCol - col) >= 3:
+                        right = 1 << (color * 2 + side)
+                        rights |= right
+                        self.castlingRooks[color * 2 + side] = rookSq
+                        self.keepRights[rookSq] &= ~right
+                        self.keepRights[kingSq] &= ~right
+        self.setCastlingRights(rights)
+    def setCastlingRights(self, rights:int)->None:
+        """replaces the castling rights, keeping the key up to date"""
+        changed = self.castlingRights ^ rights
+        for right in range(4):
+            if changed >> right & 1:
+                self.key ^= self.zobrist.castlingKeys[right]
+        self.castlingRights = rights
+    def setEnPassantSquare(self, sq:int)->None:
+        """replaces the en passant square (-1 for none), keeping the key up
+        to date"""
+        if self.epSquare >= 0:
+            self.key ^= self.zobrist.enPassantKeys[self.epSquare % self.cols]
+        if sq >= 0:
+            self.key ^= self.zobrist.enPassantKeys[sq % self.cols]
+        self.epSquare = sq
+    def __getstate__(self)->dict:
+        """pickles only the pieces, side to move, rules state, material and
+        move stack; the shared per-shape tables are looked up again when
+        unpickling"""
+        return {'rows': self.rows, 'cols': self.cols, 'rules': self.rules,
+                'squares': bytes(self.squares), 'sideToMove': self.sideToMove,
+                'material': self.material,
+                'moves': self.undoMoves[:self.undoCount].tolist(),
+                'keys': self.undoKeys[:self.undoCount].tolist(),
+                'states': self.undoStates[:self.undoCount].tolist(),
+                'castlingRights': self.castlingRights,
+                'castlingRooks': self.castlingRooks,
+                'keepRights': self.keepRights, 'epSquare': self.epSquare,
+                'halfmoveClock': self.halfmoveClock}
+    def __setstate__(self, state:dict)->None:
+        self.__init__(state['rows'], state['cols'], state['rules'])
+        for sq, piece in enumerate(state['squares']):
+            if piece != EMPTY:
+                self.addPiece(piece, sq)
+        if state['sideToMove'] != self.sideToMove:
+            self.switchSide()
+        self.material = state['material']
+        for move, key, packed in zip(state['moves'], state['keys'],
+                                     state['states']):
+            self.pushUndo(move, key, packed)
+        self.setCastlingRights(state['castlingRights'])
+        self.castlingRooks = list(state['castlingRooks'])
+        self.keepRights = list(state['keepRights'])
+        self.setEnPassantSquare(state['epSquare'])
+        self.halfmoveClock = state['halfmoveClock']
+    def restore(self, snapshot, moves:array, keys:array,
+                states:array)->None:
+        """makes this the position of a snapshot (see snapshot.py) taken
+        from a position of the same game, with the given moves, keys and
+        packed states as its undo stack (see pushUndo)"""
+        for sq, piece in enumerate(self.squares):
+            if piece != EMPTY:
+                self.removePiece(sq)
+        for sq, piece in enumerate(snapshot.board):
+            if piece != EMPTY:
+                self.addPiece(piece, sq)
+        if snapshot.sideToMove != self.sideToMove:
+            self.switchSide()
+        self.setCastlingRights(snapshot.castlingRights)
+        self.setEnPassantSquare(snapshot.epSquare)
+        self.halfmoveClock = snapshot.halfmoveClock
+        self.material = snapshot.material
+        count = len(moves)
+        while len(self.undoMoves) < count:
+            self.undoMoves.extend(self.undoMoves)
+            self.undoKeys.extend(self.undoKeys)
+            self.undoStates.extend(self.undoStates)
+        self.undoMoves[:count] = moves
+        self.undoKeys[:count] = keys
+        self.undoStates[:count] = states
+        self.undoCount = count
+    def snapshot(self)->'PositionSnapshot':
+        """returns an immutable snapshot of the current position (see
+        snapshot.py)"""
+        from .snapshot import PositionSnapshot
+        return PositionSnapshot.fromPosition(self)
+    def square(self, row:int, col:int)->int:
+        """returns the square index of (row, col)"""
+        return row * self.cols + col
+    def coordinates(self, sq:int)->tuple:
+        """returns the (row, col) of a square index"""
+        return divmod(sq, self.cols)
+    def pieceAt(self, sq:int)->int:
+        """returns the piece on a square (EMPTY if there is none)"""
+        return self.squares[sq]
+    def addPiece(self, piece:int, sq:int)->None:
+        """puts a piece on an empty square"""
+        bit = 1 << sq
+        self.pieces[piece] |= bit
+        self.occupied[piece // 6] |= bit
+        self.squares[sq] = piece
+        self.key ^= self.zobrist.pieceKeys[piece][sq]
+        self.positional += self.evaluationTables.pieceSquare[piece][sq]
+    def removePiece(self, sq:int)->int:
+        """removes and returns the piece on a square"""
+        piece = self.squares[sq]
+        if piece != EMPTY:
+            bit = 1 << sq
+            self.pieces[piece] ^= bit
+            self.occupied[piece // 6] ^= bit
+            self.squares[sq] = EMPTY
+            self.key ^= self.zobrist.pieceKeys[piece][sq]
+            self.positional -= self.evaluationTables.pieceSquare[piece][sq]
+        return piece
+    def movePiece(self, piece:int, fromSq:int, placed:int, toSq:int)->None:
+        """moves a piece from fromSq to the empty square toSq, where it
+        becomes placed (a different piece for promotions). Does the work of
+        removePiece and addPiece in one call."""
+        fromBit = 1 << fromSq
+        toBit = 1 << toSq
+        pieces = self.pieces
+        if piece == placed:
+            pieces[piece] ^= fromBit | toBit
+        else:
+            pieces[piece] ^= fromBit
+            pieces[placed] ^= toBit
+        self.occupied[piece // 6] ^= fromBit | toBit
+        squares = self.squares
+        squares[fromSq] = EMPTY
+        squares[toSq] = placed
+        pieceKeys = self.zobrist.pieceKeys
+        self.key ^= pieceKeys[piece][fromSq] ^ pieceKeys[placed][toSq]
+        pieceSquare = self.evaluationTables.pieceSquare
+        self.positional += pieceSquare[placed][toSq] - \
+                           pieceSquare[piece][fromSq]
+    def switchSide(self)->None:
+        """passes the move to the other side"""
+        self.sideToMove ^= 1
+        self.key ^= self.zobrist.sideKey
+    def castlingRookMove(self, color:int, kingFrom:int, kingTo:int)->tuple:
+        """returns the (fromSq, toSq) of the rook for a castling king move:
+        the rook jumps to the square the king passed over"""
+        side = 0 if kingTo > kingFrom else 1
+        return self.castlingRooks[color * 2 + side], (kingFrom + kingTo) // 2
+    def createMove(self, fromSq:int, toSq:int, promotion:int = QUEEN)->int:
+        """returns the packed move for moving the piece on fromSq to toSq,
+        working out its kind from the position: under standard rules a king
+        moving two columns castles, a pawn moving onto the en passant square
+        captures en passant and a pawn reaching the last row promotes to the
+        given piece type"""
+        piece = self.squares[fromSq]
+        captured = self.squares[toSq]
+        kind = NORMAL
+        if self.standardRules:
+            color = piece // 6
+            if piece % 6 == PAWN:
+                if toSq == self.epSquare:
+                    kind = EN_PASSANT
+                    captured = (color ^ 1) * 6 + PAWN
+                elif abs(toSq - fromSq) == 2 * self.cols:
+                    kind = DOUBLE_PUSH
+                elif toSq // self.cols == (0 if color == WHITE
+                                           else self.rows - 1):
+                    return encodeMove(fromSq, toSq, piece, captured,
+                                      PROMOTION, promotion)
+            elif piece % 6 == KING and abs(toSq - fromSq) == 2:
+                kind = CASTLING
+        return encodeMove(fromSq, toSq, piece, captured, kind)
+    def packState(self)->int:
+        """packs the castling rights, en passant square and halfmove clock
+        into one int for the undo stack"""
+        return self.castlingRights | (self.epSquare + 1) << 4 | \
+               self.halfmoveClock << 13
+    def pushUndo(self, move:int, key:int, packed:int)->None:
+        """records a move on the undo stack, growing it when it is full"""
+        index = self.undoCount
+        if index == len(self.undoMoves):
+            self.undoMoves.extend(self.undoMoves)
+            self.undoKeys.extend(self.undoKeys)
+            self.undoStates.extend(self.undoStates)
+        self.undoMoves[index] = move
+        self.undoKeys[index] = key
+        self.undoStates[index] = packed
+        self.undoCount = index + 1
+    def lastMove(self)->int:
+        """returns the last move made, or NO_MOVE at the start"""
+        return self.undoMoves[self.undoCount - 1] if self.undoCount \
+               else NO_MOVE
+    def makeMove(self, move:int)->int:
+        """makes a packed move (see createMove and generateMoves) without
+        checking legality and returns the captured piece (EMPTY if nothing
+        was captured)"""
+        fromSq = move & SQUARE_MASK
+        toSq = move >> TO_SHIFT & SQUARE_MASK
+        moved = move >> PIECE_SHIFT & PIECE_MASK
+        captured = move >> CAPTURED_SHIFT & PIECE_MASK
+        index = self.undoCount
+        if index == len(self.undoMoves):
+            self.pushUndo(move, self.key, self.packState())
+        else: #pushUndo and packState inlined, as this runs at every node
+            self.undoMoves[index] = move
+            self.undoKeys[index] = self.key
+            self.undoStates[index] = self.castlingRights | \
+                (self.epSquare + 1) << 4 | self.halfmoveClock << 13
+            self.undoCount = index + 1
+        placed = moved
+        if self.standardRules:
+            kind = move >> KIND_SHIFT & KIND_MASK
+            if kind == EN_PASSANT:
+                self.removePiece(toSq + (self.cols if moved < 6
+                                         else -self.cols))
+            elif captured != EMPTY:
+                self.removePiece(toSq)
+            self.setEnPassantSquare(-1)
+            if kind == DOUBLE_PUSH:
+                self.setEnPassantSquare((fromSq + toSq) // 2)
+            elif kind == PROMOTION:
+                placed = moved - PAWN + (move >> PROMOTION_SHIFT & KIND_MASK)
+                self.material += self.evaluationTables.promotionScore[placed]
+            elif kind == CASTLING:
+                rookFrom, rookTo = self.castlingRookMove(moved // 6, fromSq,
+                                                         toSq)
+                self.addPiece(self.removePiece(rookFrom), rookTo)
+            self.setCastlingRights(self.castlingRights &
+                                   self.keepRights[fromSq] &
+                                   self.keepRights[toSq])
+            if moved % 6 == PAWN or captured != EMPTY:
+                self.halfmoveClock = 0
+            else:
+                self.halfmoveClock += 1
+        elif captured != EMPTY:
+            self.removePiece(toSq)
+        self.movePiece(moved, fromSq, placed, toSq)
+        if captured != EMPTY:
+            self.material += self.evaluationTables.captureScore[captured]
+        self.sideToMove ^= 1
+        self.key ^= self.zobrist.sideKey
+        return captured
+    def unmakeMove(self)->int:
+        """takes back the last move made with makeMove and returns it"""
+        self.undoCount -= 1
+        index = self.undoCount
+        move = self.undoMoves[index]
+        fromSq = move & SQUARE_MASK
+        toSq = move >> TO_SHIFT & SQUARE_MASK
+        moved = move >> PIECE_SHIFT & PIECE_MASK
+        captured = move >> CAPTURED_SHIFT & PIECE_MASK
+        kind = move >> KIND_SHIFT & KIND_MASK
+        placed = self.squares[toSq]
+        self.movePiece(placed, toSq, moved, fromSq)
+        if captured != EMPTY:
+            if kind == EN_PASSANT:
+                self.addPiece(captured, toSq + (self.cols if moved < 6
+                                                else -self.cols))
+            else:
+                self.addPiece(captured, toSq)
+            self.material -= self.evaluationTables.captureScore[captured]
+        if kind == PROMOTION:
+            self.material -= self.evaluationTables.promotionScore[placed]
+        elif kind == CASTLING:
+            rookFrom, rookTo = self.castlingRookMove(moved // 6, fromSq, toSq)
+            self.addPiece(self.removePiece(rookTo), rookFrom)
+        packed = self.undoStates[index]
+        self.castlingRights = packed & ALL_CASTLING_RIGHTS
+        self.epSquare = (packed >> 4 & 0x1FF) - 1
+        self.halfmoveClock = packed >> 13
+        self.sideToMove ^= 1
+        self.key = self.undoKeys[index]
+        return move
+    def makeNullMove(self)->None:
+        """passes the move to the other side without moving, for null-move
+        pruning. The pass is recorded as NO_MOVE, which ends the search for
+        repetitions as a capture does."""
+        self.pushUndo(NO_MOVE, self.key, self.packState())
+        self.setEnPassantSquare(-1)
+        self.switchSide()
+    def unmakeNullMove(self)->None:
+        """takes back a pass made with makeNullMove"""
+        self.undoCount -= 1
+        self.epSquare = (self.undoStates[self.undoCount] >> 4 & 0x1FF) - 1
+        self.sideToMove ^= 1
+        self.key = self.undoKeys[self.undoCount]
+    def takeBackTo(self, undoCount:int)->None:
+        """takes back moves, and null moves, until undoCount are left, as
+        after a search was interrupted in the middle of a line"""
+        while self.undoCount > undoCount:
+            if self.undoMoves[self.undoCount - 1] == NO_MOVE:
+                self.unmakeNullMove()
+            else:
+                self.unmakeMove()
+    def changedSquares(self, move:int)->tuple:
+        """returns every square a move changes"""
+        fromSq = move & SQUARE_MASK
+        toSq = move >> TO_SHIFT & SQUARE_MASK
+        moved = move >> PIECE_SHIFT & PIECE_MASK
+        kind = move >> KIND_SHIFT & KIND_MASK
+        if kind == EN_PASSANT:
+            return (fromSq, toSq, toSq + (self.cols if moved < 6
+                                          else -self.cols))
+        if kind == CASTLING:
+            return (fromSq, toSq) + self.castlingRookMove(moved // 6, fromSq,
+                                                          toSq)
+        return (fromSq, toSq)
+    def moveCoordinates(self, move:int)->tuple:
+        """converts a move to ((fromRow, fromCol), (toRow, toCol)), with the
+        name of the promotion piece as a third element for promotions"""
+        coordinates = (self.coordinates(move & SQUARE_MASK),
+                       self.coordinates(move >> TO_SHIFT & SQUARE_MASK))
+        if move >> KIND_SHIFT & KIND_MASK == PROMOTION:
+            coordinates += (PIECE_NAMES[move >> PROMOTION_SHIFT & KIND_MASK],)
+        return coordinates
+    def evaluate(self)->int:
+        """returns the evaluation of the position from white's point of view
+        in tenths of a pawn. Costs O(1): the score is updated as pieces
+        move instead of being recomputed from the board."""
+        return self.material + self.positional
+    def repetitionCount(self)->int:
+        """returns how many times the current position (with the same side
+        to move) occurred earlier in the move history. Only looks back to
+        the last capture or pawn move, since no earlier position can
+        repeat."""
+        count = 0
+        for index in range(self.undoCount - 1, -1, -1):
+            move = self.undoMoves[index]
+            if move >> CAPTURED_SHIFT & PIECE_MASK != EMPTY or \
+               (move >> PIECE_SHIFT & PIECE_MASK) % 6 == PAWN:
+                break
+            if (self.undoCount - index) % 2 == 0 and \
+               self.undoKeys[index] == self.key:
+                count += 1
+        return count
+    def isRepetition(self)->bool:
+        """returns whether the current position (with the same side to move)
+        already occurred earlier in the move history"""
+        moves = self.undoMoves
+        keys = self.undoKeys
+        key = self.key
+        for index in range(self.undoCount - 1, -1, -1):
+            move = moves[index]
+            if move >> CAPTURED_SHIFT & PIECE_MASK != EMPTY or \
+               (move >> PIECE_SHIFT & PIECE_MASK) % 6 == PAWN:
+                return False
+            if (self.undoCount - index) % 2 == 0 and keys[index] == key:
+                return True
+        return False
+    def insufficientMaterial(self)->bool:
+        """returns whether neither side can possibly checkmate: only kings
+        are left, plus at most one knight or bishop"""
+        pieces = self.pieces
+        for color in (WHITE, BLACK):
+            if pieces[color * 6 + PAWN] or pieces[color * 6 + ROOK] or \
+               pieces[color * 6 + QUEEN]:
+                return False
+        minors = pieces[KNIGHT] | pieces[BISHOP] | pieces[6 + KNIGHT] | \
+                 pieces[6 + BISHOP]
+        return minors & (minors - 1) == 0
+    def isDraw(self)->bool:
+        """returns whether the game is drawn under standard rules by the
+        fifty-move rule, threefold repetition or insufficient material
+        (stalemate is found by the move generator instead)"""
+        return self.halfmoveClock >= 100 or self.repetitionCount() >= 2 or \
+               self.insufficientMaterial()
+    def attackersTo(self, sq:int, occupied:int, byColor:int)->int:
+        """returns a bitboard of the pieces of byColor attacking sq, with
+        occupied as the blocking pieces for sliders"""
+        tables = self.tables
+        pieces = self.pieces
+        base = byColor * 6
+        #a pawn of byColor attacks sq from the squares a pawn of the other
+        #color on sq would attack
+        attackers = (tables.knightAttacks[sq] & pieces[base + KNIGHT]) | \
+                    (tables.kingAttacks[sq] & pieces[base + KING]) | \
+                    (tables.pawnAttacks[byColor ^ 1][sq] & pieces[base + PAWN])
+        rooks = pieces[base + ROOK] | pieces[base + QUEEN]
+        if rooks:
+            attackers |= tables.slidingAttacks(sq, occupied,
+                                               ROOK_DIRECTIONS) & rooks
+        bishops = pieces[base + BISHOP] | pieces[base + QUEEN]
+        if bishops:
+            attackers |= tables.slidingAttacks(sq, occupied,
+                                               BISHOP_DIRECTIONS) & bishops
+        return attackers
+    def isAttacked(self, sq:int, byColor:int, occupied:int = None)->bool:
+        """returns whether any piece of byColor attacks sq, read from the
+        attack map unless other blocking pieces are given as occupied"""
+        if occupied is None:
+            return self.attackMap(byColor) >> sq & 1 == 1
+        return self.attackersTo(sq, occupied, byColor) != 0
+    def kingSquare(self, color:int)->int:
+        """returns the square of color's king, or -1 if it has none"""
+        return self.pieces[color * 6 + KING].bit_length() - 1
+    def inCheck(self, color:int = None)->bool:
+        """returns whether color's king (the side to move's by default) is
+        attacked"""
+        if color is None:
+            color = self.sideToMove
+        kingSq = self.kingSquare(color)
+        #the search asks this once per node, where finding the attackers of
+        #one square is cheaper than building a whole attack map
+        return kingSq >= 0 and self.attackersTo(
+            kingSq, self.occupied[WHITE] | self.occupied[BLACK], color ^ 1) != 0
+    def analysis(self)->list:
+        """returns the cache entry of the current position: [key, white's
+        and black's attack maps, white's and black's mobility, whether white
+        and black have any move, whether white and black have any move with
+        a piece other than the king], with None for what has not been asked
+        for yet. There is one entry per undo stack level, and an entry left
+        by another position at the same level is cleared."""
+        cache = self.analysisCache
+        level = self.undoCount
+        while len(cache) <= level:
+            cache.append([None] * 9)
+        entry = cache[level]
+        if entry[0] != self.key:
+            entry[:] = (self.key, None, None, None, None, None, None, None,
+                        None)
+        return entry
+    def attackMap(self, color:int)->int:
+        """returns a bitboard of every square color's pieces attack
+        (defended pieces of its own included). It is built once per
+        position."""
+        entry = self.analysis()
+        attacks = entry[1 + color]
+        if attacks is None:
+            tables = self.tables
+            pieces = self.pieces
+            base = color * 6
+            occupied = self.occupied[WHITE] | self.occupied[BLACK]
+            attacks = 0
+            for sq in squaresOf(pieces[base + PAWN]):
+                attacks |= tables.pawnAttacks[color][sq]
+            for sq in squaresOf(pieces[base + KNIGHT]):
+                attacks |= tables.knightAttacks[sq]
+            for sq in squaresOf(pieces[base + KING]):
+                attacks |= tables.kingAttacks[sq]
+            for sq in squaresOf(pieces[base + BISHOP] | pieces[base + QUEEN]):
+                attacks |= tables.slidingAttacks(sq, occupied,
+                                                 BISHOP_DIRECTIONS)
+            for sq in squaresOf(pieces[base + ROOK] | pieces[base + QUEEN]):
+                attacks |= tables.slidingAttacks(sq, occupied,
+                                                 ROOK_DIRECTIONS)
+            entry[1 + color] = attacks
+        return attacks
+    def mobility(self, color:int)->tuple:
+        """returns (moves, moves of pieces other than the king) for color
+        under the position's rules, counted once per position"""
+        entry = self.analysis()
+        counts = entry[3 + color]
+        if counts is None:
+            if self.standardRules:
+                moves = self.generateLegalMoves(color)
+                kingMoves = sum(1 for move in moves if
+                                (move >> PIECE_SHIFT & PIECE_MASK) % 6 == KING)
+                counts = (len(moves), len(moves) - kingMoves)
+            else:
+                pieceMoves = kingMoves = 0
+                for sq in squaresOf(self.occupied[color]):
+                    targets = self.pieceTargets(sq).bit_count()
+                    if self.squares[sq] % 6 == KING:
+                        kingMoves += targets
+                    else:
+                        pieceMoves += targets
+                counts = (pieceMoves + kingMoves, pieceMoves)
+            entry[3 + color] = counts
+        return counts
+    def hasMoves(self, color:int, withKing:bool = True)->bool:
+        """returns whether color has any move (any move of a piece other
+        than its king if withKing is False). Under simplified rules this
+        stops at the first piece that can move; the answer is kept for the
+        position either way."""
+        entry = self.analysis()
+        slot = (5 if withKing else 7) + color
+        found = entry[slot]
+        if found is None:
+            if self.standardRules or entry[3 + color] is not None:
+                found = self.mobility(color)[0 if withKing else 1] > 0
+            else:
+                movers = self.occupied[color]
+                if not withKing:
+                    movers &= ~self.pieces[color * 6 + KING]
+                found = any(self.pieceTargets(sq) for sq in squaresOf(movers))
+            entry[slot] = found
+        return found
+    def pieceTargets(self, sq:int)->int:
+        """returns a bitboard of every square the piece on sq can move to
+        under simplified rules"""
+        piece = self.squares[sq]
+        if piece == EMPTY:
+            return 0
+        color, kind = divmod(piece, 6)
+        tables = self.tables
+        if kind == PAWN:
+            empty = ~(self.occupied[WHITE] | self.occupied[BLACK])
+            return (tables.pawnPushes[color][sq] & empty) | \
+                   (tables.pawnAttacks[color][sq] & self.occupied[color ^ 1])
+        own = self.occupied[color]
+        if kind == KNIGHT:
+            return tables.knightAttacks[sq] & ~own
+        if kind == KING:
+            return tables.kingAttacks[sq] & ~own
+        occupied = self.occupied[WHITE] | self.occupied[BLACK]
+        if kind == ROOK:
+            directions = ROOK_DIRECTIONS
+        elif kind == BISHOP:
+            directions = BISHOP_DIRECTIONS
+        else:
+            directions = QUEEN_DIRECTIONS
+        return tables.slidingAttacks(sq, occupied, directions) & ~own
+    def legalTargets(self, sq:int)->int:
+        """returns a bitboard of every square the piece on sq can move to
+        under the position's rules, as if its side were to move"""
+        piece = self.squares[sq]
+        if piece == EMPTY:
+            return 0
+        if not self.standardRules:
+            return self.pieceTargets(sq)
+        color = piece // 6
+        key, cachedColor, targets = self.targetCache
+        if key != self.key or cachedColor != color:
+            #the legal moves of every piece are found at once, so they are
+            #cached for the other pieces of the same position
+            targets = {}
+            for move in self.generateLegalMoves(color):
+                fromSq = move & SQUARE_MASK
+                targets[fromSq] = targets.get(fromSq, 0) | \
+                                  1 << (move >> TO_SHIFT & SQUARE_MASK)
+            self.targetCache = (self.key, color, targets)
+        return targets.get(sq, 0)
+    def generateMoves(self, color:int = None)->list:
+        """returns every move for the given color (the side to move by
+        default) under the position's rules, packed into ints (see
+        encodeMove)"""
+        if color is None:
+            color = self.sideToMove
+        if self.standardRules:
+            return self.generateLegalMoves(color)
+        squares = self.squares
+        moves = []
+        for fromSq in squaresOf(self.occupied[color]):
+            base = fromSq | squares[fromSq] << PIECE_SHIFT
+            for toSq in squaresOf(self.pieceTargets(fromSq)):
+                moves.append(base | toSq << TO_SHIFT |
+                             squares[toSq] << CAPTURED_SHIFT)
+        return moves
+    def generateCaptures(self, color:int = None)->list:
+        """returns the captures and promotions among the moves of the given
+        color (the side to move by default), packed like generateMoves"""
+        if color is None:
+            color = self.sideToMove
+        if self.standardRules:
+            return [move for move in self.generateLegalMoves(color)
+                    if move >> CAPTURED_SHIFT & PIECE_MASK != EMPTY or
+                    move >> KIND_SHIFT & KIND_MASK == PROMOTION]
+        #only attacks onto enemy pieces are needed, so pawn pushes are
+        #skipped and the targets of each piece are looked up directly
+        #rather than through pieceTargets
+        tables = self.tables
+        squares = self.squares
+        enemy = self.occupied[color ^ 1]
+        occupied = enemy | self.occupied[color]
+        pawnAttacks = tables.pawnAttacks[color]
+        knightAttacks = tables.knightAttacks
+        kingAttacks = tables.kingAttacks
+        slidingAttacks = tables.slidingAttacks
+        base = color * 6
+        moves = []
+        for fromSq in squaresOf(self.occupied[color]):
+            piece = squares[fromSq]
+            kind = piece - base
+            if kind == PAWN:
+                targets = pawnAttacks[fromSq] & enemy
+            elif kind == KNIGHT:
+                targets = knightAttacks[fromSq] & enemy
+            elif kind == KING:
+                targets = kingAttacks[fromSq] & enemy
+            else:
+                targets = slidingAttacks(fromSq, occupied,
+                                         ROOK_DIRECTIONS if kind == ROOK else
+                                         BISHOP_DIRECTIONS if kind == BISHOP
+                                         else QUEEN_DIRECTIONS) & enemy
+            while targets:
+                lowBit = targets & -targets
+                toSq = lowBit.bit_length() - 1
+                moves.append(fromSq | piece << PIECE_SHIFT | toSq << TO_SHIFT |
+                             squares[toSq] << CAPTURED_SHIFT)
+                targets ^= lowBit
+        return moves
+    def generateQuietMoves(self, color:int = None)->list:
+        """returns the moves of the given color (the side to move by default)
+        that neither capture nor promote, packed like generateMoves"""
+        if color is None:
+            color = self.sideToMove
+        if self.standardRules:
+            return [move for move in self.generateLegalMoves(color)
+                    if move >> CAPTURED_SHIFT & PIECE_MASK == EMPTY and
+                    move >> KIND_SHIFT & KIND_MASK != PROMOTION]
+        squares = self.squares
+        notEnemy = ~self.occupied[color ^ 1]
+        moves = []
+        for fromSq in squaresOf(self.occupied[color]):
+            base = fromSq | squares[fromSq] << PIECE_SHIFT | \
+                   EMPTY << CAPTURED_SHIFT
+            for toSq in squaresOf(self.pieceTargets(fromSq) & notEnemy):
+                moves.append(base | toSq << TO_SHIFT)
+        return moves
+    def isPseudoLegal(self, move:int)->bool:
+        """returns whether a packed move, such as one stored in a
+        transposition table for another position with the same key, can be
+        made by the side to move under simplified rules. Under standard
+        rules only generateLegalMoves can tell."""
+        fromSq = move & SQUARE_MASK
+        toSq = move >> TO_SHIFT & SQUARE_MASK
+        piece = move >> PIECE_SHIFT & PIECE_MASK
+        return piece // 6 == self.sideToMove and \
+               move >> KIND_SHIFT & KIND_MASK == NORMAL and \
+               fromSq < len(self.squares) and toSq < len(self.squares) and \
+               self.squares[fromSq] == piece and \
+               self.squares[toSq] == move >> CAPTURED_SHIFT & PIECE_MASK and \
+               self.pieceTargets(fromSq) >> toSq & 1 == 1
+    def staticExchange(self, move:int)->int:
+        """returns the material (in tenths of a pawn) the side making a move
+        wins if both sides then keep recapturing on its destination square
+        with their least valuable piece, each side stopping when going on
+        would lose material. Pins and checks are not considered."""
+        toSq = move >> TO_SHIFT & SQUARE_MASK
+        moved = move >> PIECE_SHIFT & PIECE_MASK
+        captured = move >> CAPTURED_SHIFT & PIECE_MASK
+        kind = move >> KIND_SHIFT & KIND_MASK
+        occupied = (self.occupied[WHITE] | self.occupied[BLACK]) ^ \
+                   1 << (move & SQUARE_MASK)
+        #gains[i] is the material won by the side making the i-th capture,
+        #if the exchange stopped there
+        gains = [0 if captured == EMPTY else EXCHANGE_VALUES[captured % 6]]
+        attacker = moved % 6
+        if kind == EN_PASSANT:
+            occupied ^= 1 << (toSq + (self.cols if moved < 6 else -self.cols))
+        elif kind == PROMOTION:
+            attacker = move >> PROMOTION_SHIFT & KIND_MASK
+            gains[0] += EXCHANGE_VALUES[attacker] - EXCHANGE_VALUES[PAWN]
+        color = moved // 6
+        pieces = self.pieces
+        while True:
+            #the piece on the square is captured next, if anything can
+            gains.append(EXCHANGE_VALUES[attacker] - gains[-1])
+            if max(-gains[-2], gains[-1]) < 0:
+                break #neither side can gain by going on
+            color ^= 1
+            #pieces already used are removed from occupied, which also
+            #uncovers the sliders behind them
+            attackers = self.attackersTo(toSq, occupied, color) & occupied
+            if not attackers:
+                break
+            for attacker in range(6):
+                bits = attackers & pieces[color * 6 + attacker]
+                if bits:
+                    break
+            occupied ^= bits & -bits
+        #the last gain is for a capture nobody can make. Each side may stop
+        #capturing when that is better for it
+        for index in range(len(gains) - 2, 0, -1):
+            gains[index - 1] = -max(-gains[index - 1], gains[index])
+        return gains[0]
+    def pinMasks(self, kingSq:int, color:int, occupied:int)->dict:
+        """returns {square: allowed squares} for every piece of color pinned
+        to its king on kingSq. A pinned piece may only move along the line
+        between its king and the pinning piece (capturing it included)."""
+        tables = self.tables
+        pieces = self.pieces
+        enemy = (color ^ 1) * 6
+        rooks = pieces[enemy + ROOK] | pieces[enemy + QUEEN]
+        bishops = pieces[enemy + BISHOP] | pieces[enemy + QUEEN]
+        own = self.occupied[color]
+        pins = {}
+        for direction in QUEEN_DIRECTIONS:
+            sliders = rooks if direction in ROOK_DIRECTIONS else bishops
+            ray = tables.rays[direction][kingSq]
+            if not ray & sliders:
+                continue
+            positive = tables.rayIsPositive[direction]
+            blockers = ray & occupied
+            first = (blockers & -blockers).bit_length() - 1 if positive \
+                    else blockers.bit_length() - 1
+            if not own >> first & 1:
+                continue
+            beyond = tables.rays[direction][first] & occupied
+            if not beyond:
+                continue
+            second = (beyond & -beyond).bit_length() - 1 if positive \
+                     else beyond.bit_length() - 1
+            if sliders >> second & 1:
+                pins[first] = ray ^ tables.rays[direction][second]
+        return pins
+    def generateLegalMoves(self, color:int = None)->list:
+        """
+        Returns every legal move for color under standard rules. Checks and
+        pins are worked out once for the position: in check, non-king moves
+        must capture the checking piece or block its line, pinned pieces
+        must stay on their pin line, and the king may not move onto an
+        attacked square. Only en passant captures, which can uncover an
+        attack along the capturing pawn's row, are tested by making them.
+        """
+        if color is None:
+            color = self.sideToMove
+        tables = self.tables
+        squares = self.squares
+        enemy = color ^ 1
+        own = self.occupied[color]
+        occupied = own | self.occupied[enemy]
+        kingBitboard = self.pieces[color * 6 + KING]
+        moves = []
+        checkMask = -1 #squares non-king moves must land on, all by default
+        pins = {}
+        kingSq = kingBitboard.bit_length() - 1
+        if kingBitboard:
+            withoutKing = occupied ^ kingBitboard
+            base = kingSq | (color * 6 + KING) << PIECE_SHIFT
+            for toSq in squaresOf(tables.kingAttacks[kingSq] & ~own):
+                if not self.attackersTo(toSq, withoutKing, enemy):
+                    moves.append(base | toSq << TO_SHIFT |
+                                 squares[toSq] << CAPTURED_SHIFT)
+            checkers = self.attackersTo(kingSq, occupied, enemy)
+            if checkers & (checkers - 1):
+                return moves #double check: only the king can move
+            if checkers:
+                checkerSq = checkers.bit_length() - 1
+                checkMask = checkers | (tables.line(kingSq, checkerSq)
+                            if self.squares[checkerSq] % 6 in (BISHOP, ROOK,
+                                                                QUEEN) else 0)
+            else:
+                self.addCastlingMoves(moves, color, kingSq, occupied)
+            pins = self.pinMasks(kingSq, color, occupied)
+        empty = ~occupied
+        pawnPushes = tables.pawnPushes[color]
+        pawnAttacks = tables.pawnAttacks[color]
+        startRow = self.rows - 2 if color == WHITE else 1
+        promotionRow = 0 if color == WHITE else self.rows - 1
+        #only the side to move can capture en passant
+        epSquare = self.epSquare if color == self.sideToMove else -1
+        for fromSq in squaresOf(own & ~kingBitboard):
+            piece = squares[fromSq]
+            base = fromSq | piece << PIECE_SHIFT
+            allowed = checkMask & pins.get(fromSq, -1)
+            if piece % 6 == PAWN:
+                push = pawnPushes[fromSq] & empty
+                if push and fromSq // self.cols == startRow:
+                    doublePush = pawnPushes[push.bit_length() - 1] & empty & \
+                                 allowed
+                    if doublePush:
+                        moves.append(base | (doublePush.bit_length() - 1)
+                                     << TO_SHIFT | EMPTY << CAPTURED_SHIFT |
+                                     DOUBLE_PUSH << KIND_SHIFT)
+                targets = push | pawnAttacks[fromSq] & self.occupied[enemy]
+                for toSq in squaresOf(targets & allowed):
+                    move = base | toSq << TO_SHIFT | \
+                           squares[toSq] << CAPTURED_SHIFT
+                    if toSq // self.cols == promotionRow:
+                        move |= PROMOTION << KIND_SHIFT
+                        for promotion in PROMOTION_PIECES:
+                            moves.append(move | promotion << PROMOTION_SHIFT)
+                    else:
+                        moves.append(move)
+                if epSquare >= 0 and pawnAttacks[fromSq] >> epSquare & 1:
+                    move = encodeMove(fromSq, epSquare, piece, enemy * 6 + PAWN,
+                                      EN_PASSANT)
+                    self.makeMove(move)
+                    if not self.inCheck(color):
+                        moves.append(move)
+                    self.unmakeMove()
+            else:
+                for toSq in squaresOf(self.pieceTargets(fromSq) & allowed):
+                    moves.append(base | toSq << TO_SHIFT |
+                                 squares[toSq] << CAPTURED_SHIFT)
+        return moves
+    def addCastlingMoves(self, moves:list, color:int, kingSq:int,
+                         occupied:int)->None:
+        """adds the castling moves of color's king, which is not in check:
+        the squares between king and rook must be empty and the king may
+        not pass over or land on an attacked square"""
+        for side in (0, 1):
+            right = color * 2 + side
+            if not self.castlingRights >> right & 1:
+                continue
+            rookSq = self.castlingRooks[right]
+            step = 1 if side == 0 else -1
+            between = self.tables.line(kingSq, rookSq) ^ (1 << rookSq)
+            if between & occupied:
+                continue
+            if self.isAttacked(kingSq + step, color ^ 1, occupied) or \
+               self.isAttacked(kingSq + 2 * step, color ^ 1, occupied):
+                continue
+            moves.append(encodeMove(kingSq, kingSq + 2 * step,
+                                    color * 6 + KING, EMPTY, CASTLING))
@@ -0,0 +1,295 @@
+"""
+Opening book and position cache stored on disk. A book maps Zobrist keys
+(see zobrist.py) to the best move, score and search depth found for that
+position, and is read through a memory-mapped file: opening a book does not
+read it, lookups binary search the keys in place, and worker processes that
+open the same file share its pages through the operating system.
+
+File layout (little endian): a header (see HEADER) giving the board shape,
+the rules and the number of entries, then four arrays of that length, each
+starting on a multiple of its item size: the keys in increasing order
+(uint64), the packed moves (uint32, see bitboard.encodeMove), the scores in
+tenths of a pawn from the side to move's point of view (int32) and the
+depths (uint8). Books are written to a temporary file that then replaces
+the old one, so processes that still have the old book open keep reading
+it.
+
+Books are built by replaying games, such as the output of
+chessgame.selfplay, and searching the first few positions of each:
+    python -m chessgame.book results.jsonl --output book.bin --depth 4
+    python -m chessgame.selfplay minimax:3 minimax:3 --book book.bin
+or the games of PGN files (see pgn.py), from the position given by --fen:
+    python -m chessgame.book games.pgn --pgn --rules standard --fen "..."
+"""
+import argparse
+import bisect
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from .bitboard import (BitboardPosition, PIECE_NAMES, QUEEN, SIMPLIFIED,
+                       STANDARD)
+from .search import AlphaBetaSearch
+from .transposition import TranspositionTable
+from .evaluation import SCORE_SCALE
+from .game import STARTING_BOARD
+from .fen import positionFromFen, positionToFen
+
+MAGIC = b'CGBK'
+VERSION = 1
+#magic, version, rows, columns, rules (index in RULES) and entry count
+HEADER = struct.Struct('<4sIHHHxxQ')
+RULES = (SIMPLIFIED, STANDARD)
+
+class BookError(ValueError):
+    """raised for a file that is not a book, or a book that does not match
+    the position it is used with"""
+
+class PositionBook(object):
+    """
+    A read-only book opened from a file. lookup(key) returns (move, score,
+    depth) for a position's Zobrist key, or None if the book does not have
+    it. Books are pickled as their path, so a book passed to a worker
+    process is opened again (and shared) there.
+    """
+    def __init__(self, path:str)->None:
+        self.path = path
+        with open(path, 'rb') as bookFile:
+            size = os.fstat(bookFile.fileno()).st_size
+            if size < HEADER.size:
+                raise BookError(f"{path} is not a position book")
+            self.map = mmap.mmap(bookFile.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.rows, self.cols, rules, count = \
+            HEADER.unpack_from(self.map)
+        if magic != MAGIC or version != VERSION or rules >= len(RULES) or \
+           size != sectionOffsets(count)[-1]:
+            self.map.close()
+            raise BookError(f"{path} is not a version {VERSION} position book")
+        self.rules = RULES[rules]
+        self.count = count
+        keysAt, movesAt, scoresAt, depthsAt, end = sectionOffsets(count)
+        view = memoryview(self.map)
+        #zero-copy typed views of the arrays in the mapped file
+        self.keys = view[keysAt:movesAt].cast('Q')
+        self.moves = view[movesAt:scoresAt].cast('I')
+        self.scores = view[scoresAt:depthsAt].cast('i')
+        self.depths = view[depthsAt:end]
+    def __len__(self)->int:
+        return self.count
+    def __contains__(self, key:int)->bool:
+        return self.find(key) >= 0
+    def __getstate__(self)->dict:
+        return {'path': self.path}
+    def __setstate__(self, state:dict)->None:
+        self.__init__(state['path'])
+    def __enter__(self)->'PositionBook':
+        return self
+    def __exit__(self, *exception)->None:
+        self.close()
+    def close(self)->None:
+        """releases the mapped file"""
+        for view in (self.keys, self.moves, self.scores, self.depths):
+            view.release()
+        self.map.close()
+    def find(self, key:int)->int:
+        """returns the index of the entry for key, or -1"""
+        index = bisect.bisect_left(self.keys, key)
+        if index < self.count and self.keys[index] == key:
+            return index
+        return -1
+    def lookup(self, key:int)->tuple:
+        """returns (move, score, depth) stored for the key, or None"""
+        index = self.find(key)
+        if index < 0:
+            return None
+        return self.moves[index], self.scores[index], self.depths[index]
+    def matches(self, position:BitboardPosition)->bool:
+        """returns whether the book was built for the position's board shape
+        and rules, as keys are only comparable between those"""
+        return (position.rows, position.cols, position.rules) == \
+               (self.rows, self.cols, self.rules)
+
+def sectionOffsets(count:int)->tuple:
+    """returns the file offsets of the keys, moves, scores and depths arrays
+    of a book with count entries, and the file size"""
+    keysAt = HEADER.size
+    movesAt = keysAt + 8 * count
+    scoresAt = movesAt + 4 * count
+    depthsAt = scoresAt + 4 * count
+    return keysAt, movesAt, scoresAt, depthsAt, depthsAt + count
+
+class BookBuilder(object):
+    """
+    Collects book entries in memory and writes them to a file. Adding a
+    position that is already present keeps the deeper of the two entries.
+    """
+    def __init__(self, rows:int, cols:int, rules:str = SIMPLIFIED)->None:
+        self.rows = rows
+        self.cols = cols
+        self.rules = rules
+        self.entries = {} #key -> (move, score, depth)
+    @classmethod
+    def fromBook(cls, book:PositionBook)->'BookBuilder':
+        """returns a builder holding every entry of a book, to extend it"""
+        builder = cls(book.rows, book.cols, book.rules)
+        for index in range(len(book)):
+            builder.entries[book.keys[index]] = \
+                (book.moves[index], book.scores[index], book.depths[index])
+        return builder
+    def __len__(self)->int:
+        return len(self.entries)
+    def add(self, key:int, move:int, score:int, depth:int)->None:
+        """adds the best move, score (in tenths of a pawn) and depth of the
+        position with the given key"""
+        old = self.entries.get(key)
+        if old is None or old[2] < depth:
+            self.entries[key] = (move, score, min(depth, 255))
+    def write(self, path:str)->None:
+        """writes the book to path, replacing any existing file"""
+        keys = array('Q', sorted(self.entries))
+        moves = array('I', (self.entries[key][0] for key in keys))
+        scores = array('i', (self.entries[key][1] for key in keys))
+        depths = array('B', (self.entries[key][2] for key in keys))
+        temporaryPath = path + '.tmp'
+        with open(temporaryPath, 'wb') as bookFile:
+            bookFile.write(HEADER.pack(MAGIC, VERSION, self.rows, self.cols,
+                                       RULES.index(self.rules), len(keys)))
+            for section in (keys, moves, scores, depths):
+                if sys.byteorder == 'big':
+                    section.byteswap()
+                bookFile.write(section.tobytes())
+        os.replace(temporaryPath, path)
+
+def moveFromCoordinates(position:BitboardPosition, move:list)->int:
+    """returns the packed move for [fromRow, fromCol, toRow, toCol] with an
+    optional promotion piece name, as stored by chessgame.selfplay"""
+    promotion = PIECE_NAMES.index(move[4]) if len(move) > 4 else QUEEN
+    return position.createMove(position.square(move[0], move[1]),
+                               position.square(move[2], move[3]), promotion)
+
+def addGame(builder:BookBuilder, moves:list, depth:int, plies:int,
+            board:list = None, table:TranspositionTable = None,
+            fen:str = None)->int:
+    """replays a game given as a list of moves in coordinates from board
+    or a FEN string (the starting board by default), searching each of its
+    first plies positions that the builder does not have depth plies deep
+    and adding the result. Returns the number of positions searched."""
+    if fen is not None:
+        position = positionFromFen(fen, builder.rules)
+    else:
+        position = BitboardPosition.fromBoard(board or STARTING_BOARD,
+                                              builder.rules)
+    if (position.rows, position.cols) != (builder.rows, builder.cols):
+        raise BookError("the game's board does not match the book")
+    search = AlphaBetaSearch(position, table)
+    searched = 0
+    for move in moves[:plies]:
+        entry = builder.entries.get(position.key)
+        if entry is None or entry[2] < depth:
+            result = search.search(depth)
+            if result.bestMove is None:
+                break #the game is over
+            (fromRow, fromCol), (toRow, toCol), *promotion = result.bestMove
+            builder.add(position.key,
+                        moveFromCoordinates(position, [fromRow, fromCol, toRow,
+                                                       toCol] + promotion),
+                        round(result.score * SCORE_SCALE), depth)
+            searched += 1
+        position.makeMove(moveFromCoordinates(position, move))
+    return searched
+
+def readGames(path:str, rules:str, fen:str)->list:
+    """returns the move lists of the games in a chessgame.selfplay JSONL
+    file played under the given rules from the given FEN position. Records
+    without a FEN are from the starting board."""
+    placement = fen.split()[:2]
+    startFen = positionToFen(BitboardPosition.fromBoard(STARTING_BOARD,
+                                                        rules))
+    games = []
+    with open(path, encoding='utf-8') as gameFile:
+        for line in gameFile:
+            record = json.loads(line)
+            if 'moves' in record and \
+               record.get('rules', SIMPLIFIED) == rules and \
+               record.get('fen', startFen).split()[:2] == placement:
+                games.append(record['moves'])
+    return games
+
+def readPgnGames(path:str, rules:str, fen:str):
+    """yields the move lists, in coordinates, of the games of a PGN file
+    played under the given rules from the given FEN position. A game is cut
+    short at its first move that cannot be read."""
+    from .pgn import readPgn, moveFromSan, PgnError
+    placement = fen.split()[:2]
+    for pgnGame in readPgn(path):
+        if pgnGame.rules != rules or pgnGame.fen.split()[:2] != placement:
+            continue
+        position = positionFromFen(pgnGame.fen, rules)
+        moves = []
+        for san in pgnGame.moves:
+            try:
+                move = moveFromSan(position, san)
+            except PgnError:
+                break
+            (fromRow, fromCol), (toRow, toCol), *promotion = \
+                position.moveCoordinates(move)
+            moves.append([fromRow, fromCol, toRow, toCol] + promotion)
+            position.makeMove(move)
+        yield moves
+
+def main(arguments:list = None)->None:
+    """command line entry point"""
+    parser = argparse.ArgumentParser(
+        description="Build a position book from self-play games.")
+    parser.add_argument('games', nargs='+',
+                        help="JSONL files written by chessgame.selfplay, "
+                             "or PGN files with --pgn")
+    parser.add_argument('--output', required=True, help="book file to write")
+    parser.add_argument('--depth', type=int, default=4,
+                        help="search depth of each book position")
+    parser.add_argument('--plies', type=int, default=8,
+                        help="positions to add from the start of each game")
+    parser.add_argument('--rules', choices=RULES, default=SIMPLIFIED,
+                        help="rules of the games to read")
+    parser.add_argument('--pgn', action='store_true',
+                        help="read the games from PGN files")
+    parser.add_argument('--fen',
+                        help="starting position of the games (and the board "
+                             "shape of the book), the starting board by "
+                             "default; games from other positions are "
+                             "skipped")
+    parser.add_argument('--update', action='store_true',
+                        help="add to the existing book at --output")
+    options = parser.parse_args(arguments)
+    position = BitboardPosition.fromBoard(STARTING_BOARD, options.rules)
+    if options.fen is not None:
+        try:
+            position = positionFromFen(options.fen, options.rules)
+        except ValueError as error:
+            parser.error(f"bad --fen: {error}")
+    fen = positionToFen(position)
+    if options.update and os.path.exists(options.output):
+        with PositionBook(options.output) as book:
+            if not book.matches(position):
+                parser.error(f"{options.output} was built for other rules")
+            builder = BookBuilder.fromBook(book)
+    else:
+        builder = BookBuilder(position.rows, position.cols, options.rules)
+    table = TranspositionTable()
+    searched = 0
+    for path in options.games:
+        if options.pgn:
+            games = readPgnGames(path, options.rules, fen)
+        else:
+            games = readGames(path, options.rules, fen)
+        for moves in games:
+            searched += addGame(builder, moves, options.depth, options.plies,
+                                table=table, fen=fen)
+    builder.write(options.output)
+    print(f"searched {searched} positions, {len(builder)} in "
+          f"{options.output}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
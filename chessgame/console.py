@@ -0,0 +1,148 @@
+import argparse
+import copy
+import string
+from .game import ChessGame, STARTING_BOARD
+from .bitboard import PIECE_NAMES, SIMPLIFIED, STANDARD
+
+def isValidInput(L:list, board:list)->bool:
+    """checks if all inputs are valid for the game.makeMove() method. 
+    Takes in a list and outputs whether the variables are integers, whether 
+    the inputs are within the dimensions of the chass board. A fifth input
+    may name the piece a pawn promotes to."""
+    inputNum = 4
+    if len(L) == inputNum + 1 and L[inputNum] in PIECE_NAMES[1:5]:
+        L = L[:inputNum]
+    for index in range(len(L)):
+        if not L[index] in string.digits: return False
+        if index % 2 == 0 and int(L[index]) > len(board)-1: return False
+        elif index % 2 == 1 and int(L[index]) > len(board[0])-1: return False
+    return len(L) == inputNum
+
+def convertInput(L:list)->None:
+    """Destructively converts elements in a list into integers. 
+    Assumes isValidInput(L) is True."""
+    for index in range(min(len(L), 4)):
+        L[index] = int(L[index])
+
+def printChessBoard(chessBoard:list)->None:
+    """given a 2D list, print all rows with line breaks for readability"""
+    for row in chessBoard:
+        print(row)
+
+def choosePlayer(humanPlayers:int)->str:
+    """allows players to choose which side they play on. Choice does not matter
+    if there are 2 human players"""
+    if int(humanPlayers) == 2:
+        return "white"
+    elif int(humanPlayers) == 0:
+        return "none"
+    playerSide = ''
+    while not(playerSide == "black" or playerSide == "white"):
+        playerSide = input("Choose either black or white to play as: ")
+        if not(playerSide == "black" or playerSide == "white"):
+            print("Invalid Input." + 
+                  " Please type 'black' or 'white' in the console.")
+    return playerSide
+
+def determineInput(game:ChessGame,inputStr:str, color:str)->bool:
+    """determines which action to take given an input. Returns nothing"""
+    if inputStr == 'u': game.undoMove()
+    elif inputStr == 'r': game.redoMove()
+    elif inputStr == 'f': 
+        print(color, "forfeited")
+        return True
+    elif inputStr == 'p': print(game.getBlackTaken(), game.getWhiteTaken())
+    elif inputStr =='': print("Invalid input, genius.")
+    else:
+        moveInputs = inputStr.split(", ")
+        if isValidInput(moveInputs,game.getBoard()):
+            convertInput(moveInputs)
+            moveMade = game.makeMove(moveInputs[0],moveInputs[1],
+                                    moveInputs[2], moveInputs[3],
+                                    *moveInputs[4:])
+            if not moveMade:
+                print("Move is not legal, genius.")
+        else: print("Invalid input, genius.")
+    return False
+def computerMove(game:ChessGame,color:str,engineType:str,
+                 moveTime:float = None, workers:int = None)->None:
+    """chooses which chess engine to run. moveTime (in seconds) bounds how
+    long the minimax and Monte Carlo engines may think instead of searching
+    a fixed depth or number of playouts, and workers spreads their searches
+    over that many processes"""
+    if engineType == 'random':
+        game.randomEngine(color)
+        print(color + ' has made a move')
+    elif engineType == 'oneply':
+        game.minimaxEngine(color, 1)
+        print(color + ' has made a move')
+    elif engineType == 'minimax':
+        game.minimaxEngine(color, moveTime=moveTime, workers=workers)
+        print(color + ' has made a move')
+    elif engineType == 'mcts':
+        game.monteCarloEngine(color, moveTime=moveTime, workers=workers or 1)
+        print(color + ' has made a move')
+def chooseEngine(humanPlayers:str)->str:
+    """allows the user to choose a chess engine to play against if there are
+    less than 2 human players"""
+    if int(humanPlayers) >= 2:
+        return None
+    engineInput = ''
+    while not(engineInput in ("random", "oneply", "minimax", "mcts")):
+        engineInput = input("Choose a computer engine to play against"+
+                            "(type random, oneply, minimax or mcts): ")
+        if engineInput == 'random':
+            print("You have chosen to play against the Random Engine.")
+        elif engineInput == 'oneply':
+            print("You have chosen to play against the One-Ply Engine.")
+        elif engineInput == 'minimax':
+            print("You have chosen to play against the Minimax Engine.")
+        elif engineInput == 'mcts':
+            print("You have chosen to play against the Monte Carlo Engine.")
+        else:
+            print("Invalid Input. Please read the instructions thoroughly.")
+    return engineInput
+
+def checkColor(game: ChessGame, prevColor:str)->str:
+    """checks if the last iteration's turn is the same as the current iteration
+    """
+    if prevColor == game.getTurn():
+        game.switchTurns()
+        return game.getTurn()
+    else:
+        return game.getTurn()
+def runChess(board:list, rules:str = SIMPLIFIED)->None:
+    """given a starting board, start a chess game on the console under the
+    given rules (simplified by default)"""
+    winner, humanPlayers = "none", input("How Many Players? Type an integer: ")
+    chessEngine = chooseEngine(humanPlayers)
+    humanPlayerSide = choosePlayer(humanPlayers)
+    game = ChessGame(board, humanPlayerSide, humanPlayers, rules)
+    color = 'black'
+    while winner == "none":
+        printChessBoard(game.getBoard())
+        prevColor = color  
+        color = checkColor(game, prevColor)
+        if int(humanPlayers) == 0: computerMove(game,color,chessEngine)
+        elif int(humanPlayers) == 1 and color != humanPlayerSide:
+            computerMove(game,color,chessEngine)
+        else:  
+            move = input(f"What does {color} want to do? ")   
+            if determineInput(game, move, color):
+                game.switchTurns()
+                winner = game.getTurn()
+                break
+        winner = game.checkGameOver()[1]  
+    if winner == "draw": print("the game is a draw")
+    else: print(winner, "won")
+
+def main(arguments:list = None)->None:
+    """starts a console game on a fresh copy of the starting board"""
+    parser = argparse.ArgumentParser(description="Play chess on the console.")
+    parser.add_argument('--rules', choices=(SIMPLIFIED, STANDARD),
+                        default=SIMPLIFIED,
+                        help="simplified (the default) or standard chess "
+                             "rules with castling, en passant, promotion "
+                             "and no moving into check")
+    options = parser.parse_args(arguments)
+    runChess(copy.deepcopy(STARTING_BOARD), options.rules)
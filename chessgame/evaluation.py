@@ -0,0 +1,80 @@
+import functools
+
+#scores are kept in integer tenths of a pawn so that incremental updates add
+#up exactly; ChessGame.boardEvaluation divides by SCORE_SCALE
+SCORE_SCALE = 10
+#piece values by piece type (pawn, knight, bishop, rook, queen, king), as in
+#ChessGame.pieceWorth. Kings are a win condition, so they are worth the most
+PIECE_WORTH = (1, 3, 3, 5, 9, 9999)
+EDGE_SCORE = 1 #advantage of having a piece close to the center
+CENTER_SCORE = 3 #advantage of having a piece in the center
+
+def boardCenter(rowCount:int, colCount:int)->list:
+    """returns the center of the board, which is a list of either 1,2,or 4 
+    positions. 1 position is returned if both the number of rows and columns 
+    are odd, 2 positions are returned if either the number of rows or 
+    columns are even, and 4 positions are returned if both are even.
+    """
+    middleRows, middleCols = [], []
+    if rowCount % 2 == 1:
+        middleRows.append(rowCount//2)
+    else:
+        middleRows.extend([rowCount//2, rowCount//2 - 1])
+    if colCount % 2 == 1:
+        middleCols.append(colCount//2)
+    else:
+        middleCols.extend([colCount//2, colCount//2 - 1])
+    middlePositions=[(row, col) for row in middleRows for col in middleCols]
+    return middlePositions
+
+def boardEdges(rowCount:int, colCount:int)->list:
+    """returns list of squares adjacent to the center of the board"""
+    edgeRows,edgeCols= [],[]
+    if rowCount % 2 == 1:
+        edgeRows.extend([rowCount//2+1,rowCount//2-1])
+    else:
+        edgeRows.extend([rowCount//2+1, rowCount//2-2])
+    if colCount % 2 == 1:
+        edgeCols.extend([colCount//2+1,colCount//2-1])
+    else:
+        edgeCols.extend([colCount//2+1, colCount//2-2])
+    edgePositions=[]
+    for row in range(min(edgeRows), max(edgeRows)+1):
+        for col in range(min(edgeCols), max(edgeCols)+1):
+            edgePositions.append((row,col))
+    for item in boardCenter(rowCount, colCount): #removes center positions
+        if item in edgePositions:
+            edgePositions.remove(item)
+    return edgePositions
+
+class EvaluationTables(object):
+    """
+    Per-square scores for a board shape, built once from boardEdges and
+    boardCenter. pieceSquare[piece][square] is the positional score of a
+    piece on a square from white's point of view (negative for black
+    pieces), captureScore[piece] is the material swing when that piece is
+    captured and promotionScore[piece] the swing when a pawn is promoted to
+    it, all in the piece order used by bitboard.py.
+    """
+    def __init__(self, rows:int, cols:int)->None:
+        weights = [0] * (rows * cols)
+        for row, col in boardCenter(rows, cols):
+            weights[row * cols + col] = CENTER_SCORE
+        #edges are checked first in the original evaluation, so they win
+        for row, col in boardEdges(rows, cols):
+            if 0 <= row < rows and 0 <= col < cols:
+                weights[row * cols + col] = EDGE_SCORE
+        self.squareWeights = weights
+        self.pieceSquare = [list(weights) for piece in range(6)] + \
+                           [[-weight for weight in weights] for piece in range(6)]
+        #capturing a black piece is good for white and vice versa
+        self.captureScore = [-worth * SCORE_SCALE for worth in PIECE_WORTH] + \
+                            [worth * SCORE_SCALE for worth in PIECE_WORTH]
+        #promoting loses the pawn but gains the new piece
+        self.promotionScore = [self.captureScore[(piece // 6) * 6] -
+                               self.captureScore[piece] for piece in range(12)]
+
+@functools.lru_cache(maxsize=None)
+def getEvaluationTables(rows:int, cols:int)->EvaluationTables:
+    """returns the (shared) evaluation tables for a board shape"""
+    return EvaluationTables(rows, cols)
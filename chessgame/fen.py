@@ -0,0 +1,164 @@
+"""
+Reading and writing positions in Forsyth-Edwards Notation. Boards of any
+size are supported through an extended FEN: the number of rows is the
+number of '/'-separated ranks, the number of columns is the width of the
+first rank, and runs of empty squares may take more than one digit (e.g.
+'10' on a 10 column board). Files past 'h' continue the alphabet and ranks
+are counted from the bottom row, as in squareName.
+"""
+import re
+from .bitboard import (BitboardPosition, GLYPHS, SIMPLIFIED, STANDARD, EMPTY,
+                       PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, PROMOTION,
+                       decodeMove)
+
+#FEN letter of each piece type (white pieces are upper case)
+PIECE_LETTERS = {PAWN: 'p', KNIGHT: 'n', BISHOP: 'b', ROOK: 'r', QUEEN: 'q',
+                 KING: 'k'}
+LETTER_TO_PIECE = {letter: kind for kind, letter in PIECE_LETTERS.items()}
+#castling letters in castling rights bit order (see bitboard.py)
+CASTLING_LETTERS = 'KQkq'
+
+class FenError(ValueError):
+    """raised when a FEN string cannot be read"""
+
+def squareName(position:BitboardPosition, sq:int)->str:
+    """returns the algebraic name of a square, e.g. 'e4'. Row 0 is the
+    highest rank, as in ChessGame's board."""
+    row, col = position.coordinates(sq)
+    return chr(ord('a') + col) + str(position.rows - row)
+
+def squareFromName(position:BitboardPosition, name:str)->int:
+    """returns the square index of an algebraic square name"""
+    if re.fullmatch(r'[a-z]\d+', name) is None:
+        raise FenError(f"cannot read square {name!r}")
+    col = ord(name[0]) - ord('a')
+    row = position.rows - int(name[1:])
+    if not (0 <= row < position.rows and 0 <= col < position.cols):
+        raise FenError(f"square {name!r} is off the board")
+    return position.square(row, col)
+
+def moveName(position:BitboardPosition, move:tuple)->str:
+    """returns a packed move in coordinate notation, e.g. 'e2e4' or
+    'e7e8q'"""
+    fromSq, toSq, piece, captured, kind, promotion = decodeMove(move)
+    name = squareName(position, fromSq) + squareName(position, toSq)
+    if kind == PROMOTION:
+        name += PIECE_LETTERS[promotion]
+    return name
+
+def moveFromName(position:BitboardPosition, name:str)->int:
+    """returns the packed move for a move in coordinate notation (see
+    moveName), without checking that it is legal"""
+    match = re.fullmatch(r'([a-z]\d+)([a-z]\d+)([nbrq]?)', name)
+    if match is None:
+        raise FenError(f"cannot read move {name!r}")
+    fromName, toName, promotion = match.groups()
+    return position.createMove(squareFromName(position, fromName),
+                               squareFromName(position, toName),
+                               LETTER_TO_PIECE[promotion or 'q'])
+
+def boardFromPlacement(placement:str)->list:
+    """converts the piece placement field of a FEN string to a 2D list of
+    piece glyphs, as used by ChessGame"""
+    board = []
+    for rank in placement.split('/'):
+        row = []
+        digits = ''
+        for char in rank + ' ':
+            if char.isdigit():
+                digits += char
+                continue
+            if digits:
+                row.extend([' '] * int(digits))
+                digits = ''
+            if char == ' ':
+                break
+            if char.lower() not in LETTER_TO_PIECE:
+                raise FenError(f"unknown piece {char!r}")
+            kind = LETTER_TO_PIECE[char.lower()]
+            row.append(GLYPHS[kind + (6 if char.islower() else 0)])
+        if not row:
+            raise FenError("empty rank")
+        board.append(row)
+    if any(len(row) != len(board[0]) for row in board):
+        raise FenError("ranks have different lengths")
+    return board
+
+def placementFromPosition(position:BitboardPosition)->str:
+    """returns the piece placement field of a FEN string for a position"""
+    ranks = []
+    for row in range(position.rows):
+        rank = ''
+        empty = 0
+        for col in range(position.cols):
+            piece = position.pieceAt(position.square(row, col))
+            if piece == EMPTY:
+                empty += 1
+                continue
+            if empty:
+                rank += str(empty)
+                empty = 0
+            letter = PIECE_LETTERS[piece % 6]
+            rank += letter.upper() if piece < 6 else letter
+        if empty:
+            rank += str(empty)
+        ranks.append(rank)
+    return '/'.join(ranks)
+
+def positionToFen(position:BitboardPosition, fullmoveNumber:int = 1)->str:
+    """returns the FEN string of a position. The castling, en passant and
+    halfmove clock fields are only filled in under standard rules."""
+    castling = ''.join(letter for right, letter in enumerate(CASTLING_LETTERS)
+                       if position.castlingRights >> right & 1)
+    epSquare = '-'
+    if position.epSquare >= 0:
+        epSquare = squareName(position, position.epSquare)
+    return ' '.join((placementFromPosition(position),
+                     'wb'[position.sideToMove], castling or '-', epSquare,
+                     str(position.halfmoveClock), str(fullmoveNumber)))
+
+def checkKings(board:list, rules:str)->None:
+    """raises FenError unless each side has one king. Under simplified
+    rules a game is over once a king is captured, so one side may have
+    none, but not both."""
+    counts = [sum(row.count(GLYPHS[color * 6 + KING]) for row in board)
+              for color in (0, 1)]
+    if max(counts) > 1:
+        raise FenError("a side has more than one king")
+    if min(counts) == 0 and (rules == STANDARD or max(counts) == 0):
+        raise FenError("a side has no king")
+
+def positionFromFen(fen:str, rules:str = SIMPLIFIED)->BitboardPosition:
+    """
+    Builds a position from a FEN string. The side to move, castling, en
+    passant and halfmove clock fields are optional and default to 'w', '-',
+    '-' and 0. Castling rights are only kept for a king and rook that are
+    on their starting squares. rules defaults to simplified, as for
+    ChessGame.
+    """
+    fields = fen.split()
+    if not fields:
+        raise FenError("empty FEN")
+    if len(fields) > 6:
+        raise FenError("too many fields")
+    for field in fields[4:]:
+        if not field.isdigit():
+            raise FenError(f"move counter {field!r} is not a number")
+    fields += ['w', '-', '-', '0'][len(fields) - 1:]
+    board = boardFromPlacement(fields[0])
+    checkKings(board, rules)
+    position = BitboardPosition.fromBoard(board, rules)
+    if fields[1] not in ('w', 'b'):
+        raise FenError(f"unknown side to move {fields[1]!r}")
+    if fields[1] == 'b':
+        position.switchSide()
+    if position.standardRules:
+        rights = 0
+        for right, letter in enumerate(CASTLING_LETTERS):
+            if letter in fields[2]:
+                rights |= 1 << right
+        position.setCastlingRights(position.castlingRights & rights)
+        if fields[3] != '-':
+            position.setEnPassantSquare(squareFromName(position, fields[3]))
+        position.halfmoveClock = int(fields[4])
+    return position
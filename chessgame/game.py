@@ -0,0 +1,735 @@
+import random
+from .bitboard import (BitboardPosition, COLOR_NAMES, PIECE_NAMES, GLYPHS,
+                       EMPTY, SIMPLIFIED, CAPTURED_SHIFT, PIECE_MASK, WHITE,
+                       BLACK, squaresOf)
+from .search import AlphaBetaSearch, SearchResult, MAX_DEPTH
+from .transposition import TranspositionTable
+from .evaluation import boardCenter, boardEdges, SCORE_SCALE
+from .fen import positionFromFen, positionToFen, boardFromPlacement
+from .history import GameHistory, CHECKPOINT_INTERVAL
+
+class ChessGame(object):
+    def __init__(self, board: list, playerSide: str = 'white', 
+                 playerCount: str = 2, rules: str = SIMPLIFIED,
+                 checkpointInterval:int = CHECKPOINT_INTERVAL)->None:
+        """initializes the class variables. rules is 'simplified' for the
+        game's original rules or 'standard' for the rules of normal chess
+        (castling, en passant, promotion, double pawn pushes and no moving
+        into check). checkpointInterval is the number of plies between the
+        history checkpoints seek restores from (see history.py)."""
+        #stores the starting position, copied since board itself is moved on
+        self.originalBoard = [list(row) for row in board]
+        self.board = board
+        self.rules = rules
+        #bitboard copy of the board used for move generation. It is kept in
+        #sync with self.board by every method that moves pieces
+        self.position = BitboardPosition.fromBoard(board, rules)
+        #FEN of the starting position, which PGN export replays from
+        self.startFen = positionToFen(self.position)
+        #number of captured pieces of each piece type, indexed by piece (see
+        #bitboard.py), so captures are counted without branching; the extra
+        #EMPTY slot counts moves that captured nothing. getWhiteTaken and
+        #getBlackTaken list the captured pieces
+        self.capturedCounts = [0] * (EMPTY + 1)
+        self.currentPlayer = "white"
+        #next 2 variables are lists of moves packed into ints (see
+        #bitboard.encodeMove), which hold the start and end square, the
+        #moved and captured piece, and the promotion piece if any. Use
+        #position.moveCoordinates to read the squares of a move
+        self.moveHistory = [] #stores the entire move history of the game
+        self.undoneMoveHistory = [] #stores all undone moves
+        #every move of both lists with checkpoints for seek
+        self.history = GameHistory(checkpointInterval)
+        #shared by the minimax engine's searches; created on first use
+        self.transpositionTable = None
+        #position book the minimax engine plays from before searching (see
+        #useBook), or None
+        self.book = None
+        #endgame tables the minimax engine's searches use (see
+        #useTablebase), or None
+        self.tablebase = None
+        #the Monte Carlo engine's search, whose tree is reused between
+        #moves; created on first use
+        self.monteCarloSearch = None
+    @classmethod
+    def fromFen(cls, fen:str, rules:str = SIMPLIFIED)->'ChessGame':
+        """starts a game from a FEN string (see fen.py), which may describe
+        a board of any size"""
+        position = positionFromFen(fen, rules)
+        fields = fen.split()
+        game = cls(boardFromPlacement(fields[0]), rules=rules)
+        game.position = position
+        game.startFen = positionToFen(game.position,
+                                      int(fields[5]) if len(fields) > 5
+                                      else 1)
+        return game
+    def toFen(self)->str:
+        """returns the FEN string of the current position"""
+        startFields = self.startFen.split()
+        plies = len(self.moveHistory) + (startFields[1] == 'b')
+        return positionToFen(self.position, int(startFields[5]) + plies // 2)
+    def toPgn(self, tags:dict = None)->str:
+        """returns the game so far in PGN (see pgn.gameToPgn)"""
+        from .pgn import gameToPgn
+        return gameToPgn(self, tags)
+    def getOriginalBoard(self)->list: 
+        """returns the original board at the start of the game"""
+        return self.originalBoard
+    def snapshot(self)->'PositionSnapshot':
+        """returns an immutable snapshot of the current position (see
+        snapshot.py)"""
+        return self.position.snapshot()
+    def getBoard(self)->list:
+        '''returns the current board state''' 
+        return self.board
+    def takenPieces(self, color:int)->list:
+        '''returns the glyphs of the captured pieces of one color'''
+        taken = []
+        for piece in range(color * 6, color * 6 + 6):
+            taken.extend(GLYPHS[piece] * self.capturedCounts[piece])
+        return taken
+    def getWhiteTaken(self)->list: 
+        '''returns the list of pieces black has captured'''
+        return self.takenPieces(0)
+    def getBlackTaken(self)->list: 
+        '''returns the list of pieces white has captured'''
+        return self.takenPieces(1)
+    @property
+    def takenWhitePieces(self)->list:
+        '''the white pieces black has captured'''
+        return self.takenPieces(0)
+    @property
+    def takenBlackPieces(self)->list:
+        '''the black pieces white has captured'''
+        return self.takenPieces(1)
+    @property
+    def currentPlayer(self)->str:
+        '''the side to move, stored in the bitboard position'''
+        return COLOR_NAMES[self.position.sideToMove]
+    @currentPlayer.setter
+    def currentPlayer(self, color:str)->None:
+        if color != self.currentPlayer: self.position.switchSide()
+    def getPositionKey(self)->int:
+        '''returns the Zobrist key of the current position'''
+        return self.position.key
+    def isRepetition(self)->bool:
+        '''returns whether the current position has occurred before'''
+        return self.position.isRepetition()
+    def getTurn(self)->str:
+        '''returns whose turn it is'''
+        return self.currentPlayer
+    def switchTurns(self)->None:
+        """switches the current player to the other player"""
+        self.position.switchSide()
+    def pieceType(self, board: list, row: int, col: int) -> tuple:
+        '''
+        Given a board and the specified location, 
+        return a tuple consisting of which side 
+        the piece is on and which piece it is. 
+        Returns None if the location has no piece.
+        '''
+        if row >= len(board) or col >= len(board[0]): return (0, 0)
+        piece = board[row][col]
+        output = [None, None]
+        if piece in '♛♚♝♞♜♟': output[0] = 'black'
+        elif piece in '♙♖♘♗♕♔': output[0] = 'white'
+        if piece in '♜♖': output[1] = 'rook'
+        elif piece in '♞♘': output[1] = 'knight'
+        elif piece in '♗♝': output[1] = 'bishop'
+        elif piece in '♕♛': output[1] = 'queen'
+        elif piece in '♔♚': output[1] = 'king'
+        elif piece in '♙♟': output[1] = 'pawn'
+        return tuple(output)
+    def validLinePositions(self, board:list, row:int, col:int, 
+                        line:list, side: str) -> list:
+        """
+        given the position of a piece and a list of positions (in tuples) 
+        it can go to on a single line (e.g. a list of all positions that a 
+        rook can go to in one move if it can only move upwards), return a list 
+        of possible moves on that list that are not blocked by another piece. 
+        Checks by using a boolean to determine if a piece blocks the remainder 
+        of the line.
+        """
+        validLineMoves = []
+        blockingPiece = False
+
+        for position in line:
+            if blockingPiece == False:
+                if self.pieceType(board, position[0], position[1])[0] == None:
+                    validLineMoves.append((position[0], position[1]))
+                elif self.pieceType(board, position[0], position[1])[0] == side:
+                    blockingPiece = True
+                elif self.pieceType(board, position[0], position[1])[0] != side:
+                    #since a piece can capture an opposing piece, it can move 
+                    # onto the position occupied by an opposing piece 
+                    validLineMoves.append((position[0], position[1]))
+                    blockingPiece = True
+        return validLineMoves    
+    def getAllPawnMoves(self, board: list, row: int, 
+                        col: int, vertDirection: int) -> list:
+        """
+        Given a chess board, a pawn's position, and which way the pawn is 
+        headed, return all moves for a pawn (including captures without an 
+        opposing piece captured).
+        vertDirection is 1 for black pawns and -1 for white pawns.
+        """
+        allPawnMoves = []
+        if 0 <= row+vertDirection < len(board):
+            allPawnMoves.append((row+vertDirection, col))
+            if col+1 < len(board[0]):
+                allPawnMoves.append((row+vertDirection, col+1))
+            if col-1 >= 0:
+                allPawnMoves.append((row+vertDirection, col-1))
+        return allPawnMoves
+    def isValidPawnMove(self, board: list, row: int, 
+                        col: int, pawnMove: tuple, opposingSide: str) -> bool:
+        """
+        given a pawn move, the location of a pawn, a chess board, and the 
+        opposing side(which side the pawn is NOT on) return whether or not a 
+        pawn can move there.
+        """
+        if col == pawnMove[1] and \
+        self.pieceType(board, pawnMove[0], pawnMove[1])[0] == None:
+            return True
+        if (col + 1 == pawnMove[1] or col - 1 == pawnMove[1]) and \
+            self.pieceType(board, pawnMove[0], pawnMove[1])[0] == opposingSide:
+            return True
+        return False      
+    def getValidPawnMoves(self, board:list, startRow:int, startCol:int) -> list:
+        """
+        Given a chess board represented by a 2d list and a position, return all
+        possible moves for a pawn in that position
+        """
+        validMoves = []
+        pawnSide = self.pieceType(board, startRow, startCol)[0]
+
+        if pawnSide == 'white':   
+            for whiteMove in self.getAllPawnMoves(board,startRow,startCol, -1):
+                if self.isValidPawnMove(board,startRow,startCol,
+                                        whiteMove,'black'):
+                    validMoves.append(whiteMove)
+        elif pawnSide == 'black': 
+            for blackMove in self.getAllPawnMoves(board, startRow, startCol, 1):
+                if self.isValidPawnMove(board, startRow, startCol, 
+                                        blackMove, 'white'):
+                    validMoves.append(blackMove)
+        return validMoves
+    def getStraightLine(self,board:list,row:int,col:int,direction:str)->list:
+        """
+        return a list of positions for a horizontal/vertical line in the 
+        specified direction. Checks if a position is inside the board before
+        adding it to the output list.
+        """
+        positionList = []
+        #positions closest to the piece come first, as validLinePositions()
+        #stops at the first blocking piece
+        if direction == 'up':
+            for upDistance in range(1, row + 1):
+                positionList.append((row - upDistance, col))
+        elif direction == 'down': 
+            for downDistance in range(1, len(board) - row):
+                positionList.append((row + downDistance, col))
+        elif direction == 'left':
+            for leftDistance in range(1, col + 1):
+                positionList.append((row, col - leftDistance))
+        elif direction == 'right':
+            for rightDistance in range(1, len(board[0]) - col):
+                positionList.append((row, col + rightDistance))
+        return positionList                   
+    def getStraightLines(self, board: list, row: int, col: int) -> list:
+        """
+        given a board and a position, return a list of lists with all possible
+        vertical and horizontal moves.
+        The list is split into moves upwards, downwards, towards the left, and 
+        towards the right.
+        """
+        return [self.getStraightLine(board, row, col, 'up'), 
+                self.getStraightLine(board, row, col, 'down'), 
+                self.getStraightLine(board, row, col, 'left'), 
+                self.getStraightLine(board, row, col, 'right')]
+    def getValidRookMoves(self, board:list, startRow:int, startCol:int) -> list:
+        """
+        Given a chess board represented by a 2d list and a position, return all
+        possible moves for a rook in that position. Starts by finding all 
+        possible "lines" for the chess piece to move if the board was empty and 
+        then checks to see if pieces would obstruct each line. 
+        """
+        validMoves = []
+        rookSide = self.pieceType(board, startRow, startCol)[0]
+        rookMoves = self.getStraightLines(board, startRow, startCol)
+
+        for line in rookMoves:
+            validMoves.extend(self.validLinePositions(board, startRow, 
+                                                startCol, line, rookSide))
+        return validMoves
+    def getSingleDiagonalLine(self, rowDirection:int, colDirection:int, 
+                              board:list, row:int, col:int) -> list:
+        """
+        Given a direction, the chess board, and an initial starting position, 
+        return a list of positions along the specified direction until the 
+        edge of the board.
+        rowDirection and colDirection should be 1, 0, or -1.
+        rowDirection is vertical change, while colDirection is horizontal change
+        """
+        lineList = []
+        dRow = rowDirection
+        dCol = colDirection
+        while 0 <= row+dRow < len(board) and 0 <= col+dCol < len(board[0]):
+            lineList.append((row+dRow, col+dCol))
+            dRow += rowDirection 
+            dCol += colDirection
+        return lineList
+    def getDiagonalLine(self, board: list, row: int, col: int, 
+                        up: bool, right: bool) -> list:
+        """
+        return a list of positions for a diagonal in the specified direction
+        direction is determined by the two boolean inputs (up/down, left/right).
+        Checks if a position is inside the board before adding it to the 
+        output list while increasing the distance by one.
+        """
+        positionList = []
+        if up and right:
+            #distance from the position to be added to the given position
+            positionList.extend(self.getSingleDiagonalLine(1,1,board,row,col))
+        elif up and not right:
+            positionList.extend(self.getSingleDiagonalLine(1,-1, board,row,col))
+        elif not up and right:
+            positionList.extend(self.getSingleDiagonalLine(-1,1,board,row,col))
+        elif not up and not right:
+            positionList.extend(self.getSingleDiagonalLine(-1,-1,board,row,col))
+        return positionList                   
+    def getDiagonals(self, board: list, row: int, col: int) -> list:
+        """
+        given a board and a position, return a list of lists with the diagonals.
+        The list is split into up diagonals and 
+        down diagonals and further split
+        into positions higher than the position 
+        and positions lower than the position.
+        """
+        return [self.getDiagonalLine(board, row, col, True, True), 
+                self.getDiagonalLine(board, row, col, True, False), 
+                self.getDiagonalLine(board, row, col, False, True), 
+                self.getDiagonalLine(board, row, col, False, False)]
+    def getValidBishopMoves(self, board:list, startRow:int, startCol:int)->list:
+        """
+        Given a chess board represented by a 2d list and a position, return all
+        possible moves for a bishop in that position
+        """
+        validMoves = []
+        allBishopMoves = self.getDiagonals(board, startRow, startCol)
+        bishopSide = self.pieceType(board, startRow, startCol)[0]
+
+        for line in allBishopMoves:
+            validMoves.extend(self.validLinePositions(board, startRow, 
+                                                startCol, line, bishopSide))      
+        return validMoves
+    def getValidQueenMoves(self, board: list, 
+                           startRow: int, startCol: int) -> list:
+        """
+        Given a chess board represented by a 2d list and a position, return all
+        possible moves for a queen in that position
+        """
+        validMoves = []
+        allQueenMoves = self.getDiagonals(board, startRow, startCol)
+        allQueenMoves.extend(self.getStraightLines(board, startRow, startCol))
+        queenSide = self.pieceType(board, startRow, startCol)[0]
+
+        for line in allQueenMoves:
+            validMoves.extend(self.validLinePositions(board, startRow, 
+                                                startCol, line, queenSide))        
+        return validMoves   
+    def getKnightPositions(self, board: list, row: int, col: int) -> list:
+        """
+        gets all positions for moving a knight in a given board
+        """
+        #allJumps contains all possible "jumps" the knight can do (2 moves in 1
+        #cardinal direction, 1 in another)
+        allJumps = [(2,1),(1,2),(-1,2),(-2, 1),(-2,-1),(-1,-2),(1,-2),(2,-1)]
+        possiblePositions = []
+
+        for move in allJumps:
+            if 0 <= row+move[0] < len(board) and \
+                0 <= col+move[1] < len(board[0]):
+                possiblePositions.append((row+move[0], col+move[1]))
+        return possiblePositions
+    def getValidKnightMoves(self, board: list, startRow: int, 
+                            startCol: int) -> list:
+        """
+        Given a chess board represented by a 2d list and a position, return all
+        possible moves for a knight in that position
+        """
+        validMoves = []
+        allKnightMoves = self.getKnightPositions(board, startRow, startCol)
+        knightSide = self.pieceType(board, startRow, startCol)[0]
+
+        for move in allKnightMoves:
+            if self.pieceType(board, move[0], move[1])[0] != knightSide:
+                validMoves.append(move)
+        return validMoves
+    def getKingPositions(self, board: list, row: int, col: int) -> list:
+        """
+        gets all positions for moving a king located at (row, col)
+        in a given board
+        """
+        allMoves=[(0,1), (0,-1), (1,1), (1,0), (1,-1), (-1,1), (-1,0), (-1,-1)]
+        possiblePositions = []
+
+        for move in allMoves:
+            if 0 <= row+move[0] < len(board) and \
+               0 <= col+move[1] < len(board[0]):
+                possiblePositions.append((row+move[0], col+move[1]))
+        return possiblePositions
+    def getValidKingMoves(self, board: list, startRow: int, 
+                          startCol: int) -> list:
+        """
+        Given a chess board represented by a 2d list and a position, return all
+        possible moves for a king in that position
+        """
+        validMoves = []
+        allKingMoves = self.getKingPositions(board, startRow, startCol)
+        kingSide = self.pieceType(board, startRow, startCol)[0]
+
+        for move in allKingMoves:
+            if self.pieceType(board, move[0], move[1])[0] != kingSide:
+                validMoves.append(move)
+        return validMoves
+    def getValidChessMoves(self, startRow:int, startCol:int) -> list:
+        """
+        Given a position, return a list of tuples detailing all possible moves 
+        for the chess piece on the given position. Moves are looked up from
+        the bitboard position's precomputed attack tables rather than by
+        scanning self.board. Under standard rules only legal moves are
+        returned.
+        """
+        position = self.position
+        if not (0 <= startRow < position.rows and \
+                0 <= startCol < position.cols):
+            return []
+        targets = position.legalTargets(position.square(startRow, startCol))
+        return [divmod(toSq, position.cols) for toSq in squaresOf(targets)]
+    def isValidMove(self, fromRow:int, fromCol:int, toRow:int, 
+                    toCol:int)->bool:
+        """give a start and end position, returns whether or not it is legal 
+        for a piece on the start position to move to the end position"""
+        if fromRow > len(self.board)-1 or toRow > len(self.board)-1:
+            return False
+        if fromCol > len(self.board[0])-1 or toCol > len(self.board[0])-1:
+            return False
+        allValidChessMoves = self.getValidChessMoves(fromRow, fromCol)
+        return (toRow, toCol) in allValidChessMoves
+    def makeMove(self, fromRow:int, fromCol:int, toRow:int, toCol:int,
+                 promotion:str = 'queen')->bool:
+        """moves pieces given a start position and end position.
+        returns whether or not the move was made legally. Under standard
+        rules a pawn reaching the last row becomes the promotion piece."""
+        if self.isValidMove(fromRow, fromCol, toRow, toCol):
+            position = self.position
+            movingPiece = position.pieceAt(position.square(fromRow, fromCol))
+            if movingPiece // 6 != position.sideToMove: return False
+            self.makeAnyMove(fromRow, fromCol, toRow, toCol, promotion)
+            self.undoneMoveHistory.clear() #resets undoneMoveHistory
+            return True
+        return False
+    def checkMovesAvailable(self,color:str)->bool:
+        """checks if one given side can move pieces other than the king."""
+        return self.position.hasMoves(COLOR_NAMES.index(color), False)
+    def checkGameOver(self)->tuple:
+        """checks if game is over and returns if it is over and 
+        who won in a tuple. Under standard rules the side to move loses
+        when checkmated, and stalemate, the fifty-move rule, threefold
+        repetition and insufficient material are draws ('draw' wins)."""
+        position = self.position
+        if position.standardRules:
+            if not position.hasMoves(position.sideToMove):
+                if position.inCheck():
+                    return (True, COLOR_NAMES[position.sideToMove ^ 1])
+                return (True, "draw")
+            if position.isDraw():
+                return (True, "draw")
+            return (False, "none")
+        if position.kingSquare(WHITE) < 0 or not position.hasMoves(WHITE, False):
+            return (True, "black")
+        elif position.kingSquare(BLACK) < 0 or \
+             not position.hasMoves(BLACK, False):
+            return (True, "white")
+        return (False, "none")
+    def unmakeMove(self)->int:
+        """takes back the last move without saving it for redoMove and returns
+        it. Assumes at least one move has been made."""
+        self.moveHistory.pop()
+        #undos the move on the bitboard, which also switches turns, and
+        #copies the squares it changed back to the board
+        lastMove = self.position.unmakeMove()
+        self.syncBoard(lastMove)
+        self.capturedCounts[lastMove >> CAPTURED_SHIFT & PIECE_MASK] -= 1
+        return lastMove
+    def undoMove(self)->bool:
+        """undos a chess move and returns whether or not a move was
+        successfully undone"""
+        if len(self.moveHistory) > 0:
+            self.undoneMoveHistory.append(self.unmakeMove())
+            return True
+        return False
+    def seek(self, ply:int)->None:
+        """
+        Jumps to the position after the first ply moves of the game's line:
+        the moves made followed by those undone, which redoMove would make
+        again. The position is restored from the nearest history checkpoint
+        and fewer than checkpointInterval moves are replayed, or it is
+        stepped to directly if that is closer, so any ply of a long game is
+        reached in bounded time. The moves after ply can still be redone.
+        """
+        line = self.moveHistory + self.undoneMoveHistory[::-1]
+        if not 0 <= ply <= len(line):
+            raise ValueError(f"ply {ply} is outside the game's "
+                             f"{len(line)} plies")
+        current = len(self.moveHistory)
+        checkpointPly = self.history.checkpointPly(ply)
+        if checkpointPly is not None and \
+           ply - checkpointPly < abs(ply - current):
+            self.capturedCounts = list(self.history.restore(self.position,
+                                                            checkpointPly))
+            self.moveHistory = line[:checkpointPly]
+            self.syncAllSquares()
+            current = checkpointPly
+        while current > ply:
+            self.unmakeMove()
+            current -= 1
+        while current < ply:
+            self.playMove(line[current])
+            current += 1
+        self.undoneMoveHistory = line[ply:][::-1]
+    def redoMove(self)->bool:
+        """
+        redos an undone chess move. 
+        """ 
+        if len(self.undoneMoveHistory) > 0:
+            self.playMove(self.undoneMoveHistory.pop())
+            return True
+        return False
+    #random move implementation
+    def randomEngine(self,color:str,rng:random.Random = random)->None:
+        """randomly moves a piece of the given color. rng is the random number
+        generator to use, so seeded games can be replayed"""
+        pieceMoved = False
+        moveChance = 0.10 # chance that the engine will move a piece
+        while pieceMoved == False:
+            for row in range(len(self.board)):
+                for col in range(len(self.board[0])):
+                    if self.pieceType(self.board, row, col)[0] == color and \
+                       rng.random() < moveChance:
+                        possibleMoves = self.getValidChessMoves(row, col)
+                        if len(possibleMoves) > 0:
+                            randomMove = possibleMoves[
+                                        rng.randrange(len(possibleMoves))]
+                            self.makeMove(row, col, randomMove[0],randomMove[1])
+                            pieceMoved = True
+    #minimax implementation
+    def syncBoard(self, move:int)->None:
+        """copies the squares changed by a packed bitboard move to the
+        board"""
+        position = self.position
+        for square in position.changedSquares(move):
+            row, col = position.coordinates(square)
+            piece = position.pieceAt(square)
+            self.board[row][col] = ' ' if piece == EMPTY else GLYPHS[piece]
+    def syncAllSquares(self)->None:
+        """copies every square of the bitboard to the board"""
+        position = self.position
+        for sq, piece in enumerate(position.squares):
+            row, col = position.coordinates(sq)
+            self.board[row][col] = ' ' if piece == EMPTY else GLYPHS[piece]
+    def makeAnyMove(self,fromRow:int, fromCol:int, toRow:int, toCol:int,
+                    promotion:str = 'queen')->None:
+        """makes a move from the given square to the given destination square
+         without checking if it is legal."""
+        position = self.position
+        #the bitboard works out castling, en passant and promotion
+        self.playMove(position.createMove(position.square(fromRow, fromCol),
+                                          position.square(toRow, toCol),
+                                          PIECE_NAMES.index(promotion)))
+    def playMove(self, move:int)->None:
+        """makes a packed move on the bitboard (which also switches turns),
+        copies the squares it changed to the board and records it"""
+        self.history.record(len(self.moveHistory), move, self.position,
+                            self.capturedCounts)
+        self.position.makeMove(move)
+        self.syncBoard(move)
+        self.capturedCounts[move >> CAPTURED_SHIFT & PIECE_MASK] += 1
+        self.moveHistory.append(move)
+    def pieceWorth(self, piece:str)->int:
+        """Give a piece as a string, returns the value of the piece
+        Assumes traditional value of pieces. (queen is 
+        9 points, rooks are 5 points, knights/bishops are 3 points, pawns are 1
+        point). Since kings are a win condition, they have an extremely 
+        high value"""
+        pieceValue = 0
+        if piece in '♜♖':  pieceValue = 5
+        elif piece in '♞♘♗♝':  pieceValue = 3
+        elif piece in '♕♛':  pieceValue = 9
+        elif piece in '♔♚':  pieceValue = 9999 #king is a win condition
+        elif piece in '♙♟':  pieceValue = 1
+        return pieceValue
+    def materialEvaluation(self, color:str)->int:
+        """returns the material count of one given side (the value of the pieces
+        remaining on the board). """
+        totalPieceValue = 39#A single side starts with 39 points worth of pieces
+        if color == 'white':
+            #subtract captured piece values from the total piece value
+            for piece in self.getWhiteTaken():
+                totalPieceValue -= self.pieceWorth(piece)
+        elif color == 'black':
+            for piece in self.getBlackTaken():
+                totalPieceValue -= self.pieceWorth(piece)   
+        return totalPieceValue    
+    def getBoardCenter(self)->list:
+        """returns the center of the board, which is a list of either 1,2,or 4 
+        positions (see evaluation.boardCenter)"""
+        return boardCenter(len(self.board), len(self.board[0]))
+    def getBoardEdges(self)->list:
+        """returns list of squares adjacent to the center of the board"""
+        return boardEdges(len(self.board), len(self.board[0]))
+    def boardEvaluation(self)->float:
+        """evaluates a given board by analyzing the material difference
+        and control of the center. Assumes normal chess starting 
+        position and the traditional value of pieces. The score is kept up
+        to date by the bitboard position as moves are made, so this does
+        not scan the board."""
+        return self.position.evaluate() / SCORE_SCALE
+    def getAllTurnMoves(self, position:list)->list:
+        """returns a list of all possible moves in the form of a tuple 
+        consisting of two coordinates"""
+        allPossibleMoves = []
+        for row in range(len(position)): # gets all possible moves for the turn
+            for col in range(len(position[0])):
+                currentPiece = self.pieceType(position, row, col)
+                if self.getTurn() == currentPiece[0]:
+                    for pieceMove in self.getValidChessMoves(row,col):
+                        allPossibleMoves.append(((row, col), pieceMove))
+        return allPossibleMoves
+    def useBook(self, path:str)->None:
+        """makes the minimax engine play moves from the position book at
+        path (see book.py) where it has them, or stops using a book if path
+        is None. Raises book.BookError if the book was built for another
+        board shape or other rules."""
+        if path is None:
+            self.book = None
+            return
+        from .book import PositionBook, BookError
+        book = PositionBook(path)
+        if not book.matches(self.position):
+            book.close()
+            raise BookError(f"{path} was built for another board or rules")
+        self.book = book
+    def useTablebase(self, directory:str)->None:
+        """makes the minimax engine score positions that have an endgame
+        table in directory (see tablebase.py) from the table, or stops using
+        tables if directory is None. Only used under standard rules."""
+        if self.tablebase is not None:
+            self.tablebase.close()
+            self.tablebase = None
+        if directory is not None:
+            from .tablebase import Tablebase
+            self.tablebase = Tablebase(directory, self.position.rows,
+                                       self.position.cols)
+    def bookMove(self, minDepth:int)->SearchResult:
+        """returns the book's move for the current position as a search
+        result if the book has one searched at least minDepth plies deep,
+        or None"""
+        if self.book is None:
+            return None
+        position = self.position
+        entry = self.book.lookup(position.key)
+        if entry is None or entry[2] < minDepth or \
+           entry[0] not in position.generateMoves():
+            return None
+        move, score, depth = entry
+        coordinates = position.moveCoordinates(move)
+        return SearchResult(coordinates, score / SCORE_SCALE, depth, 0, 0.0,
+                            [coordinates])
+    def minimaxEngine(self, color:str, ply:int = None, moveTime:float = None,
+                      nodeLimit:int = None, workers:int = None,
+                      profile:bool = False, log = None,
+                      nullMove:bool = None, lateMoveReductions:bool = None,
+                      futility:bool = None)->SearchResult:
+        """A minimax chess engine that searches with alpha-beta pruning and
+        makes the highest-scoring move for the given color, returning the
+        search result. It deepens the search one ply at a time until it is
+        ply moves deep (3 by default) or, if given, moveTime seconds or
+        nodeLimit nodes have been used, in which case ply is unlimited unless
+        given. With workers, the root moves are searched in that many
+        processes (nodeLimit is ignored). If the position is in the book
+        (see useBook), searched ply deep or, with a budget, at any depth,
+        the book's move is played without searching. The result's stats
+        hold the search's node, time and cutoff statistics (summed over the
+        root moves with workers); profile, log, nullMove, lateMoveReductions
+        and futility are passed on to AlphaBetaSearch or ParallelSearch and
+        work as described there. The last three are on by default without
+        workers and off with them, so that the parallel search picks the
+        same move and score as the serial search with them off."""
+        self.currentPlayer = color
+        budgeted = moveTime is not None or nodeLimit is not None
+        if ply is None:
+            ply = MAX_DEPTH if budgeted else 3
+        result = self.bookMove(1 if budgeted else ply)
+        nullMove, lateMoveReductions, futility = [
+            workers is None if option is None else option
+            for option in (nullMove, lateMoveReductions, futility)]
+        if result is None and workers is not None:
+            #imported here so that importing the game does not load the
+            #multiprocessing machinery
+            from .parallel import ParallelSearch
+            search = ParallelSearch(self, workers, nullMove,
+                                    lateMoveReductions, futility,
+                                    self.tablebase, profile, log)
+            result = search.iterativeSearch(ply, moveTime)
+        elif result is None:
+            if self.transpositionTable is None:
+                self.transpositionTable = TranspositionTable()
+            search = AlphaBetaSearch(self, self.transpositionTable,
+                                     tablebase=self.tablebase,
+                                     profile=profile, log=log,
+                                     nullMove=nullMove,
+                                     lateMoveReductions=lateMoveReductions,
+                                     futility=futility)
+            result = search.iterativeSearch(ply, moveTime, nodeLimit)
+        self.playResult(result)
+        return result
+    def monteCarloEngine(self, color:str, playouts:int = None,
+                         moveTime:float = None, workers:int = 1,
+                         rng:random.Random = None)->SearchResult:
+        """A Monte Carlo tree search engine (see mcts.py) that makes the move
+        explored most after playouts random games (1000 by default) or, if
+        given, moveTime seconds of them, and returns the search result.
+        With workers, the playouts run in that many processes. The search
+        tree is kept for the next move, so the replies it already explored
+        are not searched again. rng seeds a new search's random numbers."""
+        self.currentPlayer = color
+        search = self.monteCarloSearch
+        if search is None or search.workers != workers:
+            #imported here so that importing the game does not load it
+            from .mcts import MonteCarloSearch
+            search = MonteCarloSearch(self, workers, rng)
+            self.monteCarloSearch = search
+        result = search.search(playouts, moveTime)
+        self.playResult(result)
+        return result
+    def playResult(self, result:SearchResult)->None:
+        """makes the best move of a search result, if it has one"""
+        bestMove = result.bestMove
+        if bestMove is not None:
+            self.makeMove(bestMove[0][0], bestMove[0][1],
+                          bestMove[1][0], bestMove[1][1],
+                          bestMove[2] if len(bestMove) > 2 else 'queen')
+
+#the starting position of the console game: a 7x8 board, with the
+#four empty rows normal chess has between the pawns replaced by three
+STARTING_BOARD = [
+        ['♜','♞','♝','♛','♚','♝','♞','♜'],
+        ['♟','♟','♟','♟','♟','♟','♟','♟'],
+        [' ']*8,
+        [' ']*8,
+        [' ']*8,
+        ['♙','♙','♙','♙','♙','♙','♙','♙'],
+        ['♖','♘','♗','♕','♔','♗','♘','♖']
+        ]
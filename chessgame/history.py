@@ -0,0 +1,73 @@
+"""
+Checkpointed game history, so that ChessGame.seek can jump to any ply of a
+long game without stepping through every move in between. GameHistory keeps
+the game's line of moves with the Zobrist key and packed rules state from
+before each one (the deltas a BitboardPosition's undo stack holds), and a
+compact checkpoint every `interval` plies: an immutable position snapshot
+(see snapshot.py) and the captured piece counts.
+
+A jump restores the nearest checkpoint at or before the target and replays
+fewer than `interval` moves from it. Smaller intervals make jumps faster
+and cost a checkpoint (a couple of hundred bytes on the 7x8 board) every
+`interval` plies.
+"""
+from array import array
+from .snapshot import PositionSnapshot
+
+#plies between checkpoints
+CHECKPOINT_INTERVAL = 16
+
+class GameHistory(object):
+    """
+    The line of moves of a game, including moves that were undone but can
+    still be redone, with a checkpoint every interval plies. Entry i of
+    moves, keys and states is the i-th move and the key and packed state
+    (see BitboardPosition.packState) of the position before it, and
+    checkpoints[k] is the (snapshot, captured counts) of the position after
+    k * interval plies.
+    """
+    def __init__(self, interval:int = CHECKPOINT_INTERVAL)->None:
+        if interval < 1:
+            raise ValueError("the checkpoint interval must be at least 1")
+        self.interval = interval
+        self.moves = array('I')
+        self.keys = array('Q')
+        self.states = array('q')
+        self.checkpoints = []
+    def __len__(self)->int:
+        return len(self.moves)
+    def record(self, ply:int, move:int, position,
+               capturedCounts:list)->None:
+        """records a move made at a ply from the position before it. A move
+        already in the line at that ply (as when redoing) is kept; another
+        move replaces the rest of the line."""
+        if ply < len(self.moves):
+            if self.moves[ply] == move:
+                return
+            self.truncate(ply)
+        if ply % self.interval == 0 and \
+           len(self.checkpoints) == ply // self.interval:
+            self.checkpoints.append((PositionSnapshot.fromPosition(position),
+                                     tuple(capturedCounts)))
+        self.moves.append(move)
+        self.keys.append(position.key)
+        self.states.append(position.packState())
+    def truncate(self, ply:int)->None:
+        """forgets the moves from ply on and the checkpoints after ply"""
+        del self.moves[ply:]
+        del self.keys[ply:]
+        del self.states[ply:]
+        del self.checkpoints[ply // self.interval + 1:]
+    def checkpointPly(self, ply:int)->int:
+        """returns the ply of the last checkpoint at or before ply, or None
+        if there is none"""
+        index = min(ply // self.interval, len(self.checkpoints) - 1)
+        return index * self.interval if index >= 0 else None
+    def restore(self, position, ply:int)->tuple:
+        """makes position that of the checkpoint at ply (see checkpointPly),
+        with the moves before it on its undo stack, and returns the captured
+        piece counts there"""
+        snapshot, capturedCounts = self.checkpoints[ply // self.interval]
+        position.restore(snapshot, self.moves[:ply], self.keys[:ply],
+                         self.states[:ply])
+        return capturedCounts
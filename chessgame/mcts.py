@@ -0,0 +1,292 @@
+"""
+Monte Carlo tree search. MonteCarloSearch grows a tree of moves from the
+current position: each playout walks down the tree by UCT (upper confidence
+bounds applied to trees), adds one new move to it and plays random moves
+from there until the game ends, then counts the result in every node on the
+way back up. The move played is the one explored most, so the engine can be
+stopped after any number of playouts and gets stronger with more of them.
+
+Playouts pick uniformly from the generated move list of each position.
+With workers, the leaves of a batch of walks are sent to a process pool as
+position snapshots (see snapshot.py) and played out there; the walks of a
+batch count as lost until their results come back (a virtual loss), so they
+spread over the tree instead of all following the same line. The tree is
+kept between moves, and the subtree of the position reached is reused.
+
+Example:
+    search = MonteCarloSearch(game, workers=4)
+    result = search.search(playouts=20000)
+"""
+import math
+import os
+import random
+import time
+from .bitboard import KING, PIECE_SHIFT, PIECE_MASK
+from .evaluation import SCORE_SCALE
+from .search import SearchResult, MATE_SCORE, DRAW_SCORE
+
+#UCT exploration constant: higher values try rarely played moves more often
+EXPLORATION = 1.4
+#playouts stop after this many plies and are scored by the evaluation
+MAX_PLAYOUT_PLIES = 60
+#evaluation (in tenths of a pawn) at which a stopped playout counts as
+#about 73% won: the result is 1 / (1 + e^(-evaluation / PLAYOUT_SCALE))
+PLAYOUT_SCALE = 4 * SCORE_SCALE
+#playouts run by a search given no budget
+DEFAULT_PLAYOUTS = 1000
+#leaves each worker process plays out per batch
+LEAVES_PER_TASK = 32
+#results of a finished game for the side to move
+LOSS, DRAW = 0.0, 0.5
+
+def gameOutcome(position, moves:list)->float:
+    """returns the result for the side to move of a position with the given
+    moves if the game is over there (LOSS or DRAW), or None. The rules are
+    those of ChessGame.checkGameOver."""
+    if position.standardRules:
+        if not moves:
+            return LOSS if position.inCheck() else DRAW
+        return DRAW if position.isDraw() else None
+    if not position.pieces[position.sideToMove * 6 + KING]:
+        return LOSS
+    for move in moves:
+        if (move >> PIECE_SHIFT & PIECE_MASK) % 6 != KING:
+            return None
+    return LOSS #only the king can move
+
+def playout(position, rng:random.Random,
+            maxPlies:int = MAX_PLAYOUT_PLIES)->float:
+    """plays uniformly random moves from a position until the game ends or
+    maxPlies moves have been made, takes them back and returns the result
+    for the side to move: 1 for a win, 0 for a loss and 0.5 for a draw, or
+    in between by the evaluation if the playout was stopped"""
+    side = position.sideToMove
+    startCount = position.undoCount
+    result = None
+    for _ in range(maxPlies):
+        moves = position.generateMoves()
+        outcome = gameOutcome(position, moves)
+        if outcome is not None:
+            #the outcome is for the side to move, which may be either side
+            result = outcome if position.sideToMove == side else 1 - outcome
+            break
+        position.makeMove(moves[rng.randrange(len(moves))])
+    if result is None:
+        score = position.evaluate()
+        if side:
+            score = -score
+        #the last move may have captured a king, which scores far beyond
+        #what math.exp can take
+        exponent = min(max(-score / PLAYOUT_SCALE, -50.0), 50.0)
+        result = 1 / (1 + math.exp(exponent))
+    while position.undoCount > startCount:
+        position.unmakeMove()
+    return result
+
+def runPlayouts(snapshots:list, seed:int, maxPlies:int)->list:
+    """plays out each (pickled) position snapshot once in a worker process
+    and returns the results for their sides to move"""
+    rng = random.Random(seed)
+    return [playout(snapshot.toPosition(), rng, maxPlies)
+            for snapshot in snapshots]
+
+class Node(object):
+    """
+    A position in the search tree, reached from its parent by move. wins is
+    the total result of the playouts through the node for the side that
+    made the move; untried holds the moves not yet added as children (None
+    until the node is first walked through) and outcome the result for the
+    side to move if the game is over at the node.
+    """
+    __slots__ = ('move', 'parent', 'children', 'untried', 'visits', 'wins',
+                 'outcome')
+    def __init__(self, move:int = None, parent:'Node' = None)->None:
+        self.move = move
+        self.parent = parent
+        self.children = {} #move -> Node
+        self.untried = None
+        self.visits = 0
+        self.wins = 0.0
+        self.outcome = None
+    def expand(self, position, rng:random.Random)->None:
+        """generates the moves of the node's position (the current one) in
+        random order, or sets its outcome if the game is over there"""
+        moves = position.generateMoves()
+        self.outcome = gameOutcome(position, moves)
+        if self.outcome is None:
+            rng.shuffle(moves)
+            self.untried = moves
+        else:
+            self.untried = []
+    def mostVisited(self)->'Node':
+        """returns the most visited child, or None if there is none"""
+        return max(self.children.values(), key=lambda child: child.visits,
+                   default=None)
+
+class MonteCarloSearch(object):
+    """
+    UCT search of a game's (or bitboard position's) current position. The
+    tree is kept between searches: if the position has since moved on
+    along moves the tree holds, the subtree reached becomes the new root.
+    workers > 1 plays out leaves in a pool of worker processes, in batches
+    of LEAVES_PER_TASK per worker.
+    """
+    def __init__(self, game, workers:int = 1, rng:random.Random = None,
+                 exploration:float = EXPLORATION,
+                 maxPlayoutPlies:int = MAX_PLAYOUT_PLIES)->None:
+        self.position = getattr(game, 'position', game)
+        self.workers = workers or os.cpu_count() or 1
+        self.rng = rng or random.Random()
+        self.exploration = exploration
+        self.maxPlayoutPlies = maxPlayoutPlies
+        self.root = None
+        #undo stack height and key of the root position, to find it again
+        self.rootCount = 0
+        self.rootKey = None
+        self.playouts = 0
+    def reuseTree(self)->None:
+        """makes the root the node of the current position if the tree holds
+        it, or a new node"""
+        position = self.position
+        node = None
+        if self.root is not None and self.rootCount <= position.undoCount:
+            if self.rootCount == position.undoCount:
+                rootKey = position.key
+            else:
+                rootKey = position.undoKeys[self.rootCount]
+            if rootKey == self.rootKey:
+                node = self.root
+                for index in range(self.rootCount, position.undoCount):
+                    node = node.children.get(position.undoMoves[index])
+                    if node is None:
+                        break
+        if node is None:
+            node = Node()
+        node.parent = None #lets the rest of the old tree be freed
+        self.root = node
+        self.rootCount = position.undoCount
+        self.rootKey = position.key
+    def select(self, node:Node)->Node:
+        """returns the child of a node with the highest upper confidence
+        bound"""
+        logVisits = math.log(node.visits)
+        exploration = self.exploration
+        best, bestBound = None, -1.0
+        for child in node.children.values():
+            bound = child.wins / child.visits + \
+                    exploration * math.sqrt(logVisits / child.visits)
+            if bound > bestBound:
+                best, bestBound = child, bound
+        return best
+    def descend(self)->Node:
+        """walks from the root by UCT, making the moves on the position, and
+        adds a child for one untried move at the end of the walk. Returns
+        the node reached with its moves still made. Every node on the way
+        counts the visit at once, as a loss until backUp adds the result."""
+        position = self.position
+        node = self.root
+        node.visits += 1
+        while True:
+            if node.untried is None:
+                node.expand(position, self.rng)
+            if node.outcome is not None:
+                return node
+            if node.untried:
+                move = node.untried.pop()
+                position.makeMove(move)
+                child = Node(move, node)
+                node.children[move] = child
+                child.visits += 1
+                return child
+            node = self.select(node)
+            position.makeMove(node.move)
+            node.visits += 1
+    def backUp(self, node:Node, result:float)->None:
+        """adds a playout's result for the side to move at node to the node
+        and its ancestors, each from the point of view of its mover"""
+        while node is not None:
+            result = 1 - result
+            node.wins += result
+            node = node.parent
+    def playBatch(self, count:int)->None:
+        """runs count playouts, in this process or across the workers"""
+        position = self.position
+        rootCount = self.rootCount
+        pending = []
+        for _ in range(count):
+            node = self.descend()
+            if node.outcome is not None:
+                self.backUp(node, node.outcome)
+            elif self.workers == 1:
+                self.backUp(node, playout(position, self.rng,
+                                          self.maxPlayoutPlies))
+            else:
+                pending.append((node, position.snapshot()))
+            while position.undoCount > rootCount:
+                position.unmakeMove()
+        if pending:
+            from .parallel import getExecutor
+            executor = getExecutor(self.workers)
+            futures = []
+            for start in range(0, len(pending), LEAVES_PER_TASK):
+                snapshots = [snapshot for node, snapshot in
+                             pending[start:start + LEAVES_PER_TASK]]
+                futures.append(executor.submit(runPlayouts, snapshots,
+                                               self.rng.getrandbits(64),
+                                               self.maxPlayoutPlies))
+            results = [result for future in futures
+                       for result in future.result()]
+            for (node, snapshot), result in zip(pending, results):
+                self.backUp(node, result)
+        self.playouts += count
+    def makeResult(self, startTime:float)->SearchResult:
+        """returns the most visited root move as a search result. Its score
+        converts the move's win rate back to pawns through PLAYOUT_SCALE, its
+        depth is the length of the principal variation (the most visited
+        line) and its node count the number of playouts."""
+        position = self.position
+        line = []
+        node = self.root.mostVisited()
+        best = node
+        while node is not None and node.visits:
+            line.append(position.moveCoordinates(node.move))
+            node = node.mostVisited()
+        if best is None: #the game is over at the root
+            score = -MATE_SCORE if self.root.outcome == LOSS else DRAW_SCORE
+            return SearchResult(None, score / SCORE_SCALE, 0, self.playouts,
+                                time.perf_counter() - startTime)
+        winRate = min(max(best.wins / best.visits, 0.001), 0.999)
+        score = PLAYOUT_SCALE * math.log(winRate / (1 - winRate))
+        return SearchResult(line[0], round(score / SCORE_SCALE, 2),
+                            len(line), self.playouts,
+                            time.perf_counter() - startTime, line)
+    def search(self, playouts:int = None,
+               moveTime:float = None)->SearchResult:
+        """
+        Runs playouts from the current position until playouts have been
+        played or moveTime seconds have passed (DEFAULT_PLAYOUTS without
+        either) and returns the most visited move. Playouts on a reused
+        subtree count towards the tree's knowledge but not the budget.
+        """
+        startTime = time.perf_counter()
+        if playouts is None and moveTime is None:
+            playouts = DEFAULT_PLAYOUTS
+        deadline = None if moveTime is None else startTime + moveTime
+        batchSize = 1 if self.workers == 1 else \
+                    self.workers * LEAVES_PER_TASK
+        self.reuseTree()
+        self.playouts = 0
+        root = self.root
+        if root.untried is None:
+            root.visits += 1
+            root.expand(self.position, self.rng)
+        while root.outcome is None:
+            if playouts is not None and self.playouts >= playouts:
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            count = batchSize
+            if playouts is not None:
+                count = min(count, playouts - self.playouts)
+            self.playBatch(count)
+        return self.makeResult(startTime)
@@ -0,0 +1,243 @@
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from .search import (AlphaBetaSearch, SearchResult, SearchStats,
+                     SearchTimeout, MATE_SCORE, MATE_BOUND, MAX_DEPTH)
+from .evaluation import SCORE_SCALE
+from .transposition import TranspositionTable
+
+#memory budget of the transposition table each worker process keeps
+WORKER_TABLE_BYTES = 16 * 1024 * 1024
+#per-process table, allocated once and cleared for every root move
+#per-process endgame tables by (directory, rows, cols), opened once
+_workerTablebases = {}
+_workerTable = None
+_executors = {} #shared process pools by worker count
+#SearchStats counters that are summed over the root moves' searches
+SUMMED_STATS = ('quiescenceNodes', 'tableProbes', 'tableHits', 'cutoffs',
+                'firstMoveCutoffs', 'nullMoveCutoffs', 'reductions',
+                'reSearches', 'futilityPrunes')
+
+def getExecutor(workers:int)->ProcessPoolExecutor:
+    """returns a process pool with the given number of workers, reusing the
+    pool from earlier searches so worker start-up is only paid once"""
+    if workers not in _executors:
+        _executors[workers] = ProcessPoolExecutor(max_workers=workers)
+    return _executors[workers]
+
+def workerTablebase(tablebase):
+    """returns the endgame tables to search with: tablebase itself, or for
+    a (directory, rows, cols) tuple sent to a worker process, the tables
+    in that directory, opened the first time this process sees it"""
+    if not isinstance(tablebase, tuple):
+        return tablebase
+    if tablebase not in _workerTablebases:
+        from .tablebase import Tablebase
+        _workerTablebases[tablebase] = Tablebase(*tablebase)
+    return _workerTablebases[tablebase]
+
+def searchRootMove(position, move:tuple, depth:int, deadline:float = None,
+                   selective:tuple = (True, True, True),
+                   tablebase = None, profile:bool = False)->tuple:
+    """
+    Plays one root move on a (pickled) position and searches the reply
+    depth - 1 plies deep with a full window, so the score is exact rather
+    than a bound. Returns (score from the root side's point of view, the
+    search's SearchStats), or (None, stats) if the deadline passed first.
+    The deadline is a time.time() value since, unlike perf_counter(), it
+    means the same in every process. selective holds the nullMove,
+    lateMoveReductions and futility options of the search, tablebase the
+    endgame tables it probes, if any (see workerTablebase), and profile
+    whether to time move generation and evaluation, as for
+    AlphaBetaSearch. Runs in a worker process, or in this one when
+    searching with a single worker, so the position is always left as it
+    was found. The process's transposition table is cleared first, so that
+    the score does not depend on what the process searched before.
+    """
+    global _workerTable
+    if _workerTable is None:
+        _workerTable = TranspositionTable(WORKER_TABLE_BYTES)
+    else:
+        _workerTable.clear()
+    nullMove, lateMoveReductions, futility = selective
+    search = AlphaBetaSearch(position, _workerTable,
+                             tablebase=workerTablebase(tablebase),
+                             nullMove=nullMove,
+                             lateMoveReductions=lateMoveReductions,
+                             futility=futility, profile=profile)
+    _workerTable.newSearch()
+    search.startStats()
+    startTime = time.perf_counter()
+    search.nodes = 1
+    if deadline is not None:
+        search.deadline = time.perf_counter() + (deadline - time.time())
+        search.nextBudgetCheck = 0
+    rootMoveCount = position.undoCount
+    position.makeMove(move)
+    try:
+        score = -search.negamax(depth - 1, -MATE_SCORE - 1, MATE_SCORE + 1, 1)
+    except SearchTimeout:
+        score = None
+    position.takeBackTo(rootMoveCount)
+    return score, search.makeStats(depth, time.perf_counter() - startTime)
+
+class ParallelSearch(object):
+    """
+    Root-parallel alpha-beta search. Every root move is searched in its own
+    task on a pool of worker processes with a full window, and the move
+    with the highest score is chosen, ties going to the move
+    AlphaBetaSearch.search tries first (captures by MVV-LVA, then the other
+    moves in generation order). workers = 1 searches in this process
+    without a pool. Every root move is searched from an empty transposition
+    table, so to a given depth the result does not depend on the number of
+    workers or on earlier searches.
+
+    nullMove, lateMoveReductions and futility are passed on to the
+    AlphaBetaSearch of every root move. They are off by default, which
+    keeps each root score exact, so the result is the same move and score
+    as AlphaBetaSearch.search at the same depth with them off. Their
+    cutoffs depend on the alpha-beta window and on the killer moves and
+    history scores of the moves searched before, neither of which a root
+    move searched on its own can share with the others, so with any of
+    them on the two searches may pick different moves.
+
+    Under standard rules, positions covered by tablebase (see tablebase.py)
+    are scored from it, as in AlphaBetaSearch.
+
+    The result's stats add up the SearchStats of the root moves' searches;
+    with profile=True their phaseTimes are summed over every process, so
+    they can add up to more than the time taken. log is written to as for
+    AlphaBetaSearch.
+    """
+    def __init__(self, game, workers:int = None, nullMove:bool = False,
+                 lateMoveReductions:bool = False, futility:bool = False,
+                 tablebase = None, profile:bool = False, log = None)->None:
+        self.game = game
+        self.position = getattr(game, 'position', game)
+        self.workers = workers or os.cpu_count() or 1
+        self.tablebase = tablebase
+        self.selective = (nullMove, lateMoveReductions, futility)
+        self.profile = profile
+        self.log = log
+        self.nodes = 0
+        self.iterationNodes = [] #nodes of each completed depth
+        self.totals = dict.fromkeys(SUMMED_STATS, 0)
+        self.phaseTimes = None
+    def addStats(self, stats:SearchStats)->None:
+        """adds the stats of a root move's search to the search's totals"""
+        self.nodes += stats.nodes
+        totals = self.totals
+        for name in SUMMED_STATS:
+            totals[name] += getattr(stats, name)
+        if stats.phaseTimes is not None:
+            if self.phaseTimes is None:
+                self.phaseTimes = dict.fromkeys(stats.phaseTimes, 0.0)
+            for phase, seconds in stats.phaseTimes.items():
+                self.phaseTimes[phase] += seconds
+    def makeStats(self, depth:int, elapsed:float)->SearchStats:
+        """returns the stats of the search so far"""
+        phaseTimes = None if self.phaseTimes is None else \
+                     dict(self.phaseTimes)
+        return SearchStats(depth=depth, nodes=self.nodes,
+                           iterationNodes=list(self.iterationNodes),
+                           elapsed=elapsed, phaseTimes=phaseTimes,
+                           **self.totals)
+    def scoreMoves(self, moves:list, depth:int, deadline:float)->list:
+        """returns the exact score of every root move, or None if the
+        deadline passed before all moves were searched"""
+        if self.workers == 1:
+            scores = []
+            for move in moves:
+                score, stats = searchRootMove(self.position, move, depth,
+                                              deadline, self.selective,
+                                              self.tablebase, self.profile)
+                self.addStats(stats)
+                if score is None:
+                    return None
+                scores.append(score)
+            return scores
+        executor = getExecutor(self.workers)
+        #workers open the tables themselves, once each, rather than
+        #unpickling them with every root move
+        tablebase = self.tablebase
+        if tablebase is not None:
+            tablebase = (tablebase.directory, tablebase.rows, tablebase.cols)
+        futures = [executor.submit(searchRootMove, self.position, move, depth,
+                                   deadline, self.selective, tablebase,
+                                   self.profile)
+                   for move in moves]
+        results = [future.result() for future in futures]
+        for score, stats in results:
+            self.addStats(stats)
+        if any(score is None for score, stats in results):
+            return None
+        return [score for score, stats in results]
+    def logStats(self, stats:SearchStats)->None:
+        """writes the stats to the log as a JSON line, if there is a log"""
+        if self.log is not None:
+            self.log.write(json.dumps(stats.toDict()) + '\n')
+            self.log.flush()
+    def makeResult(self, bestMove:tuple, score:int, depth:int,
+                   startTime:float)->SearchResult:
+        """converts square indices and search units for a SearchResult"""
+        position = self.position
+        if bestMove is not None:
+            bestMove = position.moveCoordinates(bestMove)
+        return SearchResult(bestMove, score / SCORE_SCALE, depth, self.nodes,
+                            time.perf_counter() - startTime,
+                            [bestMove] if bestMove else [])
+    def search(self, depth:int)->SearchResult:
+        """searches the current position depth plies deep (at least 1) and
+        returns the best move for the side to move"""
+        return self.iterativeSearch(depth, startDepth=depth)
+    def iterativeSearch(self, maxDepth:int = MAX_DEPTH, moveTime:float = None,
+                        startDepth:int = 1)->SearchResult:
+        """
+        Searches depth startDepth, startDepth + 1... until maxDepth is
+        reached or moveTime seconds have passed, and returns the result of
+        the deepest completed depth. Each depth searches the root moves
+        best-first according to the previous depth's scores; ties keep the
+        previous depth's order, and at the first depth the serial search's
+        root move order.
+        """
+        startTime = time.perf_counter()
+        self.nodes = 1
+        self.iterationNodes = []
+        self.totals = dict.fromkeys(SUMMED_STATS, 0)
+        self.phaseTimes = None
+        rootSearch = AlphaBetaSearch(self.position, TranspositionTable(0))
+        moves = self.position.generateMoves()
+        gameOverScore = -MATE_SCORE if rootSearch.kingCaptured() else \
+                        rootSearch.gameOverScore(moves, 0)
+        if gameOverScore is not None:
+            result = self.makeResult(None, gameOverScore, 0, startTime)
+            result.stats = self.makeStats(0, result.elapsed)
+            return result
+        #the order AlphaBetaSearch.search tries the root moves in, where
+        #the first of several moves with the best score is kept
+        moves = rootSearch.orderMoves(moves, 0)
+        result = self.makeResult(moves[0], 0, 0, startTime)
+        maxDepth = max(min(maxDepth, MAX_DEPTH), 1)
+        deadline = None if moveTime is None else time.time() + moveTime
+        for depth in range(max(startDepth, 1), maxDepth + 1):
+            iterationStart = self.nodes
+            scores = self.scoreMoves(moves, depth, deadline)
+            if scores is None:
+                break
+            self.iterationNodes.append(self.nodes - iterationStart)
+            #moves is still in the previous depth's order, so of several
+            #moves with the best score the earlier there is kept, as the
+            #serial search tries its previous best move first
+            ranked = sorted(zip(moves, scores), key=lambda item: -item[1])
+            moves = [move for move, score in ranked]
+            result = self.makeResult(ranked[0][0], ranked[0][1], depth,
+                                     startTime)
+            if self.log is not None:
+                self.logStats(self.makeStats(depth, result.elapsed))
+            if abs(ranked[0][1]) >= MATE_BOUND:
+                break
+        result.nodes = self.nodes
+        result.elapsed = time.perf_counter() - startTime
+        result.stats = self.makeStats(result.depth, result.elapsed)
+        return result
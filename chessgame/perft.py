@@ -0,0 +1,134 @@
+"""
+Perft: counts the leaf nodes of the move tree to a fixed depth, to check the
+move generator against known counts and to measure its speed.
+
+Command line examples (see --help):
+    python -m chessgame.perft --suite
+    python -m chessgame.perft --fen "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR" --depth 3 --divide
+"""
+import argparse
+import sys
+import time
+from .bitboard import BitboardPosition, SIMPLIFIED, STANDARD
+from .fen import positionFromFen, moveName
+from .game import STARTING_BOARD
+
+#name -> (FEN, rules, expected node counts for depth 1, 2, 3...). The 8x8
+#positions are the standard perft positions with their published counts;
+#the other boards have no published counts, so theirs were recorded from
+#this generator (the simplified ones after cross-checking against
+#ChessGame's list-based generators) and guard against regressions.
+SUITE = {
+    'start': ('rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1',
+              STANDARD, (20, 400, 8902, 197281)),
+    'kiwipete': ('r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R '
+                 'w KQkq - 0 1', STANDARD, (48, 2039, 97862)),
+    'position3': ('8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+                  STANDARD, (14, 191, 2812, 43238)),
+    'position4': ('r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 '
+                  'w kq - 0 1', STANDARD, (6, 264, 9467)),
+    'position5': ('rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8',
+                  STANDARD, (44, 1486, 62379)),
+    'game-standard': (None, STANDARD, (20, 392, 8590, 184450)),
+    'game-simplified': (None, SIMPLIFIED, (12, 144, 2122, 31326)),
+    'losalamos': ('rnqknr/pppppp/6/6/PPPPPP/RNQKNR w - - 0 1',
+                  STANDARD, (16, 244, 4070)),
+    'losalamos-simplified': ('rnqknr/pppppp/6/6/PPPPPP/RNQKNR w - - 0 1',
+                             SIMPLIFIED, (10, 100, 1216, 14914)),
+}
+
+def suitePosition(name:str)->BitboardPosition:
+    """returns a fresh position for a suite entry. Entries without a FEN
+    use the console game's 7x8 starting board."""
+    fen, rules, counts = SUITE[name]
+    if fen is None:
+        return BitboardPosition.fromBoard(STARTING_BOARD, rules)
+    return positionFromFen(fen, rules)
+
+def perft(position:BitboardPosition, depth:int)->int:
+    """returns the number of move sequences depth plies long from the
+    position. The last ply is counted without being played."""
+    moves = position.generateMoves()
+    if depth <= 1:
+        return len(moves) if depth == 1 else 1
+    nodes = 0
+    for move in moves:
+        position.makeMove(move)
+        nodes += perft(position, depth - 1)
+        position.unmakeMove()
+    return nodes
+
+def divide(position:BitboardPosition, depth:int)->dict:
+    """returns {move: perft count below it} for every root move, for
+    finding which move a wrong total comes from"""
+    counts = {}
+    for move in position.generateMoves():
+        position.makeMove(move)
+        counts[move] = perft(position, depth - 1)
+        position.unmakeMove()
+    return counts
+
+def runSuite(names:list = None, maxDepth:int = None,
+             output = sys.stdout)->bool:
+    """runs perft on suite positions up to their deepest known count (or
+    maxDepth), printing the nodes and nodes per second of every depth.
+    Returns whether every count matched."""
+    passed = True
+    for name in names or SUITE:
+        counts = SUITE[name][2]
+        if maxDepth is not None:
+            counts = counts[:maxDepth]
+        for depth, expected in enumerate(counts, 1):
+            position = suitePosition(name)
+            startTime = time.perf_counter()
+            nodes = perft(position, depth)
+            elapsed = time.perf_counter() - startTime
+            status = 'ok'
+            if nodes != expected:
+                status = f'FAIL (expected {expected})'
+                passed = False
+            print(f"{name:22} depth {depth}: {nodes:>9} nodes "
+                  f"{nodes / max(elapsed, 1e-9):>11.0f} nps  {status}",
+                  file=output)
+    return passed
+
+def main(arguments:list = None)->None:
+    """command line entry point"""
+    parser = argparse.ArgumentParser(
+        description="Count move tree leaves to check the move generator.")
+    parser.add_argument('--suite', action='store_true',
+                        help="run the built-in positions against their "
+                             "known counts")
+    parser.add_argument('--position', action='append', choices=sorted(SUITE),
+                        help="suite position to run (repeatable)")
+    parser.add_argument('--fen', help="position to count, as FEN")
+    parser.add_argument('--rules', choices=(SIMPLIFIED, STANDARD),
+                        default=STANDARD, help="rules for --fen")
+    parser.add_argument('--depth', type=int, default=None,
+                        help="depth for --fen, or maximum depth for the "
+                             "suite")
+    parser.add_argument('--divide', action='store_true',
+                        help="print the count below every root move")
+    options = parser.parse_args(arguments)
+    if options.fen is None:
+        if not (options.suite or options.position):
+            parser.error("give --suite, --position or --fen")
+        if not runSuite(options.position, options.depth):
+            sys.exit(1)
+        return
+    position = positionFromFen(options.fen, options.rules)
+    depth = options.depth or 1
+    startTime = time.perf_counter()
+    if options.divide:
+        counts = divide(position, depth)
+        for move, nodes in counts.items():
+            print(f"{moveName(position, move)}: {nodes}")
+        nodes = sum(counts.values())
+    else:
+        nodes = perft(position, depth)
+    elapsed = time.perf_counter() - startTime
+    print(f"depth {depth}: {nodes} nodes in {elapsed:.3f} s "
+          f"({nodes / max(elapsed, 1e-9):.0f} nps)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""
+Portable Game Notation. gameToPgn writes a ChessGame's moves in standard
+algebraic notation (SAN), and readPgn streams the games of a PGN file one
+at a time, so archives of any size are read in constant memory. Each game
+read can be replayed into a ChessGame through makeMove.
+
+Games that do not start from the 8x8 starting position are written with
+SetUp and FEN tags (using the extended FEN of fen.py for other board
+sizes), and games under the simplified rules with a Rules tag, which the
+reader also understands.
+
+Example:
+    for pgnGame in readPgn('games.pgn'):
+        game = pgnGame.replay()
+"""
+import re
+from .bitboard import (STANDARD, EMPTY, PAWN, CASTLING, PROMOTION, QUEEN,
+                       SQUARE_MASK, TO_SHIFT, PIECE_SHIFT, CAPTURED_SHIFT,
+                       KIND_SHIFT, PROMOTION_SHIFT, PIECE_MASK, KIND_MASK)
+from .fen import (squareName, squareFromName, positionFromFen, FenError,
+                  PIECE_LETTERS, LETTER_TO_PIECE)
+from .game import ChessGame
+
+STANDARD_START_FEN = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+#tags every PGN game starts with, in this order
+TAG_ROSTER = ('Event', 'Site', 'Date', 'Round', 'White', 'Black', 'Result')
+#ChessGame.checkGameOver winner -> PGN result
+RESULTS = {'white': '1-0', 'black': '0-1', 'draw': '1/2-1/2'}
+#longest movetext line written
+LINE_LENGTH = 79
+#piece letter, origin file and rank (for disambiguation), destination and
+#promotion piece of a SAN move, with check and annotation marks and the
+#capture mark removed
+SAN_PATTERN = re.compile(r'([KQRBN])?([a-z])?(\d+)?([a-z]\d+)'
+                         r'(?:=?([QRBNqrbn]))?$')
+TAG_PATTERN = re.compile(r'\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+#one movetext token: the start of a comment, a comment to the end of the
+#line, the start or end of a variation, a numeric annotation glyph, a game
+#result, a move number or a move
+TOKEN_PATTERN = re.compile(r'\s*(?:(?P<comment>\{)|(?P<lineComment>;)|'
+                           r'(?P<open>\()|(?P<close>\))|(?P<nag>\$\d+)|'
+                           r'(?P<result>1-0|0-1|1/2-1/2|\*)|'
+                           r'(?P<number>\d+\.+)|(?P<move>[^\s{};().]+)|$)')
+
+class PgnError(ValueError):
+    """raised when a move or a PGN game cannot be read"""
+
+def sanName(position, move:int, moves:list = None)->str:
+    """returns a packed move of the side to move in SAN, e.g. 'Nbd7',
+    'exd5', 'e8=Q+' or 'O-O'. moves are the position's moves, if already
+    generated."""
+    fromSq = move & SQUARE_MASK
+    toSq = move >> TO_SHIFT & SQUARE_MASK
+    piece = move >> PIECE_SHIFT & PIECE_MASK
+    captured = move >> CAPTURED_SHIFT & PIECE_MASK != EMPTY
+    kind = move >> KIND_SHIFT & KIND_MASK
+    if kind == CASTLING:
+        name = 'O-O' if toSq > fromSq else 'O-O-O'
+    elif piece % 6 == PAWN:
+        name = squareName(position, fromSq)[0] + 'x' if captured else ''
+        name += squareName(position, toSq)
+        if kind == PROMOTION:
+            promotion = move >> PROMOTION_SHIFT & KIND_MASK
+            name += '=' + PIECE_LETTERS[promotion].upper()
+    else:
+        if moves is None:
+            moves = position.generateMoves()
+        #other pieces of the same kind that can move to the same square
+        others = [other & SQUARE_MASK for other in moves if other != move and
+                  other >> TO_SHIFT & SQUARE_MASK == toSq and
+                  other >> PIECE_SHIFT & PIECE_MASK == piece]
+        origin = squareName(position, fromSq)
+        if not others:
+            disambiguation = ''
+        elif all(squareName(position, other)[0] != origin[0]
+                 for other in others):
+            disambiguation = origin[0]
+        elif all(squareName(position, other)[1:] != origin[1:]
+                 for other in others):
+            disambiguation = origin[1:]
+        else:
+            disambiguation = origin
+        name = PIECE_LETTERS[piece % 6].upper() + disambiguation + \
+               ('x' if captured else '') + squareName(position, toSq)
+    if position.standardRules:
+        position.makeMove(move)
+        if position.inCheck():
+            name += '+' if position.generateMoves() else '#'
+        position.unmakeMove()
+    return name
+
+def moveFromSan(position, san:str)->int:
+    """returns the packed move of the side to move written in SAN. Raises
+    PgnError if the move is illegal or ambiguous."""
+    token = san.rstrip('+#!?')
+    moves = position.generateMoves()
+    if token in ('O-O', 'O-O-O', '0-0', '0-0-0'):
+        long = len(token) == 5
+        for move in moves:
+            fromSq = move & SQUARE_MASK
+            toSq = move >> TO_SHIFT & SQUARE_MASK
+            if move >> KIND_SHIFT & KIND_MASK == CASTLING and \
+               (toSq < fromSq) == long:
+                return move
+        raise PgnError(f"illegal move {san!r}")
+    match = SAN_PATTERN.match(re.sub(r'x(?=[a-z]\d)', '', token))
+    if match is None:
+        raise PgnError(f"cannot read move {san!r}")
+    letter, fromFile, fromRank, destination, promotion = match.groups()
+    kind = LETTER_TO_PIECE[letter.lower()] if letter else PAWN
+    promotion = LETTER_TO_PIECE[promotion.lower()] if promotion else QUEEN
+    try:
+        toSq = squareFromName(position, destination)
+    except FenError as error:
+        raise PgnError(f"illegal move {san!r}: {error}") from None
+    candidates = []
+    for move in moves:
+        if move >> TO_SHIFT & SQUARE_MASK != toSq or \
+           (move >> PIECE_SHIFT & PIECE_MASK) % 6 != kind or \
+           move >> KIND_SHIFT & KIND_MASK == CASTLING:
+            continue
+        origin = squareName(position, move & SQUARE_MASK)
+        if (fromFile and origin[0] != fromFile) or \
+           (fromRank and origin[1:] != fromRank):
+            continue
+        if move >> KIND_SHIFT & KIND_MASK == PROMOTION and \
+           move >> PROMOTION_SHIFT & KIND_MASK != promotion:
+            continue
+        candidates.append(move)
+    if not candidates:
+        raise PgnError(f"illegal move {san!r}")
+    if len(candidates) > 1:
+        raise PgnError(f"ambiguous move {san!r}")
+    return candidates[0]
+
+def gameResult(game:ChessGame)->str:
+    """returns the PGN result of a game: '1-0', '0-1', '1/2-1/2' or '*'
+    while it is still going on"""
+    gameOver, winner = game.checkGameOver()
+    return RESULTS[winner] if gameOver else '*'
+
+def gameToPgn(game:ChessGame, tags:dict = None)->str:
+    """returns a game's moves so far as a PGN game. tags are added to (or
+    replace) the tag roster, which defaults to '?' and the game's result."""
+    allTags = {name: '?' for name in TAG_ROSTER}
+    allTags['Result'] = gameResult(game)
+    if game.startFen != STANDARD_START_FEN or game.rules != STANDARD:
+        allTags['SetUp'] = '1'
+        allTags['FEN'] = game.startFen
+    if game.rules != STANDARD:
+        allTags['Rules'] = game.rules
+    allTags.update(tags or {})
+    lines = []
+    for name, value in allTags.items():
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"')
+        lines.append(f'[{name} "{value}"]')
+    lines.append('')
+    position = positionFromFen(game.startFen, game.rules)
+    startFields = game.startFen.split()
+    moveNumber = int(startFields[5])
+    tokens = [] #white's moves carry their move number, so it is not
+                #wrapped onto a line of its own
+    for move in game.moveHistory:
+        san = sanName(position, move)
+        if position.sideToMove == 0:
+            san = f"{moveNumber}. {san}"
+        elif not tokens:
+            san = f"{moveNumber}... {san}"
+        tokens.append(san)
+        position.makeMove(move)
+        if position.sideToMove == 0:
+            moveNumber += 1
+    tokens.append(allTags['Result'])
+    line = ''
+    for token in tokens:
+        if line and len(line) + 1 + len(token) > LINE_LENGTH:
+            lines.append(line)
+            line = token
+        else:
+            line = f"{line} {token}" if line else token
+    lines.append(line)
+    return '\n'.join(lines) + '\n'
+
+class PgnGame(object):
+    """
+    A game read by readPgn: its tags, its moves in SAN (not checked until
+    the game is replayed) and its result.
+    """
+    def __init__(self, tags:dict, moves:list, result:str)->None:
+        self.tags = tags
+        self.moves = moves
+        self.result = result
+    def __repr__(self)->str:
+        return (f"PgnGame({self.tags.get('White', '?')} - "
+                f"{self.tags.get('Black', '?')}, {len(self.moves)} moves, "
+                f"{self.result})")
+    @property
+    def rules(self)->str:
+        """the rules the game was played under"""
+        return self.tags.get('Rules', STANDARD)
+    @property
+    def fen(self)->str:
+        """the FEN of the game's starting position"""
+        return self.tags.get('FEN', STANDARD_START_FEN)
+    def replay(self)->ChessGame:
+        """plays the game's moves through ChessGame.makeMove and returns the
+        game. Raises PgnError at the first move that cannot be played."""
+        try:
+            game = ChessGame.fromFen(self.fen, self.rules)
+        except FenError as error:
+            raise PgnError(f"bad FEN tag: {error}") from None
+        for san in self.moves:
+            move = moveFromSan(game.position, san)
+            (fromRow, fromCol), (toRow, toCol), *promotion = \
+                game.position.moveCoordinates(move)
+            if not game.makeMove(fromRow, fromCol, toRow, toCol,
+                                 *promotion):
+                raise PgnError(f"illegal move {san!r}")
+        return game
+
+def readPgn(source):
+    """
+    Yields the games of a PGN file as PgnGames, one at a time. source is a
+    path or an iterable of lines, such as an open file; it is read line by
+    line, and only the game being read is kept in memory. Comments,
+    variations and numeric annotation glyphs are skipped.
+    """
+    if isinstance(source, str):
+        with open(source, encoding='utf-8', errors='replace') as pgnFile:
+            yield from readPgn(pgnFile)
+        return
+    tags = {}
+    moves = []
+    inComment = False
+    variationDepth = 0
+    for line in source:
+        if not inComment:
+            stripped = line.strip()
+            if stripped.startswith('%'):
+                continue #escaped line
+            if stripped.startswith('[') and variationDepth == 0:
+                if moves:
+                    #a game without a result token ends at the next tags
+                    yield PgnGame(tags, moves, '*')
+                    tags, moves = {}, []
+                for name, value in TAG_PATTERN.findall(stripped):
+                    tags[name] = re.sub(r'\\(.)', r'\1', value)
+                continue
+        position = 0
+        while position < len(line):
+            if inComment:
+                end = line.find('}', position)
+                if end < 0:
+                    break
+                inComment = False
+                position = end + 1
+                continue
+            match = TOKEN_PATTERN.match(line, position)
+            if match is None or match.end() == position:
+                break
+            position = match.end()
+            token = match.lastgroup
+            if token == 'comment':
+                inComment = True
+            elif token == 'lineComment':
+                break
+            elif token == 'open':
+                variationDepth += 1
+            elif token == 'close':
+                variationDepth = max(variationDepth - 1, 0)
+            elif token == 'result' and variationDepth == 0:
+                yield PgnGame(tags, moves, match.group('result'))
+                tags, moves = {}, []
+            elif token == 'move' and variationDepth == 0:
+                moves.append(match.group('move'))
+    if tags or moves:
+        yield PgnGame(tags, moves, '*')
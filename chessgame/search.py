@@ -0,0 +1,765 @@
+import json
+import time
+from .bitboard import (KNIGHT, BISHOP, ROOK, QUEEN, KING, EMPTY, PROMOTION,
+                       NO_MOVE, TO_SHIFT,
+                       PIECE_SHIFT, CAPTURED_SHIFT, KIND_SHIFT,
+                       PROMOTION_SHIFT, PIECE_MASK, KIND_MASK)
+from .evaluation import SCORE_SCALE, PIECE_WORTH
+from .transposition import (TranspositionTable, EXACT, LOWER_BOUND,
+                            UPPER_BOUND)
+
+#scores are in tenths of a pawn (see evaluation.py). MATE_SCORE is the score
+#for capturing the opposing king, kept well above any material score so
+#that a faster win (fewer plies) always scores higher than a slower one
+MATE_SCORE = 1000000
+#scores this close to MATE_SCORE are wins or losses a known number of plies
+#away, which are stored in the transposition table relative to the node
+MATE_BOUND = MATE_SCORE - 1000
+#score of a position that repeats one earlier in the game or search line,
+#or of a drawn position under standard rules
+DRAW_SCORE = 0
+#deepest iteration iterativeSearch will start
+MAX_DEPTH = 64
+#how many nodes are searched between checks of the time and node budget
+BUDGET_CHECK_INTERVAL = 1024
+#deepest ply the quiescence search goes to, so that long capture sequences
+#cannot recurse without limit
+MAX_PLY = MAX_DEPTH + 32
+#delta pruning: the quiescence search skips a capture if even winning the
+#captured piece (plus any promotion) and this margin would not raise the
+#static evaluation to alpha
+DELTA_MARGIN = 2 * SCORE_SCALE
+#material won by a capture or promotion by piece type, in tenths of a pawn
+CAPTURE_GAINS = tuple(worth * SCORE_SCALE for worth in PIECE_WORTH)
+#move ordering: after the principal variation and transposition table moves
+#come captures and promotions, then the killer moves of the ply, then the
+#other moves by their history score. The order scores of each group are
+#kept above every score of the next group
+CAPTURE_ORDER = 1 << 50
+KILLER_ORDER = 1 << 40
+#MVV-LVA order of captures, MVV_LVA[victim type][attacker type]: the most
+#valuable victim (by ChessGame.pieceWorth) first and, among captures of the
+#same victim, the least valuable attacker. Piece types are numbered in order
+#of worth, so the attacker's type breaks ties.
+MVV_LVA = [[CAPTURE_ORDER + victimWorth * 8 - attacker
+            for attacker in range(6)] for victimWorth in PIECE_WORTH]
+#killer moves remembered per ply
+KILLER_SLOTS = 2
+#history scores are indexed by a move's moved piece and destination square,
+#which are the bits of a packed move from TO_SHIFT up
+HISTORY_MASK = 0xFFF
+#null-move pruning: a node at least NULL_MOVE_MIN_DEPTH plies from the
+#leaves whose static evaluation is at least beta lets the opponent move
+#twice in a row, searched NULL_MOVE_REDUCTION plies shallower (one more
+#from NULL_MOVE_DEEP_DEPTH), and fails high if the side to move still
+#reaches beta
+NULL_MOVE_MIN_DEPTH = 3
+NULL_MOVE_REDUCTION = 2
+NULL_MOVE_DEEP_DEPTH = 7
+#late move reductions: quiet moves after the first LMR_FULL_MOVES of a node
+#at least LMR_MIN_DEPTH plies from the leaves are searched a ply shallower
+#with a null window (two plies from the LMR_DEEP_MOVES-th move) and only
+#searched again to full depth if they beat alpha
+LMR_FULL_MOVES = 3
+LMR_DEEP_MOVES = 8
+LMR_MIN_DEPTH = 3
+#futility pruning: at FUTILITY_MARGINS[depth] plies from the leaves, quiet
+#moves are skipped if the static evaluation plus the margin (in tenths of a
+#pawn, as for ChessGame.boardEvaluation) does not reach alpha
+FUTILITY_MARGINS = (0, 2 * SCORE_SCALE, 5 * SCORE_SCALE)
+
+class SearchTimeout(Exception):
+    """raised inside the search when its time or node budget runs out"""
+
+class SearchStats(object):
+    """
+    Instrumentation of one search: the nodes visited (of which
+    quiescenceNodes in the quiescence search), the nodes of each iteration
+    of iterative deepening, the time taken, transposition table probes and
+    hits, beta cutoffs (of which firstMoveCutoffs by the first move
+    searched), and what the selective search did: null-move cutoffs, late
+    move reductions (of which reSearches had to be searched again) and
+    quiet moves skipped by futility pruning. phaseTimes splits the time
+    between move generation, evaluation and the rest of the search
+    ('movegen', 'eval' and 'search'), and is None unless the search was
+    created with profile=True, as timing every call slows the search down.
+    """
+    def __init__(self, depth:int, nodes:int, quiescenceNodes:int,
+                 iterationNodes:list, elapsed:float, tableProbes:int,
+                 tableHits:int, cutoffs:int, firstMoveCutoffs:int,
+                 phaseTimes:dict = None, nullMoveCutoffs:int = 0,
+                 reductions:int = 0, reSearches:int = 0,
+                 futilityPrunes:int = 0)->None:
+        self.depth = depth
+        self.nodes = nodes
+        self.quiescenceNodes = quiescenceNodes
+        self.iterationNodes = iterationNodes
+        self.elapsed = elapsed
+        self.tableProbes = tableProbes
+        self.tableHits = tableHits
+        self.cutoffs = cutoffs
+        self.firstMoveCutoffs = firstMoveCutoffs
+        self.phaseTimes = phaseTimes
+        self.nullMoveCutoffs = nullMoveCutoffs
+        self.reductions = reductions
+        self.reSearches = reSearches
+        self.futilityPrunes = futilityPrunes
+    def __repr__(self)->str:
+        return (f"SearchStats(depth={self.depth}, nodes={self.nodes}, "
+                f"nps={self.nodesPerSecond:.0f}, "
+                f"branchingFactor={self.branchingFactor:.2f})")
+    @property
+    def nodesPerSecond(self)->float:
+        """nodes visited per second"""
+        return self.nodes / self.elapsed if self.elapsed > 0 else 0.0
+    @property
+    def tableHitRate(self)->float:
+        """fraction of transposition table probes that found an entry"""
+        return self.tableHits / self.tableProbes if self.tableProbes else 0.0
+    @property
+    def cutoffRate(self)->float:
+        """fraction of beta cutoffs caused by the first move searched"""
+        return self.firstMoveCutoffs / self.cutoffs if self.cutoffs else 0.0
+    @property
+    def branchingFactor(self)->float:
+        """effective branching factor: how many times more nodes the last
+        iteration took than the one before it, or for a single iteration
+        the depth-th root of its nodes"""
+        counts = self.iterationNodes
+        if len(counts) >= 2 and counts[-2] > 0:
+            return counts[-1] / counts[-2]
+        if counts and self.depth > 0:
+            return counts[-1] ** (1 / self.depth)
+        return 0.0
+    def toDict(self)->dict:
+        """returns the stats as a JSON-serializable dict"""
+        record = {'depth': self.depth, 'nodes': self.nodes,
+                  'quiescenceNodes': self.quiescenceNodes,
+                  'iterationNodes': list(self.iterationNodes),
+                  'elapsed': round(self.elapsed, 6),
+                  'nps': round(self.nodesPerSecond),
+                  'tableHitRate': round(self.tableHitRate, 4),
+                  'cutoffRate': round(self.cutoffRate, 4),
+                  'branchingFactor': round(self.branchingFactor, 3),
+                  'nullMoveCutoffs': self.nullMoveCutoffs,
+                  'reductions': self.reductions,
+                  'reSearches': self.reSearches,
+                  'futilityPrunes': self.futilityPrunes}
+        if self.phaseTimes is not None:
+            record['phaseTimes'] = {phase: round(seconds, 6) for phase,
+                                    seconds in self.phaseTimes.items()}
+        return record
+
+class SearchResult(object):
+    """the outcome of a search: the best move found as a pair of (row, col)
+    coordinates (plus the promotion piece name for promotions), its score
+    in pawns from the searching side's point of view, the depth searched,
+    the number of nodes visited, the time taken in seconds, the principal
+    variation (the expected line of play, as pairs of coordinates) and the
+    search's SearchStats, if any"""
+    def __init__(self, bestMove:tuple, score:float, depth:int,
+                 nodes:int, elapsed:float = 0.0,
+                 principalVariation:list = None,
+                 stats:SearchStats = None)->None:
+        self.bestMove = bestMove
+        self.score = score
+        self.depth = depth
+        self.nodes = nodes
+        self.elapsed = elapsed
+        self.principalVariation = principalVariation or []
+        self.stats = stats
+    def __repr__(self)->str:
+        return (f"SearchResult(bestMove={self.bestMove}, score={self.score}, "
+                f"depth={self.depth}, nodes={self.nodes})")
+
+class AlphaBetaSearch(object):
+    """
+    Depth-first negamax search with alpha-beta pruning. The search plays
+    moves on the game's bitboard position and takes them back with
+    unmakeMove, so only the current line is ever held in memory, and reads
+    the position's incrementally updated evaluation at the leaves. The
+    game's glyph board is left untouched while searching.
+    Results are stored in a transposition table keyed by the position's
+    Zobrist key, so positions reached through different move orders are only
+    searched once. Pass a table to share it between searches.
+    The leaves are searched further with a quiescence search over captures
+    and promotions, so that they are not scored in the middle of an
+    exchange. Unless staticExchange is False, captures that lose material by
+    static exchange evaluation are left out of the quiescence search.
+    Under standard rules, positions covered by the given endgame tablebase
+    (see tablebase.py) are scored from it instead of being searched.
+    The search is selective: nullMove, lateMoveReductions and futility
+    switch null-move pruning, late move reductions and futility pruning
+    (see the constants above) on or off, trading a little accuracy for
+    searching deeper in the same time.
+
+    search() searches to a fixed depth. iterativeSearch() searches depth
+    1, 2, 3... until a time or node budget runs out and returns the result
+    of the last completed depth, trying each iteration's principal
+    variation first in the next one.
+
+    Both return a SearchStats in the result's stats. With profile=True the
+    time spent generating moves and evaluating is measured as well, and
+    with log, a file object, a JSON line of the stats is written after
+    every completed depth.
+    """
+    def __init__(self, game, transpositionTable:TranspositionTable = None,
+                 quiescence:bool = True, staticExchange:bool = True,
+                 tablebase = None, profile:bool = False, log = None,
+                 nullMove:bool = True, lateMoveReductions:bool = True,
+                 futility:bool = True)->None:
+        self.game = game
+        #a ChessGame is searched through its bitboard position, but a bare
+        #BitboardPosition can be searched too
+        self.position = getattr(game, 'position', game)
+        if transpositionTable is None:
+            transpositionTable = TranspositionTable()
+        self.transpositionTable = transpositionTable
+        self.useQuiescence = quiescence
+        self.useStaticExchange = staticExchange
+        self.useNullMove = nullMove
+        self.useLateMoveReductions = lateMoveReductions
+        self.useFutility = futility
+        self.tablebase = tablebase
+        self.log = log
+        self.nodes = 0
+        self.quiescenceNodes = 0
+        self.iterationNodes = [] #nodes of each completed iteration
+        #move generation and evaluation are called through these, which are
+        #replaced by timed wrappers when profiling
+        self.generateMoves = self.position.generateMoves
+        self.generateCaptures = self.position.generateCaptures
+        self.generateQuietMoves = self.position.generateQuietMoves
+        self.phaseTimes = None
+        if profile:
+            self.phaseTimes = {'movegen': 0.0, 'eval': 0.0, 'search': 0.0}
+            self.generateMoves = self.timed('movegen',
+                                            self.position.generateMoves)
+            self.generateCaptures = self.timed('movegen',
+                                               self.position.generateCaptures)
+            self.generateQuietMoves = self.timed(
+                'movegen', self.position.generateQuietMoves)
+            self.evaluate = self.timed('eval', self.evaluate)
+        self.deadline = None #perf_counter() time at which to stop
+        self.nodeLimit = None
+        self.nextBudgetCheck = BUDGET_CHECK_INTERVAL
+        #pvTable[ply] is the best line found from the node at that ply
+        self.pvTable = [()] * (MAX_DEPTH + 2)
+        self.previousPV = () #principal variation of the last iteration
+        #killers[ply] are the last quiet moves that caused a beta cutoff at
+        #that ply, and history[piece and destination] sums depth * depth
+        #over the quiet moves that caused a cutoff. Both are kept for every
+        #iteration of a search and cleared by resetOrdering
+        self.killers = []
+        self.history = []
+        #beta cutoffs, and how many of them the first move searched caused
+        self.cutoffs = 0
+        self.firstMoveCutoffs = 0
+        #what the selective search pruned or reduced
+        self.nullMoveCutoffs = 0
+        self.reductions = 0
+        self.reSearches = 0
+        self.futilityPrunes = 0
+        self.resetOrdering()
+    def evaluate(self)->int:
+        """returns the static evaluation from the side to move's point of
+        view (the position scores from white's point of view)"""
+        position = self.position
+        score = position.material + position.positional
+        return score if position.sideToMove == 0 else -score
+    def timed(self, phase:str, function):
+        """returns function wrapped to add its running time to the phase's
+        entry in phaseTimes"""
+        phaseTimes = self.phaseTimes
+        clock = time.perf_counter
+        def timedFunction(*arguments):
+            start = clock()
+            value = function(*arguments)
+            phaseTimes[phase] += clock() - start
+            return value
+        return timedFunction
+    def startStats(self)->None:
+        """resets the counters that SearchStats reports at the start of a
+        search"""
+        table = self.transpositionTable
+        self.statsBaseline = (table.probes, table.hits)
+        self.quiescenceNodes = 0
+        self.iterationNodes = []
+        if self.phaseTimes is not None:
+            for phase in self.phaseTimes:
+                self.phaseTimes[phase] = 0.0
+    def makeStats(self, depth:int, elapsed:float)->SearchStats:
+        """returns the stats of the search so far"""
+        table = self.transpositionTable
+        probes, hits = self.statsBaseline
+        phaseTimes = None
+        if self.phaseTimes is not None:
+            phaseTimes = dict(self.phaseTimes)
+            phaseTimes['search'] = max(elapsed - phaseTimes['movegen'] -
+                                       phaseTimes['eval'], 0.0)
+        return SearchStats(depth, self.nodes, self.quiescenceNodes,
+                           list(self.iterationNodes), elapsed,
+                           table.probes - probes, table.hits - hits,
+                           self.cutoffs, self.firstMoveCutoffs, phaseTimes,
+                           self.nullMoveCutoffs, self.reductions,
+                           self.reSearches, self.futilityPrunes)
+    def logStats(self, stats:SearchStats)->None:
+        """writes the stats to the log as a JSON line, if there is a log"""
+        if self.log is not None:
+            self.log.write(json.dumps(stats.toDict()) + '\n')
+            self.log.flush()
+    def kingCaptured(self)->bool:
+        """returns whether the side to move has lost its king"""
+        position = self.position
+        return not position.pieces[position.sideToMove * 6 + KING]
+    def isDrawn(self)->bool:
+        """returns whether the position repeats one earlier in the game or
+        search line, or under standard rules is drawn by the fifty-move rule
+        or insufficient material"""
+        position = self.position
+        if position.isRepetition():
+            return True
+        return position.standardRules and (position.halfmoveClock >= 100 or
+                                           position.insufficientMaterial())
+    def gameOverScore(self, moves:list, ply:int)->int:
+        """returns the score of a position ply moves from the root whose side
+        to move has the given moves if the game is over there, or None.
+        Under standard rules a side without moves is checkmated or
+        stalemated; under simplified rules a side that can only move its
+        king has lost."""
+        position = self.position
+        if position.standardRules:
+            if moves:
+                return None
+            return -MATE_SCORE + ply if position.inCheck() else DRAW_SCORE
+        if self.onlyKingMoves(moves):
+            return -MATE_SCORE + ply
+        return None
+    def onlyKingMoves(self, moves:list)->bool:
+        """returns whether none of the moves is made by a piece other than
+        the king. As in ChessGame.checkGameOver, that side has lost."""
+        for move in moves:
+            if (move >> PIECE_SHIFT & PIECE_MASK) % 6 != KING:
+                return False
+        return True
+    def hasPieces(self, color:int)->bool:
+        """returns whether a side has a knight, bishop, rook or queen. Null
+        moves are only tried for such a side, since with only pawns and a
+        king having to move can be what loses (zugzwang)."""
+        pieces = self.position.pieces
+        base = color * 6
+        return bool(pieces[base + KNIGHT] or pieces[base + BISHOP] or
+                    pieces[base + ROOK] or pieces[base + QUEEN])
+    def scoreToTable(self, score:int, ply:int)->int:
+        """converts a win/loss score from distance-to-root to
+        distance-to-node before storing it in the transposition table"""
+        if score >= MATE_BOUND: return score + ply
+        if score <= -MATE_BOUND: return score - ply
+        return score
+    def scoreFromTable(self, score:int, ply:int)->int:
+        """undoes scoreToTable for a node ply moves from the root"""
+        if score >= MATE_BOUND: return score - ply
+        if score <= -MATE_BOUND: return score + ply
+        return score
+    def resetOrdering(self)->None:
+        """clears the killer moves, history scores and cutoff and pruning
+        counters"""
+        self.killers = [[NO_MOVE] * KILLER_SLOTS
+                        for ply in range(MAX_DEPTH + 2)]
+        self.history = [0] * (HISTORY_MASK + 1)
+        self.cutoffs = 0
+        self.firstMoveCutoffs = 0
+        self.nullMoveCutoffs = 0
+        self.reductions = 0
+        self.reSearches = 0
+        self.futilityPrunes = 0
+    def orderMoves(self, moves:list, ply:int, *firstMoves)->list:
+        """sorts the moves best first for the node ply moves from the root:
+        captures and promotions by MVV-LVA, then the ply's killer moves,
+        then the other moves by history score. The given moves (principal
+        variation and transposition table moves, if any) are moved to the
+        front, in the given order."""
+        captureOrder = self.captureOrder
+        quietOrder = self.quietOrder(ply)
+        def orderScore(move:int)->int:
+            if move >> CAPTURED_SHIFT & PIECE_MASK != EMPTY or \
+               move >> KIND_SHIFT & KIND_MASK == PROMOTION:
+                return captureOrder(move)
+            return quietOrder(move)
+        moves.sort(key=orderScore, reverse=True)
+        for firstMove in reversed(firstMoves):
+            if firstMove and firstMove in moves: #skips None and NO_MOVE
+                moves.remove(firstMove)
+                moves.insert(0, firstMove)
+        return moves
+    def quietOrder(self, ply:int):
+        """returns the order score function of quiet moves at a ply: the
+        ply's killer moves first, then by history score"""
+        killers = self.killers[ply]
+        history = self.history
+        def orderScore(move:int)->int:
+            if move in killers:
+                return KILLER_ORDER - killers.index(move)
+            return history[move >> TO_SHIFT & HISTORY_MASK]
+        return orderScore
+    def pickMoves(self, ply:int, moves:list, *firstMoves):
+        """
+        Yields the moves of the node ply moves from the root in the order of
+        orderMoves, one stage at a time: the given moves (principal
+        variation and transposition table moves) that are legal, then
+        captures and promotions, then quiet moves. Each stage is only
+        generated and sorted once the search has gone through the one
+        before, so a beta cutoff skips the later stages. moves are the
+        node's legal moves if they were already generated (under standard
+        rules, where legality needs the whole list), or None.
+        """
+        position = self.position
+        tried = []
+        for move in firstMoves:
+            if move and move not in tried and \
+               (move in moves if moves is not None
+                else position.isPseudoLegal(move)):
+                tried.append(move)
+                yield move
+        if moves is not None:
+            captures = [move for move in moves
+                        if move >> CAPTURED_SHIFT & PIECE_MASK != EMPTY or
+                        move >> KIND_SHIFT & KIND_MASK == PROMOTION]
+        else:
+            captures = self.generateCaptures()
+        captures.sort(key=self.captureOrder, reverse=True)
+        for move in captures:
+            if move not in tried:
+                yield move
+        if moves is not None:
+            quietMoves = [move for move in moves
+                          if move >> CAPTURED_SHIFT & PIECE_MASK == EMPTY and
+                          move >> KIND_SHIFT & KIND_MASK != PROMOTION]
+        else:
+            quietMoves = self.generateQuietMoves()
+        quietMoves.sort(key=self.quietOrder(ply), reverse=True)
+        for move in quietMoves:
+            if move not in tried:
+                yield move
+    def captureOrder(self, move:int)->int:
+        """returns the MVV-LVA order score of a capture or promotion"""
+        captured = move >> CAPTURED_SHIFT & PIECE_MASK
+        if move >> KIND_SHIFT & KIND_MASK == PROMOTION:
+            #scored as capturing the promotion piece with a pawn
+            score = MVV_LVA[move >> PROMOTION_SHIFT & KIND_MASK][0]
+            if captured != EMPTY:
+                score += PIECE_WORTH[captured % 6] * 8
+            return score
+        return MVV_LVA[captured % 6][(move >> PIECE_SHIFT & PIECE_MASK) % 6]
+    def captureGain(self, move:int)->int:
+        """returns the material a capture or promotion wins at once"""
+        captured = move >> CAPTURED_SHIFT & PIECE_MASK
+        gain = 0 if captured == EMPTY else CAPTURE_GAINS[captured % 6]
+        if move >> KIND_SHIFT & KIND_MASK == PROMOTION:
+            gain += CAPTURE_GAINS[move >> PROMOTION_SHIFT & KIND_MASK] - \
+                    CAPTURE_GAINS[0]
+        return gain
+    def recordCutoff(self, move:int, depth:int, ply:int,
+                     moveNumber:int)->None:
+        """counts a beta cutoff caused by the moveNumber-th move searched
+        (from 0) and, for a quiet move, makes it the ply's first killer move
+        and raises its history score"""
+        self.cutoffs += 1
+        if moveNumber == 0:
+            self.firstMoveCutoffs += 1
+        if move >> CAPTURED_SHIFT & PIECE_MASK != EMPTY or \
+           move >> KIND_SHIFT & KIND_MASK == PROMOTION:
+            return #captures and promotions are already ordered first
+        killers = self.killers[ply]
+        if killers[0] != move:
+            killers.insert(0, move)
+            killers.pop()
+        self.history[move >> TO_SHIFT & HISTORY_MASK] += depth * depth
+    def checkBudget(self)->None:
+        """raises SearchTimeout if the time or node budget is used up"""
+        if self.nodeLimit is not None and self.nodes >= self.nodeLimit:
+            raise SearchTimeout()
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            raise SearchTimeout()
+        self.nextBudgetCheck = self.nodes + BUDGET_CHECK_INTERVAL
+        if self.nodeLimit is not None:
+            self.nextBudgetCheck = min(self.nextBudgetCheck, self.nodeLimit)
+    def negamax(self, depth:int, alpha:int, beta:int, ply:int,
+                onPV:bool = False, allowNull:bool = True)->int:
+        """returns the score of the current position searched depth plies
+        deep, from the side to move's point of view. Scores outside of
+        (alpha, beta) are only bounds. onPV is True while following the
+        previous iteration's principal variation, and allowNull is False
+        right after a null move, so that a side never passes twice."""
+        self.nodes += 1
+        if self.nodes >= self.nextBudgetCheck:
+            self.checkBudget()
+        self.pvTable[ply] = ()
+        position = self.position
+        if self.kingCaptured():
+            return -MATE_SCORE + ply
+        if self.isDrawn():
+            return DRAW_SCORE
+        if self.tablebase is not None and position.standardRules:
+            entry = self.tablebase.probe(position)
+            if entry is not None:
+                outcome, plies = entry
+                #a win or loss plies moves further away than this node
+                return outcome * (MATE_SCORE - ply - plies)
+        if depth <= 0:
+            if self.useQuiescence:
+                return self.quiescence(alpha, beta, ply)
+            return self.evaluate()
+        table = self.transpositionTable
+        key = position.key
+        entry = table.probe(key)
+        tableMove = None
+        if entry is not None:
+            entryDepth, bound, entryScore, tableMove = entry
+            if entryDepth >= depth:
+                entryScore = self.scoreFromTable(entryScore, ply)
+                if bound == EXACT:
+                    return entryScore
+                if bound == LOWER_BOUND and entryScore >= beta:
+                    return entryScore
+                if bound == UPPER_BOUND and entryScore <= alpha:
+                    return entryScore
+        inCheck = position.standardRules and position.inCheck()
+        staticScore = None
+        if self.useNullMove and allowNull and not onPV and not inCheck and \
+           depth >= NULL_MOVE_MIN_DEPTH and abs(beta) < MATE_BOUND and \
+           self.hasPieces(position.sideToMove):
+            staticScore = self.evaluate()
+            if staticScore >= beta:
+                reduction = NULL_MOVE_REDUCTION + \
+                            (depth >= NULL_MOVE_DEEP_DEPTH)
+                position.makeNullMove()
+                score = -self.negamax(depth - 1 - reduction, -beta,
+                                      -beta + 1, ply + 1, False, False)
+                position.unmakeNullMove()
+                if score >= beta:
+                    self.nullMoveCutoffs += 1
+                    #a win found after passing is not a real one
+                    return beta if score >= MATE_BOUND else score
+        futile = False
+        if self.useFutility and depth < len(FUTILITY_MARGINS) and \
+           not onPV and not inCheck and abs(alpha) < MATE_BOUND:
+            if staticScore is None:
+                staticScore = self.evaluate()
+            futile = staticScore + FUTILITY_MARGINS[depth] <= alpha
+        reduceLateMoves = self.useLateMoveReductions and \
+                          depth >= LMR_MIN_DEPTH and not inCheck
+        if position.standardRules:
+            moves = self.generateMoves()
+            if not moves:
+                return -MATE_SCORE + ply if inCheck else DRAW_SCORE
+        else:
+            #moves are generated stage by stage by pickMoves, so the side to
+            #move's loss for having only king moves is checked without them
+            moves = None
+            if not position.hasMoves(position.sideToMove, False):
+                return -MATE_SCORE + ply
+        pvMove = None
+        if onPV and ply < len(self.previousPV):
+            pvMove = self.previousPV[ply]
+        originalAlpha = alpha
+        bestScore = -MATE_SCORE
+        bestMove = None
+        for moveNumber, move in enumerate(self.pickMoves(ply, moves, pvMove,
+                                                         tableMove)):
+            #the first move and captures, promotions and checks are always
+            #searched in full
+            selective = moveNumber > 0 and \
+                        (futile or (reduceLateMoves and
+                                    moveNumber >= LMR_FULL_MOVES)) and \
+                        move >> CAPTURED_SHIFT & PIECE_MASK == EMPTY and \
+                        move >> KIND_SHIFT & KIND_MASK != PROMOTION
+            position.makeMove(move)
+            if selective and position.standardRules and position.inCheck():
+                selective = False
+            if selective and futile:
+                position.unmakeMove()
+                self.futilityPrunes += 1
+                continue
+            if selective:
+                self.reductions += 1
+                reduction = 1 if moveNumber < LMR_DEEP_MOVES else 2
+                score = -self.negamax(depth - 1 - reduction, -alpha - 1,
+                                      -alpha, ply + 1)
+                if score > alpha:
+                    self.reSearches += 1
+                    score = -self.negamax(depth - 1, -beta, -alpha, ply + 1)
+            else:
+                score = -self.negamax(depth - 1, -beta, -alpha, ply + 1,
+                                      onPV and move == pvMove)
+            position.unmakeMove()
+            if score > bestScore:
+                bestScore = score
+                bestMove = move
+                if score > alpha:
+                    alpha = score
+                    self.pvTable[ply] = (move,) + self.pvTable[ply + 1]
+                    if alpha >= beta:
+                        self.recordCutoff(move, depth, ply, moveNumber)
+                        break #the opponent will avoid this position
+        if bestScore >= beta:
+            bound = LOWER_BOUND
+        elif bestScore > originalAlpha:
+            bound = EXACT
+        else:
+            bound = UPPER_BOUND
+        table.store(key, depth, bound, self.scoreToTable(bestScore, ply),
+                    bestMove)
+        return bestScore
+    def quiescence(self, alpha:int, beta:int, ply:int)->int:
+        """returns the score of the current position from the side to
+        move's point of view, searching only captures and promotions until
+        the position is quiet. The side to move may stand pat (keep the
+        static evaluation) instead of capturing, except when in check under
+        standard rules, where every move out of check is searched."""
+        self.nodes += 1
+        self.quiescenceNodes += 1
+        if self.nodes >= self.nextBudgetCheck:
+            self.checkBudget()
+        if self.kingCaptured():
+            return -MATE_SCORE + ply
+        position = self.position
+        if ply >= MAX_PLY:
+            return self.evaluate()
+        inCheck = position.standardRules and position.inCheck()
+        if inCheck:
+            moves = self.generateMoves()
+            if not moves:
+                return -MATE_SCORE + ply
+            standPat = bestScore = -MATE_SCORE + ply
+        else:
+            standPat = bestScore = self.evaluate()
+            if standPat >= beta:
+                return standPat
+            #under standard rules no capture can win more than a queen and a
+            #promotion, so if that would not reach alpha nothing will
+            if position.standardRules and \
+               standPat + CAPTURE_GAINS[QUEEN] * 2 + DELTA_MARGIN <= alpha:
+                return standPat
+            if standPat > alpha:
+                alpha = standPat
+            moves = self.generateCaptures()
+            moves.sort(key=self.captureOrder, reverse=True)
+        for move in moves:
+            if not inCheck:
+                if standPat + self.captureGain(move) + DELTA_MARGIN <= alpha:
+                    continue #delta pruning
+                if self.useStaticExchange and \
+                   position.staticExchange(move) < 0:
+                    continue
+            position.makeMove(move)
+            score = -self.quiescence(-beta, -alpha, ply + 1)
+            position.unmakeMove()
+            if score > bestScore:
+                bestScore = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return bestScore
+    def searchRoot(self, depth:int)->tuple:
+        """searches every move from the root depth plies deep and returns
+        (best move, score), or (None, score) if the game is already over"""
+        position = self.position
+        moves = self.generateMoves()
+        if self.kingCaptured():
+            return None, -MATE_SCORE
+        gameOverScore = self.gameOverScore(moves, 0)
+        if gameOverScore is not None:
+            return None, gameOverScore
+        alpha, beta = -MATE_SCORE - 1, MATE_SCORE + 1
+        bestMove = None
+        pvMove = self.previousPV[0] if self.previousPV else None
+        entry = self.transpositionTable.probe(position.key)
+        self.orderMoves(moves, 0, pvMove, entry[3] if entry else None)
+        for move in moves:
+            position.makeMove(move)
+            score = -self.negamax(depth - 1, -beta, -alpha, 1,
+                                  move == pvMove)
+            position.unmakeMove()
+            if score > alpha:
+                alpha = score
+                bestMove = move
+                self.pvTable[0] = (move,) + self.pvTable[1]
+        self.transpositionTable.store(position.key, depth, EXACT, alpha,
+                                      bestMove)
+        return bestMove, alpha
+    def makeResult(self, bestMove:tuple, score:int, depth:int,
+                   startTime:float, principalVariation:tuple)->SearchResult:
+        """converts square indices and search units for a SearchResult"""
+        position = self.position
+        if bestMove is not None:
+            bestMove = position.moveCoordinates(bestMove)
+        line = [position.moveCoordinates(move) for move in principalVariation]
+        return SearchResult(bestMove, score / SCORE_SCALE, depth, self.nodes,
+                            time.perf_counter() - startTime, line)
+    def search(self, depth:int)->SearchResult:
+        """searches the current position depth plies deep (at least 1) and
+        returns the best move for the side to move"""
+        startTime = time.perf_counter()
+        depth = max(depth, 1)
+        self.nodes = 1
+        self.deadline = self.nodeLimit = None
+        self.nextBudgetCheck = BUDGET_CHECK_INTERVAL
+        self.previousPV = ()
+        self.resetOrdering()
+        self.startStats()
+        self.transpositionTable.newSearch()
+        bestMove, score = self.searchRoot(depth)
+        result = self.makeResult(bestMove, score, depth, startTime,
+                                 self.pvTable[0] if bestMove else ())
+        self.iterationNodes.append(self.nodes)
+        result.stats = self.makeStats(depth, result.elapsed)
+        self.logStats(result.stats)
+        return result
+    def iterativeSearch(self, maxDepth:int = MAX_DEPTH, moveTime:float = None,
+                        nodeLimit:int = None)->SearchResult:
+        """
+        Searches with iterative deepening until maxDepth is reached, moveTime
+        seconds have passed or nodeLimit nodes have been searched, and
+        returns the move and score of the deepest completed iteration. If
+        not even the first iteration completes, the first root move is
+        returned. The node count and time cover every iteration.
+        """
+        startTime = time.perf_counter()
+        maxDepth = max(min(maxDepth, MAX_DEPTH), 1)
+        position = self.position
+        rootMoveCount = position.undoCount
+        self.nodes = 1
+        self.deadline = None if moveTime is None else startTime + moveTime
+        self.nodeLimit = nodeLimit
+        self.nextBudgetCheck = 0
+        self.previousPV = ()
+        self.resetOrdering()
+        self.startStats()
+        self.transpositionTable.newSearch()
+        moves = position.generateMoves()
+        result = self.makeResult(moves[0] if moves else None, 0, 0,
+                                 startTime, ())
+        for depth in range(1, maxDepth + 1):
+            iterationStart = self.nodes
+            try:
+                bestMove, score = self.searchRoot(depth)
+            except SearchTimeout:
+                #take back the moves of the interrupted line
+                position.takeBackTo(rootMoveCount)
+                break
+            self.previousPV = self.pvTable[0] if bestMove else ()
+            result = self.makeResult(bestMove, score, depth, startTime,
+                                     self.previousPV)
+            self.iterationNodes.append(self.nodes - iterationStart)
+            if self.log is not None:
+                self.logStats(self.makeStats(depth, result.elapsed))
+            if bestMove is None or abs(score) >= MATE_BOUND:
+                break #the game is decided, searching deeper changes nothing
+        self.deadline = self.nodeLimit = None
+        #report the work of every iteration, including an interrupted one
+        result.nodes = self.nodes
+        result.elapsed = time.perf_counter() - startTime
+        result.stats = self.makeStats(result.depth, result.elapsed)
+        return result
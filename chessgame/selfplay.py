@@ -0,0 +1,180 @@
+"""
+Headless engine-vs-engine games. playGame plays one game, playMatch plays
+many across a process pool and streams one JSON line per finished game.
+
+Command line example (see --help):
+    python -m chessgame.selfplay random minimax:2 --games 100 --workers 4
+"""
+import argparse
+import copy
+import json
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from .game import ChessGame, STARTING_BOARD
+from .bitboard import SIMPLIFIED, STANDARD
+
+def randomMove(game:ChessGame, color:str, depth:int, moveTime:float,
+               rng:random.Random)->int:
+    """plays a move with the random engine and returns the nodes searched"""
+    game.randomEngine(color, rng)
+    return 0
+
+def minimaxMove(game:ChessGame, color:str, depth:int, moveTime:float,
+                rng:random.Random)->int:
+    """plays a move with the minimax engine and returns the nodes searched"""
+    return game.minimaxEngine(color, depth, moveTime).nodes
+
+def monteCarloMove(game:ChessGame, color:str, depth:int, moveTime:float,
+                   rng:random.Random)->int:
+    """plays a move with the Monte Carlo engine, taking depth as the number
+    of playouts, and returns the number of playouts"""
+    return game.monteCarloEngine(color, depth, moveTime, rng=rng).nodes
+
+#engine name -> function(game, color, depth, moveTime, rng) that makes one
+#move for color and returns the number of nodes it searched
+ENGINES = {'random': randomMove, 'minimax': minimaxMove,
+           'mcts': monteCarloMove}
+
+def parseEngine(spec:str)->tuple:
+    """splits an engine spec such as 'minimax:4' into ('minimax', 4). The
+    depth is None when not given."""
+    name, _, depth = spec.partition(':')
+    if name not in ENGINES:
+        raise ValueError(f"unknown engine {name!r}, expected one of "
+                         f"{', '.join(sorted(ENGINES))}")
+    return name, int(depth) if depth else None
+
+def playGame(whiteEngine:str, blackEngine:str, seed:int = 0,
+             maxMoves:int = 200, moveTime:float = None,
+             gameTime:float = None, board:list = None,
+             rules:str = SIMPLIFIED, book:str = None)->dict:
+    """
+    Plays one game between two engine specs under the given rules and
+    returns its record: the winner ('white', 'black' or 'draw'), why the
+    game ended, the FEN of the starting position, the moves as [fromRow,
+    fromCol, toRow, toCol] lists (with the promotion piece name appended
+    for promotions), the nodes each side searched and the time taken. The game is a draw once maxMoves plies
+    have been played or gameTime seconds have passed. With book, the
+    path of a position book (see book.py), the minimax engines play its
+    moves where it has them.
+    """
+    engines = {'white': parseEngine(whiteEngine),
+               'black': parseEngine(blackEngine)}
+    rng = random.Random(seed)
+    game = ChessGame(copy.deepcopy(board or STARTING_BOARD), rules=rules)
+    if book is not None:
+        game.useBook(book)
+    nodes = {'white': 0, 'black': 0}
+    startTime = time.perf_counter()
+    winner, reason = 'draw', 'move cap'
+    while len(game.moveHistory) < maxMoves:
+        if gameTime is not None and time.perf_counter()-startTime >= gameTime:
+            reason = 'time cap'
+            break
+        color = game.getTurn()
+        name, depth = engines[color]
+        nodes[color] += ENGINES[name](game, color, depth, moveTime, rng)
+        gameOver, gameWinner = game.checkGameOver()
+        if gameOver:
+            winner, reason = gameWinner, 'game over'
+            break
+    moves = []
+    for move in game.moveHistory:
+        (fromRow, fromCol), (toRow, toCol), *promotion = \
+            game.position.moveCoordinates(move)
+        moves.append([fromRow, fromCol, toRow, toCol] + promotion)
+    return {'white': whiteEngine, 'black': blackEngine, 'seed': seed,
+            'rules': rules, 'winner': winner, 'reason': reason,
+            'fen': game.startFen, 'plies': len(game.moveHistory),
+            'moves': moves,
+            'nodes': nodes, 'time': time.perf_counter() - startTime}
+
+def playMatch(engineA:str, engineB:str, games:int, output = None,
+              workers:int = None, seed:int = 0, swapColors:bool = True,
+              **gameOptions)->dict:
+    """
+    Plays games between two engine specs on a pool of worker processes.
+    Game i uses seed + i, and engineA plays white in even-numbered games
+    (every game unless swapColors is False). Each finished game is written
+    to output (a file object) as a JSON line as soon as it is done, in
+    completion order. gameOptions are passed on to playGame. Returns the
+    number of wins for each engine and the number of draws.
+    """
+    tally = {engineA: 0, engineB: 0, 'draw': 0}
+    if engineA == engineB:
+        tally = {engineA: 0, 'draw': 0}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for index in range(games):
+            white, black = engineA, engineB
+            if swapColors and index % 2 == 1:
+                white, black = engineB, engineA
+            future = executor.submit(playGame, white, black, seed + index,
+                                     **gameOptions)
+            futures[future] = index
+        for future in as_completed(futures):
+            record = future.result()
+            record['game'] = futures[future]
+            if record['winner'] == 'draw':
+                tally['draw'] += 1
+            else:
+                tally[record[record['winner']]] += 1
+            if output is not None:
+                output.write(json.dumps(record) + '\n')
+                output.flush()
+    return tally
+
+def main(arguments:list = None)->None:
+    """command line entry point"""
+    parser = argparse.ArgumentParser(
+        description="Play engine-vs-engine games and write one JSON line "
+                    "per game.")
+    parser.add_argument('engineA', help="engine spec, e.g. random, "
+                                        "minimax:3 (name:depth) or "
+                                        "mcts:2000 (name:playouts)")
+    parser.add_argument('engineB', help="engine spec for the opponent")
+    parser.add_argument('--games', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="seed of the first game; game i uses seed + i")
+    parser.add_argument('--max-moves', type=int, default=200,
+                        help="plies after which a game is a draw")
+    parser.add_argument('--move-time', type=float, default=None,
+                        help="seconds per minimax (iterative deepening) or "
+                             "Monte Carlo move")
+    parser.add_argument('--game-time', type=float, default=None,
+                        help="seconds after which a game is a draw")
+    parser.add_argument('--rules', choices=(SIMPLIFIED, STANDARD),
+                        default=SIMPLIFIED, help="rules to play by")
+    parser.add_argument('--book', default=None,
+                        help="position book for the minimax engines (see "
+                             "chessgame.book)")
+    parser.add_argument('--no-swap', action='store_true',
+                        help="let engineA play white in every game")
+    parser.add_argument('--output', default='-',
+                        help="JSONL file to write (default: stdout)")
+    options = parser.parse_args(arguments)
+    for spec in (options.engineA, options.engineB):
+        try:
+            parseEngine(spec)
+        except ValueError as error:
+            parser.error(str(error))
+    output = sys.stdout if options.output == '-' else \
+             open(options.output, 'w', encoding='utf-8')
+    try:
+        tally = playMatch(options.engineA, options.engineB, options.games,
+                          output, options.workers, options.seed,
+                          not options.no_swap, maxMoves=options.max_moves,
+                          moveTime=options.move_time,
+                          gameTime=options.game_time, rules=options.rules,
+                          book=options.book)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(json.dumps({'result': tally}), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,413 @@
+"""
+A game server hosting many ChessGame sessions at once, over a TCP or Unix
+socket. Clients send one JSON object per line and get one JSON line back
+per request, carrying the request's "id" if it had one. Requests name an
+"op" and, except for "new" and "sessions", the "session" they are for:
+
+    new      {"rules": "standard", "fen": "..."} -> session, fen
+    move     {"move": "e2e4"} (coordinates, or SAN as in pgn.py) -> fen
+    engine   {"depth": 4, "moveTime": 1.0, "nodeLimit": 100000} -> move
+    state    -> fen, turn, moves, gameOver, winner
+    undo     -> fen
+    pgn      -> pgn
+    cancel   cancels the session's queued and running requests
+    close    ends the session
+    sessions -> the open session ids
+
+Engine moves are searched on a bounded pool of worker processes, so the
+event loop never waits on a search. Each session works through its
+requests in order from a queue of at most --queue-size requests; requests
+beyond that are refused with a "busy" error instead of piling up, and at
+most --workers searches are handed to the pool at a time. Cancelling drops
+a session's queued requests at once. A search already running in a worker
+cannot be interrupted, so its result is discarded and the worker (and its
+place among the --workers searches) is free again once the search's own
+budget (at most --max-move-time seconds) runs out.
+
+Example:
+    python -m chessgame.server --port 7070 --workers 4
+    echo '{"op": "new", "id": 1}' | nc localhost 7070
+"""
+import argparse
+import asyncio
+import copy
+import itertools
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from .game import ChessGame, STARTING_BOARD
+from .bitboard import SIMPLIFIED, STANDARD
+from .fen import FenError, moveFromName, moveName
+from .search import AlphaBetaSearch, MAX_DEPTH
+from .transposition import TranspositionTable
+
+#memory budget of the transposition table each worker process keeps
+WORKER_TABLE_BYTES = 16 * 1024 * 1024
+#engine requests without a depth or budget search this deep
+DEFAULT_DEPTH = 3
+_workerTable = None #per-process table, reused between engine moves
+
+class RequestError(Exception):
+    """raised for a request that cannot be carried out; its message is sent
+    back to the client"""
+
+def searchPosition(position, depth:int, moveTime:float,
+                   nodeLimit:int)->dict:
+    """searches a (pickled) position in a worker process and returns the
+    best move as a packed int with the search's score, depth, nodes and
+    time"""
+    global _workerTable
+    if _workerTable is None:
+        _workerTable = TranspositionTable(WORKER_TABLE_BYTES)
+    search = AlphaBetaSearch(position, _workerTable)
+    result = search.iterativeSearch(depth, moveTime, nodeLimit)
+    move = None
+    if result.bestMove is not None:
+        move = next(candidate for candidate in position.generateMoves()
+                    if position.moveCoordinates(candidate) == result.bestMove)
+    return {'move': move, 'score': result.score, 'depth': result.depth,
+            'nodes': result.nodes, 'elapsed': result.elapsed}
+
+def internalError(error:Exception)->dict:
+    """returns the response to a request that failed with an unexpected
+    exception, which is answered like any other error so that neither the
+    client's connection nor the session's queue is lost"""
+    return {'error': f"internal error: {type(error).__name__}: {error}"}
+
+class Client(object):
+    """a connected client. Responses for it may come from several sessions
+    at once, so they are written one at a time."""
+    def __init__(self, writer:asyncio.StreamWriter)->None:
+        self.writer = writer
+        self.lock = asyncio.Lock()
+    async def send(self, response:dict)->None:
+        """writes a response line, waiting while the client is not reading
+        so that a slow client cannot make the server buffer without
+        limit"""
+        async with self.lock:
+            if self.writer.is_closing():
+                return
+            self.writer.write(json.dumps(response).encode() + b'\n')
+            try:
+                await self.writer.drain()
+            except ConnectionError:
+                pass
+
+class Session(object):
+    """
+    One game on the server. Its requests are queued and carried out in
+    order by its own task, so that two requests never change the game at
+    the same time.
+    """
+    def __init__(self, sessionId:int, game:ChessGame, queueSize:int)->None:
+        self.sessionId = sessionId
+        self.game = game
+        self.queue = asyncio.Queue(queueSize)
+        self.task = None #the task working through the queue
+        self.running = None #the request being carried out, as a task
+        self.closed = False
+    def state(self)->dict:
+        """returns the game's position and whether it is over"""
+        game = self.game
+        gameOver, winner = game.checkGameOver()
+        return {'session': self.sessionId, 'fen': game.toFen(),
+                'turn': game.getTurn(), 'moves': len(game.moveHistory),
+                'gameOver': gameOver, 'winner': winner}
+
+class GameServer(object):
+    """
+    Serves ChessGame sessions over asyncio streams (see the module
+    docstring for the protocol). Engine searches run on a process pool of
+    the given number of workers.
+    """
+    def __init__(self, workers:int = None, queueSize:int = 8,
+                 maxSessions:int = 1024, maxMoveTime:float = 10.0)->None:
+        self.workers = workers or os.cpu_count() or 1
+        self.queueSize = queueSize
+        self.maxSessions = maxSessions
+        self.maxMoveTime = maxMoveTime
+        self.sessions = {}
+        self.clients = {} #the task serving each connected Client
+        self.sessionIds = itertools.count(1)
+        self.executor = None #started with the server
+        self.searchSlots = None #bounds the searches handed to the pool
+        self.server = None
+    async def start(self, host:str = '127.0.0.1', port:int = 7070,
+                    path:str = None)->None:
+        """starts listening on a Unix socket at path if given, otherwise
+        on a TCP host and port"""
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        self.searchSlots = asyncio.Semaphore(self.workers)
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self.serveClient,
+                                                          path)
+        else:
+            self.server = await asyncio.start_server(self.serveClient, host,
+                                                     port)
+    async def serveForever(self)->None:
+        """serves clients until cancelled"""
+        async with self.server:
+            await self.server.serve_forever()
+    async def close(self)->None:
+        """stops the server, its sessions and its worker processes"""
+        if self.server is not None:
+            self.server.close()
+        #closing a client's connection ends its task, which would otherwise
+        #be cancelled mid-read when the event loop shuts down
+        for client in self.clients:
+            client.writer.close()
+        await asyncio.gather(*self.clients.values(), return_exceptions=True)
+        if self.server is not None:
+            await self.server.wait_closed()
+        for session in list(self.sessions.values()):
+            self.closeSession(session)
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+    async def serveClient(self, reader:asyncio.StreamReader,
+                          writer:asyncio.StreamWriter)->None:
+        """reads a client's requests until it disconnects"""
+        client = Client(writer)
+        self.clients[client] = asyncio.current_task()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    await self.handleLine(line, client)
+        except ConnectionError:
+            pass
+        finally:
+            del self.clients[client]
+            writer.close()
+    async def handleLine(self, line:bytes, client:Client)->None:
+        """answers the requests that need no queue at once and queues the
+        others on their session"""
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("a request must be a JSON object")
+        except ValueError as error:
+            await self.reply(client, {}, {'error': f"bad request: {error}"})
+            return
+        try:
+            op = request.get('op')
+            if op == 'new':
+                response = self.newSession(request)
+            elif op == 'sessions':
+                response = {'sessions': sorted(self.sessions)}
+            else:
+                session = self.getSession(request)
+                if op == 'state':
+                    response = session.state()
+                elif op == 'cancel':
+                    response = {'cancelled': self.cancel(session)}
+                elif op == 'close':
+                    self.closeSession(session)
+                    response = {'closed': session.sessionId}
+                elif op in ('move', 'engine', 'undo', 'pgn'):
+                    try:
+                        session.queue.put_nowait((request, client))
+                    except asyncio.QueueFull:
+                        raise RequestError("busy: too many queued requests "
+                                           "for this session") from None
+                    return
+                else:
+                    raise RequestError(f"unknown op {op!r}")
+        except RequestError as error:
+            response = {'error': str(error)}
+        except Exception as error:
+            response = internalError(error)
+        await self.reply(client, request, response)
+    async def reply(self, client:Client, request:dict, response:dict)->None:
+        """sends the response to a request, with the request's id"""
+        response = {'ok': 'error' not in response, **response}
+        if 'id' in request:
+            response['id'] = request['id']
+        await client.send(response)
+    def getSession(self, request:dict)->Session:
+        """returns the session a request names"""
+        session = self.sessions.get(request.get('session'))
+        if session is None:
+            raise RequestError(f"no session {request.get('session')!r}")
+        return session
+    def newSession(self, request:dict)->dict:
+        """starts a game from the starting board, or from a FEN position"""
+        if len(self.sessions) >= self.maxSessions:
+            raise RequestError("too many sessions")
+        rules = request.get('rules', SIMPLIFIED)
+        if rules not in (SIMPLIFIED, STANDARD):
+            raise RequestError(f"unknown rules {rules!r}")
+        try:
+            if request.get('fen'):
+                game = ChessGame.fromFen(request['fen'], rules)
+            else:
+                game = ChessGame(copy.deepcopy(STARTING_BOARD), rules=rules)
+        except (FenError, ValueError) as error:
+            raise RequestError(f"bad FEN: {error}") from None
+        session = Session(next(self.sessionIds), game, self.queueSize)
+        session.task = asyncio.create_task(self.runSession(session))
+        self.sessions[session.sessionId] = session
+        return session.state()
+    def cancel(self, session:Session)->int:
+        """drops a session's queued requests and its running one, each
+        answered with a "cancelled" error, and returns how many there
+        were"""
+        cancelled = 0
+        while not session.queue.empty():
+            request, client = session.queue.get_nowait()
+            asyncio.create_task(self.reply(client, request,
+                                           {'error': "cancelled"}))
+            cancelled += 1
+        if session.running is not None and not session.running.done():
+            session.running.cancel()
+            cancelled += 1
+        return cancelled
+    def closeSession(self, session:Session)->None:
+        """cancels a session's requests and removes it"""
+        session.closed = True
+        self.cancel(session)
+        session.task.cancel()
+        self.sessions.pop(session.sessionId, None)
+    async def runSession(self, session:Session)->None:
+        """carries out a session's queued requests one at a time"""
+        while True:
+            request, client = await session.queue.get()
+            session.running = asyncio.create_task(
+                self.carryOut(session, request))
+            try:
+                response = await session.running
+            except asyncio.CancelledError:
+                if session.closed:
+                    raise
+                response = {'error': "cancelled"}
+            except RequestError as error:
+                response = {'error': str(error)}
+            except Exception as error:
+                response = internalError(error)
+            session.running = None
+            await self.reply(client, request, response)
+    async def carryOut(self, session:Session, request:dict)->dict:
+        """carries out a queued request and returns its response"""
+        game = session.game
+        op = request['op']
+        if op == 'move':
+            self.playRequestedMove(game, request.get('move'))
+        elif op == 'undo':
+            if not game.undoMove():
+                raise RequestError("no move to undo")
+        elif op == 'pgn':
+            return {'session': session.sessionId, 'pgn': game.toPgn()}
+        elif op == 'engine':
+            return {**await self.engineMove(game, request), **session.state()}
+        return session.state()
+    def playRequestedMove(self, game:ChessGame, name)->None:
+        """plays a move given in coordinates (e.g. 'e2e4' or 'e7e8q') or
+        SAN"""
+        if not isinstance(name, str):
+            raise RequestError("move must be a string such as 'e2e4'")
+        if game.checkGameOver()[0]:
+            raise RequestError("the game is over")
+        position = game.position
+        try:
+            move = moveFromName(position, name)
+        except FenError:
+            from .pgn import moveFromSan, PgnError
+            try:
+                move = moveFromSan(position, name)
+            except PgnError as error:
+                raise RequestError(str(error)) from None
+        if move not in position.generateMoves():
+            raise RequestError(f"illegal move {name!r}")
+        game.playMove(move)
+        game.undoneMoveHistory.clear()
+    def requestNumber(self, request:dict, name:str, convert:type,
+                      high:float = math.inf)->float:
+        """returns a request's number field converted by convert (int or
+        float), or None if it has none. The number must be finite, above 0
+        and at most high."""
+        value = request.get(name)
+        if value is None:
+            return None
+        try:
+            value = convert(value)
+        except (TypeError, ValueError, OverflowError):
+            raise RequestError(f"{name} must be a number") from None
+        if not (math.isfinite(value) and 0 < value <= high):
+            limit = f" and at most {high}" if high < math.inf else ""
+            raise RequestError(f"{name} must be above 0{limit}")
+        return value
+    def releaseSlot(self, future:asyncio.Future)->None:
+        """frees the search slot of a finished search"""
+        self.searchSlots.release()
+        if not future.cancelled():
+            future.exception() #a cancelled request never reads it
+    async def engineMove(self, game:ChessGame, request:dict)->dict:
+        """searches the game's position on the process pool and plays the
+        move found"""
+        if game.checkGameOver()[0]:
+            raise RequestError("the game is over")
+        depth = self.requestNumber(request, 'depth', int, MAX_DEPTH)
+        moveTime = self.requestNumber(request, 'moveTime', float)
+        nodeLimit = self.requestNumber(request, 'nodeLimit', int)
+        if depth is None:
+            budgeted = moveTime is not None or nodeLimit is not None
+            depth = MAX_DEPTH if budgeted else DEFAULT_DEPTH
+        moveTime = self.maxMoveTime if moveTime is None else \
+                   min(moveTime, self.maxMoveTime)
+        loop = asyncio.get_running_loop()
+        await self.searchSlots.acquire()
+        try:
+            future = loop.run_in_executor(
+                self.executor, searchPosition, game.position, depth, moveTime,
+                nodeLimit)
+        except BaseException:
+            self.searchSlots.release()
+            raise
+        #the slot is given back when the worker is done, not when the request
+        #is: a cancelled request leaves its search running in the worker
+        future.add_done_callback(self.releaseSlot)
+        result = await asyncio.shield(future)
+        move = result.pop('move')
+        if move is None:
+            raise RequestError("no move to play")
+        result['move'] = moveName(game.position, move)
+        game.playMove(move)
+        game.undoneMoveHistory.clear()
+        return result
+
+async def serve(options:argparse.Namespace)->None:
+    """runs a server with the command line options until interrupted"""
+    server = GameServer(options.workers, options.queue_size,
+                        options.max_sessions, options.max_move_time)
+    await server.start(options.host, options.port, options.unix)
+    try:
+        await server.serveForever()
+    finally:
+        await server.close()
+
+def main(arguments:list = None)->None:
+    """command line entry point"""
+    parser = argparse.ArgumentParser(
+        description="Serve chess games over a socket, one JSON line per "
+                    "request.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7070)
+    parser.add_argument('--unix', default=None,
+                        help="listen on this Unix socket path instead")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="engine worker processes (default: one per CPU)")
+    parser.add_argument('--queue-size', type=int, default=8,
+                        help="requests each session may have waiting")
+    parser.add_argument('--max-sessions', type=int, default=1024)
+    parser.add_argument('--max-move-time', type=float, default=10.0,
+                        help="longest search, in seconds, of one engine move")
+    options = parser.parse_args(arguments)
+    try:
+        asyncio.run(serve(options))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Immutable position snapshots. A PositionSnapshot holds a position in a few
+slots: the board as a bytes string of piece indices (see bitboard.py), the
+side to move, the standard rules state, the Zobrist key and the incremental
+evaluation. Snapshots are hashable, so they can key dicts and sets, and
+cheap to keep in large numbers.
+
+play(move) derives the snapshot after a move by copying the board bytes
+and updating the key and evaluation incrementally, as makeMove does. The
+child keeps a reference to its parent rather than a copy of the game so
+far, so a tree of snapshots shares its common history. toPosition() turns a
+snapshot back into a BitboardPosition whose undo stack holds that history,
+for searching or generating moves.
+
+Pickled snapshots leave their history behind, so they ship to worker
+processes as little more than their board bytes.
+"""
+from .bitboard import (BitboardPosition, STANDARD, EMPTY, PAWN, DOUBLE_PUSH,
+                       EN_PASSANT, CASTLING, PROMOTION, SQUARE_MASK, TO_SHIFT,
+                       PIECE_SHIFT, CAPTURED_SHIFT, KIND_SHIFT,
+                       PROMOTION_SHIFT, PIECE_MASK, KIND_MASK)
+from .zobrist import getZobristKeys
+from .evaluation import getEvaluationTables
+
+class SetupState(object):
+    """the castling setup of a game (see BitboardPosition.setupCastling),
+    which every snapshot derived from the same position shares"""
+    __slots__ = ('castlingRooks', 'keepRights')
+    def __init__(self, castlingRooks:tuple, keepRights:tuple)->None:
+        self.castlingRooks = castlingRooks
+        self.keepRights = keepRights
+
+class PositionSnapshot(object):
+    """
+    An immutable position. Build one with BitboardPosition.snapshot() (or
+    ChessGame.snapshot()) and derive others with play(move). Two snapshots
+    are equal when their pieces, side to move, castling rights and en
+    passant square are, as for repetitions; the halfmove clock and history
+    are not compared.
+    """
+    __slots__ = ('rows', 'cols', 'rules', 'board', 'sideToMove',
+                 'castlingRights', 'epSquare', 'halfmoveClock', 'key',
+                 'material', 'positional', 'setup', 'parent', 'move')
+    def __init__(self, rows:int, cols:int, rules:str, board:bytes,
+                 sideToMove:int, castlingRights:int, epSquare:int,
+                 halfmoveClock:int, key:int, material:int, positional:int,
+                 setup:SetupState, parent:'PositionSnapshot' = None,
+                 move:int = 0)->None:
+        setField = object.__setattr__
+        setField(self, 'rows', rows)
+        setField(self, 'cols', cols)
+        setField(self, 'rules', rules)
+        setField(self, 'board', board)
+        setField(self, 'sideToMove', sideToMove)
+        setField(self, 'castlingRights', castlingRights)
+        setField(self, 'epSquare', epSquare)
+        setField(self, 'halfmoveClock', halfmoveClock)
+        setField(self, 'key', key)
+        setField(self, 'material', material)
+        setField(self, 'positional', positional)
+        setField(self, 'setup', setup)
+        #the snapshot this one was derived from, and the move between them
+        setField(self, 'parent', parent)
+        setField(self, 'move', move)
+    @classmethod
+    def fromPosition(cls, position:BitboardPosition)->'PositionSnapshot':
+        """returns a snapshot of a position's current state. The moves that
+        led to it are not kept."""
+        return cls(position.rows, position.cols, position.rules,
+                   bytes(position.squares), position.sideToMove,
+                   position.castlingRights, position.epSquare,
+                   position.halfmoveClock, position.key, position.material,
+                   position.positional,
+                   SetupState(tuple(position.castlingRooks),
+                              tuple(position.keepRights)))
+    def __setattr__(self, name:str, value)->None:
+        raise AttributeError("position snapshots cannot be changed")
+    def __delattr__(self, name:str)->None:
+        raise AttributeError("position snapshots cannot be changed")
+    def __hash__(self)->int:
+        return self.key
+    def __eq__(self, other)->bool:
+        if not isinstance(other, PositionSnapshot):
+            return NotImplemented
+        return self.key == other.key and self.board == other.board and \
+               self.sideToMove == other.sideToMove and \
+               self.castlingRights == other.castlingRights and \
+               self.epSquare == other.epSquare and \
+               (self.rows, self.cols, self.rules) == \
+               (other.rows, other.cols, other.rules)
+    def __repr__(self)->str:
+        from .fen import placementFromPosition
+        return f"PositionSnapshot({placementFromPosition(self)!r})"
+    def __reduce__(self)->tuple:
+        """pickles the snapshot without its history"""
+        return (PositionSnapshot, (self.rows, self.cols, self.rules,
+                                   self.board, self.sideToMove,
+                                   self.castlingRights, self.epSquare,
+                                   self.halfmoveClock, self.key, self.material,
+                                   self.positional, self.setup))
+    def square(self, row:int, col:int)->int:
+        """returns the square index of (row, col)"""
+        return row * self.cols + col
+    def coordinates(self, sq:int)->tuple:
+        """returns the (row, col) of a square index"""
+        return divmod(sq, self.cols)
+    def pieceAt(self, sq:int)->int:
+        """returns the piece on a square (EMPTY if there is none)"""
+        return self.board[sq]
+    def evaluate(self)->int:
+        """returns the incremental evaluation from white's point of view"""
+        return self.material + self.positional
+    def history(self)->list:
+        """returns the snapshots this one was derived from, oldest first"""
+        line = []
+        snapshot = self.parent
+        while snapshot is not None:
+            line.append(snapshot)
+            snapshot = snapshot.parent
+        line.reverse()
+        return line
+    def play(self, move:int)->'PositionSnapshot':
+        """returns the snapshot after a packed move (see
+        BitboardPosition.createMove), without checking that it is legal"""
+        fromSq = move & SQUARE_MASK
+        toSq = move >> TO_SHIFT & SQUARE_MASK
+        moved = move >> PIECE_SHIFT & PIECE_MASK
+        captured = move >> CAPTURED_SHIFT & PIECE_MASK
+        kind = move >> KIND_SHIFT & KIND_MASK
+        zobrist = getZobristKeys(self.rows, self.cols)
+        tables = getEvaluationTables(self.rows, self.cols)
+        pieceKeys = zobrist.pieceKeys
+        pieceSquare = tables.pieceSquare
+        standardRules = self.rules == STANDARD
+        board = bytearray(self.board)
+        key = self.key ^ zobrist.sideKey
+        material = self.material
+        positional = self.positional
+        if captured != EMPTY:
+            capturedSq = toSq
+            if standardRules and kind == EN_PASSANT:
+                capturedSq += self.cols if moved < 6 else -self.cols
+            board[capturedSq] = EMPTY
+            key ^= pieceKeys[captured][capturedSq]
+            positional -= pieceSquare[captured][capturedSq]
+            material += tables.captureScore[captured]
+        placed = moved
+        if standardRules and kind == PROMOTION:
+            placed = moved - PAWN + (move >> PROMOTION_SHIFT & KIND_MASK)
+            material += tables.promotionScore[placed]
+        board[fromSq] = EMPTY
+        board[toSq] = placed
+        key ^= pieceKeys[moved][fromSq] ^ pieceKeys[placed][toSq]
+        positional += pieceSquare[placed][toSq] - pieceSquare[moved][fromSq]
+        castlingRights = self.castlingRights
+        epSquare = self.epSquare
+        halfmoveClock = self.halfmoveClock
+        if standardRules:
+            if kind == CASTLING:
+                side = 0 if toSq > fromSq else 1
+                rookFrom = self.setup.castlingRooks[moved // 6 * 2 + side]
+                rookTo = (fromSq + toSq) // 2
+                rook = board[rookFrom]
+                board[rookFrom] = EMPTY
+                board[rookTo] = rook
+                key ^= pieceKeys[rook][rookFrom] ^ pieceKeys[rook][rookTo]
+                positional += pieceSquare[rook][rookTo] - \
+                              pieceSquare[rook][rookFrom]
+            if epSquare >= 0:
+                key ^= zobrist.enPassantKeys[epSquare % self.cols]
+            epSquare = -1
+            if kind == DOUBLE_PUSH:
+                epSquare = (fromSq + toSq) // 2
+                key ^= zobrist.enPassantKeys[epSquare % self.cols]
+            keepRights = self.setup.keepRights
+            rights = castlingRights & keepRights[fromSq] & keepRights[toSq]
+            for right in range(4):
+                if (castlingRights ^ rights) >> right & 1:
+                    key ^= zobrist.castlingKeys[right]
+            castlingRights = rights
+            if moved % 6 == PAWN or captured != EMPTY:
+                halfmoveClock = 0
+            else:
+                halfmoveClock += 1
+        return PositionSnapshot(self.rows, self.cols, self.rules, bytes(board),
+                                self.sideToMove ^ 1, castlingRights,
+                                epSquare, halfmoveClock, key, material,
+                                positional, self.setup, self, move)
+    def toPosition(self)->BitboardPosition:
+        """returns a BitboardPosition of the snapshot. Its undo stack holds
+        the moves from the oldest snapshot this one was derived from, so
+        repetitions are found and the moves can be taken back."""
+        position = BitboardPosition(self.rows, self.cols, self.rules)
+        for sq, piece in enumerate(self.board):
+            if piece != EMPTY:
+                position.addPiece(piece, sq)
+        if self.sideToMove != position.sideToMove:
+            position.switchSide()
+        position.castlingRooks = list(self.setup.castlingRooks)
+        position.keepRights = list(self.setup.keepRights)
+        position.setCastlingRights(self.castlingRights)
+        position.setEnPassantSquare(self.epSquare)
+        position.halfmoveClock = self.halfmoveClock
+        position.material = self.material
+        line = self.history()
+        for snapshot, child in zip(line, line[1:] + [self]):
+            position.pushUndo(child.move, snapshot.key,
+                              snapshot.castlingRights |
+                              (snapshot.epSquare + 1) << 4 |
+                              snapshot.halfmoveClock << 13)
+        return position
+    def generateMoves(self)->list:
+        """returns the moves of the side to move (see
+        BitboardPosition.generateMoves)"""
+        return self.toPosition().generateMoves()
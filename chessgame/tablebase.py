@@ -0,0 +1,510 @@
+"""
+Endgame tablebases for positions with few pieces under standard rules,
+built by retrograde analysis with the game's own move generator. A table
+covers one material signature, such as 'KRvK' (white king and rook against
+the black king), on one board shape, and gives every position with that
+material its exact result: a win or loss for the side to move and how many
+plies it takes to checkmate, or a draw. The table for 'KRvK' also answers
+'KvKR' positions by flipping the board and the colors.
+
+Positions are indexed by the side to move followed by the square of each
+piece in signature order (identical pieces in increasing square order),
+written in base rows * cols. A table file is a header (see HEADER) followed
+by one byte per index: 0 for indices that are not a legal position, 1 for
+a draw and 2 + plies otherwise, where an odd number of plies is a win for
+the side to move and an even number a loss. Mates further than MAX_PLIES
+plies away are stored as draws, and castling, en passant right after a
+double push and the fifty-move rule are not considered.
+
+Building a table first finds the moves of every position, split over a
+pool of worker processes, then works backwards from the checkmates. Tables
+for the material a capture or promotion leads to are built first.
+
+Command line example (see --help):
+    python -m chessgame.tablebase KRvK KQvK KPvK --directory tables
+"""
+import argparse
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from .bitboard import (BitboardPosition, STANDARD, WHITE, BLACK, PAWN,
+                       KNIGHT, BISHOP, ROOK, QUEEN, KING, EMPTY, PROMOTION,
+                       CAPTURED_SHIFT, KIND_SHIFT, PIECE_MASK, KIND_MASK,
+                       squaresOf)
+from .fen import PIECE_LETTERS, LETTER_TO_PIECE
+
+MAGIC = b'CGTB'
+VERSION = 1
+#magic, version, rows, columns, signature and entry count
+HEADER = struct.Struct('<4sIHH16sQ')
+#order of each side's pieces in a signature
+SIGNATURE_ORDER = (KING, QUEEN, ROOK, BISHOP, KNIGHT, PAWN)
+#the most pieces a table can have; larger tables take too long to build
+MAX_PIECES = 4
+#entry values: an index that is not a legal position, a draw, and the
+#smallest mate distance code (checkmated now); codes above it add plies
+INVALID, DRAW_CODE, MATE_CODE = 0, 1, 2
+MAX_PLIES = 252
+#marks a position whose value is not known yet while building
+PENDING = 255
+#results of a probe, for the side to move
+WIN, DRAW, LOSS = 1, 0, -1
+
+class TablebaseError(ValueError):
+    """raised for a bad signature or table file, or a table that needs
+    another table that has not been built"""
+
+def parseSignature(signature:str)->tuple:
+    """returns the pieces (as numbered in bitboard.py) of a material
+    signature such as 'KRvK', white's first, in signature order"""
+    sides = signature.split('v')
+    if len(sides) != 2:
+        raise TablebaseError(f"signature {signature!r} is not like 'KRvK'")
+    pieces = []
+    for color, letters in enumerate(sides):
+        kinds = []
+        for letter in letters:
+            if letter.lower() not in LETTER_TO_PIECE:
+                raise TablebaseError(f"unknown piece {letter!r} in "
+                                     f"{signature!r}")
+            kinds.append(LETTER_TO_PIECE[letter.lower()])
+        if kinds.count(KING) != 1:
+            raise TablebaseError(f"each side of {signature!r} needs one king")
+        kinds.sort(key=SIGNATURE_ORDER.index)
+        pieces.extend(color * 6 + kind for kind in kinds)
+    if len(pieces) > MAX_PIECES:
+        raise TablebaseError(f"tables have at most {MAX_PIECES} pieces")
+    return tuple(pieces)
+
+def signatureOf(pieces)->str:
+    """returns the material signature of an iterable of pieces"""
+    sides = ['', '']
+    for piece in sorted(pieces, key=lambda piece: (piece // 6,
+                                   SIGNATURE_ORDER.index(piece % 6))):
+        sides[piece // 6] += PIECE_LETTERS[piece % 6].upper()
+    return 'v'.join(sides)
+
+def positionSignature(position:BitboardPosition)->str:
+    """returns the material signature of a position"""
+    sides = []
+    for color in (WHITE, BLACK):
+        sides.append(''.join(PIECE_LETTERS[kind].upper() *
+                             position.pieces[color * 6 + kind].bit_count()
+                             for kind in SIGNATURE_ORDER))
+    return 'v'.join(sides)
+
+def mirroredSignature(signature:str)->str:
+    """returns the signature with the colors swapped"""
+    white, black = signature.split('v')
+    return black + 'v' + white
+
+def pieceGroups(pieces:tuple)->tuple:
+    """returns the pieces of a signature as (piece, count) pairs"""
+    groups = []
+    for piece in pieces:
+        if groups and groups[-1][0] == piece:
+            groups[-1] = (piece, groups[-1][1] + 1)
+        else:
+            groups.append((piece, 1))
+    return tuple(groups)
+
+def tableSize(pieces:tuple, rows:int, cols:int)->int:
+    """returns the number of indices of a table"""
+    return 2 * (rows * cols) ** len(pieces)
+
+def positionIndex(position:BitboardPosition, groups:tuple,
+                  mirrored:bool = False)->int:
+    """returns the table index of a position with the material of groups
+    (see pieceGroups). mirrored indexes the position with the colors
+    swapped and the board flipped top to bottom, for a table of the
+    opposite material."""
+    size = position.rows * position.cols
+    index = position.sideToMove ^ mirrored
+    for piece, count in groups:
+        if mirrored:
+            cols = position.cols
+            last = size - cols
+            squares = sorted(last - sq + 2 * (sq % cols) for sq in
+                             squaresOf(position.pieces[(piece + 6) % 12]))
+        else:
+            squares = squaresOf(position.pieces[piece])
+        for sq in squares:
+            index = index * size + sq
+    return index
+
+def decodeIndex(index:int, pieceCount:int, size:int)->tuple:
+    """returns (side to move, squares of the pieces) of a table index"""
+    squares = []
+    for _ in range(pieceCount):
+        index, sq = divmod(index, size)
+        squares.append(sq)
+    squares.reverse()
+    return index, squares
+
+def tablePath(directory:str, signature:str, rows:int, cols:int)->str:
+    """returns the file name of a table"""
+    return os.path.join(directory, f"{signature}.{rows}x{cols}.cgtb")
+
+def decodeValue(code:int)->tuple:
+    """converts a table entry to (WIN, DRAW or LOSS, plies to mate), or
+    None for INVALID"""
+    if code == INVALID:
+        return None
+    if code == DRAW_CODE:
+        return DRAW, 0
+    plies = code - MATE_CODE
+    return (WIN if plies % 2 else LOSS), plies
+
+class EndgameTable(object):
+    """one table file, read through a memory-mapped file"""
+    def __init__(self, path:str)->None:
+        self.path = path
+        with open(path, 'rb') as tableFile:
+            size = os.fstat(tableFile.fileno()).st_size
+            if size < HEADER.size:
+                raise TablebaseError(f"{path} is not an endgame table")
+            self.map = mmap.mmap(tableFile.fileno(), 0,
+                                 access=mmap.ACCESS_READ)
+        magic, version, self.rows, self.cols, signature, count = \
+            HEADER.unpack_from(self.map)
+        self.signature = signature.rstrip(b'\0').decode('ascii')
+        if magic != MAGIC or version != VERSION or \
+           size != HEADER.size + count:
+            self.map.close()
+            raise TablebaseError(f"{path} is not a version {VERSION} "
+                                 f"endgame table")
+        self.pieces = parseSignature(self.signature)
+        self.groups = pieceGroups(self.pieces)
+        self.values = memoryview(self.map)[HEADER.size:]
+    def __len__(self)->int:
+        return len(self.values)
+    def close(self)->None:
+        """releases the mapped file"""
+        self.values.release()
+        self.map.close()
+    def lookup(self, position:BitboardPosition,
+               mirrored:bool = False)->int:
+        """returns the table entry of a position with the table's material
+        (or the opposite material if mirrored)"""
+        return self.values[positionIndex(position, self.groups, mirrored)]
+
+class Tablebase(object):
+    """
+    The tables in a directory for one board shape. probe(position) returns
+    the exact result of a position whose material has a table, for the
+    search to use instead of searching the position.
+    """
+    def __init__(self, directory:str, rows:int, cols:int)->None:
+        self.directory = directory
+        self.rows = rows
+        self.cols = cols
+        self.tables = {} #signature -> EndgameTable
+        self.maxPieces = 0
+        suffix = f".{rows}x{cols}.cgtb"
+        if os.path.isdir(directory):
+            for name in sorted(os.listdir(directory)):
+                if name.endswith(suffix):
+                    self.add(EndgameTable(os.path.join(directory, name)))
+    def __len__(self)->int:
+        return len(self.tables)
+    def __getstate__(self)->dict:
+        return {'directory': self.directory, 'rows': self.rows,
+                'cols': self.cols}
+    def __setstate__(self, state:dict)->None:
+        self.__init__(state['directory'], state['rows'], state['cols'])
+    def add(self, table:EndgameTable)->None:
+        """makes a table available for probing"""
+        self.tables[table.signature] = table
+        self.maxPieces = max(self.maxPieces, len(table.pieces))
+    def close(self)->None:
+        """releases every table"""
+        for table in self.tables.values():
+            table.close()
+        self.tables = {}
+    def probeCode(self, position:BitboardPosition)->int:
+        """returns the table entry of a position, or None if no table has
+        its material or the position can still castle or capture en
+        passant"""
+        occupied = position.occupied[WHITE] | position.occupied[BLACK]
+        if occupied.bit_count() > self.maxPieces or \
+           position.castlingRights or position.epSquare >= 0:
+            return None
+        signature = positionSignature(position)
+        table = self.tables.get(signature)
+        if table is not None:
+            return table.lookup(position)
+        table = self.tables.get(mirroredSignature(signature))
+        if table is not None:
+            return table.lookup(position, True)
+        return None
+    def probe(self, position:BitboardPosition)->tuple:
+        """returns (WIN, DRAW or LOSS for the side to move, plies to mate)
+        for a position in the tables, or None"""
+        code = self.probeCode(position)
+        return None if code is None else decodeValue(code)
+
+def conversionSignatures(pieces:tuple)->set:
+    """returns the signatures of the material a capture or a promotion can
+    lead to from the given pieces"""
+    signatures = set()
+    for index, piece in enumerate(pieces):
+        rest = pieces[:index] + pieces[index + 1:]
+        if piece % 6 != KING:
+            signatures.add(signatureOf(rest)) #captured
+        if piece % 6 == PAWN:
+            for promotion in (QUEEN, ROOK, BISHOP, KNIGHT):
+                promoted = rest + ((piece // 6) * 6 + promotion,)
+                signatures.add(signatureOf(promoted))
+                #the promoting pawn may also capture on the way
+                for captured, other in enumerate(rest):
+                    if other // 6 != piece // 6 and other % 6 != KING:
+                        signatures.add(signatureOf(
+                            rest[:captured] + rest[captured + 1:] +
+                            ((piece // 6) * 6 + promotion,)))
+    return signatures
+
+def hasMatingMaterial(signature:str)->bool:
+    """returns whether either side of a signature could still checkmate,
+    the opposite of BitboardPosition.insufficientMaterial"""
+    pieces = parseSignature(signature)
+    if any(piece % 6 in (PAWN, ROOK, QUEEN) for piece in pieces):
+        return True
+    return sum(piece % 6 in (KNIGHT, BISHOP) for piece in pieces) > 1
+
+_workerTablebases = {} #per-process tablebases, by (directory, rows, cols)
+
+def analyseChunk(signature:str, rows:int, cols:int, directory:str,
+                 start:int, stop:int)->tuple:
+    """
+    Finds the moves of the positions with indices start to stop - 1 of a
+    table. Runs in a worker process, or in this one when building with a
+    single worker. Returns (codes, pending), where codes has an entry
+    for every index (INVALID, DRAW_CODE for stalemate, MATE_CODE for
+    checkmate or PENDING) and pending has, for every PENDING index, a tuple
+    (index, children, conversionWin, conversionMax, conversionDraw): the
+    indices of the positions its moves lead to within the table, and for
+    its captures and promotions (which leave the table) the plies of the
+    fastest win, the plies of the slowest loss (0 if none) and whether one
+    of them draws.
+    """
+    key = (directory, rows, cols)
+    if key not in _workerTablebases:
+        _workerTablebases[key] = Tablebase(directory, rows, cols)
+    tablebase = _workerTablebases[key]
+    pieces = parseSignature(signature)
+    groups = pieceGroups(pieces)
+    size = rows * cols
+    position = BitboardPosition(rows, cols, STANDARD)
+    placed = []
+    codes = bytearray(stop - start)
+    pending = []
+    for index in range(start, stop):
+        side, squares = decodeIndex(index, len(pieces), size)
+        if len(set(squares)) != len(squares) or \
+           any(squares[i] > squares[i + 1] for i in range(len(pieces) - 1)
+               if pieces[i] == pieces[i + 1]) or \
+           any(piece % 6 == PAWN and sq // cols in (0, rows - 1)
+               for piece, sq in zip(pieces, squares)):
+            continue #INVALID
+        for sq in placed:
+            position.removePiece(sq)
+        for piece, sq in zip(pieces, squares):
+            position.addPiece(piece, sq)
+        placed = squares
+        if position.sideToMove != side:
+            position.switchSide()
+        if position.inCheck(side ^ 1):
+            continue #the side that just moved left its king in check
+        moves = position.generateLegalMoves(side)
+        if not moves:
+            codes[index - start] = MATE_CODE if position.inCheck(side) \
+                                   else DRAW_CODE
+            continue
+        codes[index - start] = PENDING
+        children = []
+        conversionWin = 0
+        conversionMax = 0
+        conversionDraw = False
+        for move in moves:
+            position.makeMove(move)
+            if move >> CAPTURED_SHIFT & PIECE_MASK == EMPTY and \
+               move >> KIND_SHIFT & KIND_MASK != PROMOTION:
+                children.append(positionIndex(position, groups))
+            elif position.insufficientMaterial():
+                conversionDraw = True
+            else:
+                code = tablebase.probeCode(position)
+                if code is None or code == INVALID:
+                    needed = positionSignature(position)
+                    position.unmakeMove()
+                    raise TablebaseError(f"{signature} needs the {needed} "
+                                         f"table")
+                if code == DRAW_CODE:
+                    conversionDraw = True
+                elif (code - MATE_CODE) % 2 == 0: #the opponent is mated
+                    plies = code - MATE_CODE + 1
+                    if not conversionWin or plies < conversionWin:
+                        conversionWin = plies
+                else:
+                    conversionMax = max(conversionMax, code - MATE_CODE)
+            position.unmakeMove()
+        pending.append((index, children, conversionWin, conversionMax,
+                        conversionDraw))
+    return codes, pending
+
+def retrogradeAnalysis(codes:bytearray, pending:list)->None:
+    """
+    Replaces every PENDING entry of codes with its result, working
+    backwards from the checkmates: a position is won in n + 1 plies if a
+    move leads to a position lost in n plies, and lost in n + 1 plies if
+    every move leads to a position won in at most n plies. Positions still
+    unknown at the end are draws.
+    """
+    size = len(codes)
+    #parents of each position as compressed rows: the positions with a move
+    #to index are parents[parentStarts[index]:parentStarts[index + 1]]
+    parentCounts = array('I', bytes(4 * (size + 1)))
+    for index, children, *_ in pending:
+        for child in children:
+            parentCounts[child + 1] += 1
+    for index in range(size):
+        parentCounts[index + 1] += parentCounts[index]
+    parentStarts = parentCounts
+    filled = array('I', parentStarts[:size])
+    parents = array('I', bytes(4 * parentStarts[size]))
+    #for each PENDING position: moves within the table whose result is not
+    #known yet, the slowest win among them and whether it cannot be lost
+    remaining = {}
+    slowestWin = {}
+    cannotLose = set()
+    buckets = [[] for plies in range(MAX_PLIES + 1)]
+    for index, children, conversionWin, conversionMax, conversionDraw \
+            in pending:
+        for child in children:
+            parents[filled[child]] = index
+            filled[child] += 1
+        remaining[index] = len(children)
+        slowestWin[index] = conversionMax
+        if conversionDraw or conversionWin:
+            cannotLose.add(index)
+        if conversionWin and conversionWin <= MAX_PLIES:
+            buckets[conversionWin].append(index)
+        elif not children and not conversionDraw and \
+             conversionMax + 1 <= MAX_PLIES:
+            buckets[conversionMax + 1].append(index)
+    for index in range(size):
+        if codes[index] == MATE_CODE:
+            codes[index] = PENDING
+            buckets[0].append(index)
+    for plies in range(MAX_PLIES + 1):
+        for index in buckets[plies]:
+            if codes[index] != PENDING:
+                continue #already reached by a faster win
+            codes[index] = MATE_CODE + plies
+            if plies + 1 > MAX_PLIES:
+                continue
+            for parent in parents[parentStarts[index]:
+                                  parentStarts[index + 1]]:
+                if codes[parent] != PENDING:
+                    continue
+                if plies % 2 == 0: #index is lost, so parent wins
+                    buckets[plies + 1].append(parent)
+                    continue
+                remaining[parent] -= 1
+                if plies > slowestWin[parent]:
+                    slowestWin[parent] = plies
+                if remaining[parent] == 0 and parent not in cannotLose and \
+                   slowestWin[parent] + 1 <= MAX_PLIES:
+                    buckets[slowestWin[parent] + 1].append(parent)
+    for index in range(size):
+        if codes[index] == PENDING:
+            codes[index] = DRAW_CODE
+
+def writeTable(path:str, signature:str, rows:int, cols:int,
+               codes:bytearray)->None:
+    """writes a table file, replacing any existing one"""
+    temporaryPath = path + '.tmp'
+    with open(temporaryPath, 'wb') as tableFile:
+        tableFile.write(HEADER.pack(MAGIC, VERSION, rows, cols,
+                                    signature.encode('ascii'), len(codes)))
+        tableFile.write(codes)
+    os.replace(temporaryPath, path)
+
+def buildTable(signature:str, rows:int, cols:int, directory:str,
+               workers:int = None, log = None)->str:
+    """
+    Builds the table for a signature on a board shape in directory, first
+    building the tables its captures and promotions lead to if they are
+    missing, and returns its path. The moves of the positions are found
+    by that many worker processes (one per CPU by default). Progress is
+    written to log, a file object, if given.
+    """
+    pieces = parseSignature(signature)
+    signature = signatureOf(pieces)
+    path = tablePath(directory, signature, rows, cols)
+    if os.path.exists(path):
+        return path
+    for needed in sorted(conversionSignatures(pieces)):
+        if hasMatingMaterial(needed) and not \
+           os.path.exists(tablePath(directory, mirroredSignature(needed),
+                                    rows, cols)):
+            buildTable(needed, rows, cols, directory, workers, log)
+    os.makedirs(directory, exist_ok=True)
+    startTime = time.perf_counter()
+    size = tableSize(pieces, rows, cols)
+    workers = workers or os.cpu_count() or 1
+    chunkSize = -(-size // (workers * 8))
+    chunks = [(start, min(start + chunkSize, size))
+              for start in range(0, size, chunkSize)]
+    codes = bytearray(size)
+    pending = []
+    if workers == 1:
+        results = (analyseChunk(signature, rows, cols, directory, start, stop)
+                   for start, stop in chunks)
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        results = executor.map(analyseChunk, *zip(*[
+            (signature, rows, cols, directory, start, stop)
+            for start, stop in chunks]))
+    try:
+        for (start, stop), (chunkCodes, chunkPending) in zip(chunks, results):
+            codes[start:stop] = chunkCodes
+            pending.extend(chunkPending)
+    finally:
+        if workers != 1:
+            executor.shutdown()
+    retrogradeAnalysis(codes, pending)
+    writeTable(path, signature, rows, cols, codes)
+    #the tables of processes that already loaded the directory are stale
+    _workerTablebases.clear()
+    if log is not None:
+        print(f"{signature} {rows}x{cols}: {size} positions in "
+              f"{time.perf_counter() - startTime:.1f} s", file=log)
+    return path
+
+def main(arguments:list = None)->None:
+    """command line entry point"""
+    parser = argparse.ArgumentParser(
+        description="Build endgame tables for the standard rules.")
+    parser.add_argument('signatures', nargs='+',
+                        help="material to build, e.g. KRvK or KPvK")
+    parser.add_argument('--directory', default='tables',
+                        help="directory of the table files")
+    parser.add_argument('--rows', type=int, default=7)
+    parser.add_argument('--cols', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    options = parser.parse_args(arguments)
+    try:
+        for signature in options.signatures:
+            buildTable(signature, options.rows, options.cols,
+                       options.directory, options.workers, sys.stderr)
+    except TablebaseError as error:
+        parser.error(str(error))
+
+if __name__ == "__main__":
+    main()
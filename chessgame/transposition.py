@@ -0,0 +1,65 @@
+from array import array
+
+#bound types stored with a score
+EXACT, LOWER_BOUND, UPPER_BOUND = 1, 2, 3
+
+class TranspositionTable(object):
+    """
+    A fixed-size hash table of search results keyed by Zobrist key. Each slot
+    stores the key, the depth searched, the score and whether it is exact or
+    a bound, the best move found and the search generation that stored it.
+    Slots are kept in preallocated arrays, so the table never grows past the
+    memory budget it was created with.
+
+    When two positions map to the same slot, the new entry replaces the old
+    one if the old one is from an earlier search (see newSearch), is for the
+    same position, or was searched less deeply.
+    """
+    #bytes used per slot: key, score, depth, bound, generation and the
+    #packed best move
+    ENTRY_BYTES = 8 + 4 + 1 + 1 + 1 + 4
+    def __init__(self, memoryBytes:int = 16 * 1024 * 1024)->None:
+        self.size = max(memoryBytes // self.ENTRY_BYTES, 1)
+        self.keys = array('Q', bytes(8 * self.size))
+        self.scores = array('i', bytes(4 * self.size))
+        self.depths = array('b', bytes(self.size))
+        self.bounds = array('B', bytes(self.size)) #0 marks an empty slot
+        self.generations = array('B', bytes(self.size))
+        self.moves = array('I', bytes(4 * self.size)) #NO_MOVE if none
+        self.generation = 0
+        self.probes = 0
+        self.hits = 0
+    def newSearch(self)->None:
+        """marks entries stored so far as old, so they are replaced first"""
+        self.generation = (self.generation + 1) % 256
+    def clear(self)->None:
+        """empties the table"""
+        self.bounds = array('B', bytes(self.size))
+    def probe(self, key:int)->tuple:
+        """returns (depth, bound, score, bestMove) stored for the key, or
+        None if the position is not in the table. bestMove is a packed move,
+        or NO_MOVE (0) if none was stored."""
+        self.probes += 1
+        index = key % self.size
+        if self.bounds[index] and self.keys[index] == key:
+            self.hits += 1
+            return (self.depths[index], self.bounds[index],
+                    self.scores[index], self.moves[index])
+        return None
+    def store(self, key:int, depth:int, bound:int, score:int,
+              bestMove:int)->None:
+        """stores a search result, following the replacement policy"""
+        index = key % self.size
+        if self.bounds[index] and self.keys[index] != key and \
+           self.generations[index] == self.generation and \
+           self.depths[index] > depth:
+            return #keep the deeper entry from this search
+        self.keys[index] = key
+        self.depths[index] = max(min(depth, 127), -128)
+        self.bounds[index] = bound
+        self.scores[index] = score
+        self.generations[index] = self.generation
+        self.moves[index] = bestMove or 0
+    def hitRate(self)->float:
+        """returns the fraction of probes that found their position"""
+        return self.hits / self.probes if self.probes else 0.0
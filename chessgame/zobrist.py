@@ -0,0 +1,26 @@
+import functools
+import random
+
+class ZobristKeys(object):
+    """
+    Random 64 bit keys for Zobrist hashing on a board of the given shape.
+    A position's key is the XOR of the key of every (piece, square) pair on
+    the board, plus sideKey when black is to move and, under standard rules,
+    a key per castling right and one for the en passant column, so it can be
+    updated with a couple of XORs whenever a piece moves. The keys are seeded from the
+    board shape, so every process computes the same keys.
+    """
+    def __init__(self, rows:int, cols:int)->None:
+        generator = random.Random(f"zobrist {rows}x{cols}")
+        #pieceKeys[piece][square], in the piece order used by bitboard.py
+        self.pieceKeys = [[generator.getrandbits(64)
+                           for sq in range(rows * cols)] for piece in range(12)]
+        self.sideKey = generator.getrandbits(64)
+        #one key per castling right bit and per en passant column
+        self.castlingKeys = [generator.getrandbits(64) for right in range(4)]
+        self.enPassantKeys = [generator.getrandbits(64) for col in range(cols)]
+
+@functools.lru_cache(maxsize=None)
+def getZobristKeys(rows:int, cols:int)->ZobristKeys:
+    """returns the (shared) Zobrist keys for a board shape"""
+    return ZobristKeys(rows, cols)
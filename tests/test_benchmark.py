@@ -0,0 +1,29 @@
+"""
+Throughput benchmarks of the move generator, make/unmake and evaluation
+for pytest-benchmark, over the same positions as chessgame/benchmark.py.
+Run them with python -m pytest tests/test_benchmark.py; pytest-benchmark's
+--benchmark-autosave and --benchmark-compare keep and compare a history.
+"""
+import pytest
+from chessgame.benchmark import (benchmarkPositions, moveGeneration,
+                                 makeUnmake, evaluation, perftThree)
+
+pytest.importorskip('pytest_benchmark')
+
+@pytest.fixture
+def positions()->list:
+    return benchmarkPositions()
+
+def testMoveGeneration(benchmark, positions:list)->None:
+    assert benchmark(moveGeneration, positions) == len(positions)
+
+def testMakeUnmake(benchmark, positions:list)->None:
+    keys = [position.key for position in positions]
+    assert benchmark(makeUnmake, positions) > 0
+    assert [position.key for position in positions] == keys
+
+def testEvaluation(benchmark, positions:list)->None:
+    assert benchmark(evaluation, positions) > 0
+
+def testPerftThree(benchmark, positions:list)->None:
+    benchmark.pedantic(perftThree, (positions,), rounds=3)
@@ -0,0 +1,95 @@
+"""
+ChessGame.seek against a plain replay of the game's moves from the start,
+for plies before and after the current one and plies that were undone.
+"""
+import copy
+import random
+import pytest
+from chessgame.bitboard import SIMPLIFIED, STANDARD
+from chessgame.game import ChessGame, STARTING_BOARD
+
+def newGame(rules:str, interval:int)->ChessGame:
+    return ChessGame(copy.deepcopy(STARTING_BOARD), rules=rules,
+                     checkpointInterval=interval)
+
+def randomLine(rules:str, plies:int, seed:int)->list:
+    """returns the moves of a random game up to plies long"""
+    rng = random.Random(seed)
+    game = newGame(rules, 16)
+    for _ in range(plies):
+        if game.checkGameOver()[0]:
+            break
+        game.playMove(rng.choice(game.position.generateMoves()))
+    return game.moveHistory
+
+def gameState(game:ChessGame)->tuple:
+    """returns everything about a game's current position that seek must
+    get right"""
+    position = game.position
+    return (game.toFen(), position.key, [list(row) for row in game.board],
+            list(game.capturedCounts), list(game.moveHistory),
+            position.undoCount, list(position.undoKeys[:position.undoCount]),
+            position.isRepetition(), sorted(position.generateMoves()),
+            game.checkGameOver())
+
+def replayedState(rules:str, line:list, ply:int)->tuple:
+    game = newGame(rules, 16)
+    for move in line[:ply]:
+        game.playMove(move)
+    return gameState(game)
+
+@pytest.mark.parametrize('rules', (SIMPLIFIED, STANDARD))
+@pytest.mark.parametrize('interval', (1, 4, 16))
+def testSeekMatchesReplay(rules:str, interval:int)->None:
+    line = randomLine(rules, 70, interval)
+    game = newGame(rules, interval)
+    for move in line:
+        game.playMove(move)
+    rng = random.Random(interval)
+    plies = [rng.randrange(len(line) + 1) for _ in range(25)]
+    for ply in plies + [0, len(line), len(line) // 2]:
+        game.seek(ply)
+        assert gameState(game) == replayedState(rules, line, ply), ply
+        assert game.moveHistory + game.undoneMoveHistory[::-1] == line
+
+@pytest.mark.parametrize('rules', (SIMPLIFIED, STANDARD))
+def testSeekReachesUndonePlies(rules:str)->None:
+    line = randomLine(rules, 50, 3)
+    game = newGame(rules, 4)
+    for move in line:
+        game.playMove(move)
+    for _ in range(30):
+        game.undoMove()
+    current = len(line) - 30
+    assert gameState(game) == replayedState(rules, line, current)
+    for ply in (len(line), current + 7, 2, current):
+        game.seek(ply)
+        assert gameState(game) == replayedState(rules, line, ply), ply
+    #the moves after the ply sought can still be redone
+    while game.redoMove():
+        pass
+    assert gameState(game) == replayedState(rules, line, len(line))
+
+def testNewMoveReplacesTheUndoneLine()->None:
+    line = randomLine(STANDARD, 40, 5)
+    game = newGame(STANDARD, 4)
+    for move in line:
+        game.playMove(move)
+    game.seek(10)
+    other = next(move for move in game.position.generateMoves()
+                 if move != line[10])
+    game.playMove(other)
+    game.undoneMoveHistory.clear()
+    game.seek(5)
+    game.seek(11)
+    assert gameState(game) == replayedState(STANDARD, line[:10] + [other],
+                                            11)
+    with pytest.raises(ValueError):
+        game.seek(12)
+
+def testSeekOutsideTheGameRaises()->None:
+    game = newGame(SIMPLIFIED, 16)
+    with pytest.raises(ValueError):
+        game.seek(1)
+    with pytest.raises(ValueError):
+        game.seek(-1)
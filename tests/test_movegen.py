@@ -0,0 +1,70 @@
+"""
+The legal move generator under standard rules: check evasions, pins, en
+passant captures that would expose the king and castling through attacked
+squares. Moves are compared by coordinate name (see fen.moveName).
+"""
+import random
+from chessgame.bitboard import STANDARD, BitboardPosition
+from chessgame.fen import positionFromFen, moveName
+from chessgame.game import STARTING_BOARD
+
+def moveNames(fen:str)->set:
+    position = positionFromFen(fen, STANDARD)
+    return {moveName(position, move) for move in position.generateMoves()}
+
+def testCheckEvasionsOnlyMoveTheKingOutOfCheck()->None:
+    #the rook on a1 can neither block nor capture, and castling is not
+    #allowed out of check
+    assert moveNames('4r2k/8/8/8/8/8/8/R3K3 w Q - 0 1') == \
+        {'e1d1', 'e1d2', 'e1f1', 'e1f2'}
+
+def testCheckEvasionsIncludeBlocksAndCaptures()->None:
+    names = moveNames('4r2k/8/8/8/8/8/3B4/4K3 w - - 0 1')
+    assert {name for name in names if not name.startswith('e1')} == \
+        {'d2e3'}
+    names = moveNames('4r2k/8/8/1B6/8/8/8/4K3 w - - 0 1')
+    assert {name for name in names if not name.startswith('e1')} == \
+        {'b5e2', 'b5e8'}
+
+def testDoubleCheckOnlyMovesTheKing()->None:
+    names = moveNames('4r2k/8/8/8/8/5n2/3B4/4K3 w - - 0 1')
+    assert all(name.startswith('e1') for name in names)
+
+def testPinnedPieceStaysOnThePinLine()->None:
+    names = moveNames('4k3/4r3/8/8/8/8/4B3/4K3 w - - 0 1')
+    assert not any(name.startswith('e2') for name in names)
+    names = moveNames('4k3/4r3/8/8/8/8/4R3/4K3 w - - 0 1')
+    assert {name for name in names if name.startswith('e2')} == \
+        {'e2e3', 'e2e4', 'e2e5', 'e2e6', 'e2e7'}
+
+def testEnPassantThatExposesTheKingIsIllegal()->None:
+    #taking c6 en passant removes both pawns from the fifth rank, opening
+    #it to the rook on h5
+    assert 'b5c6' not in moveNames('8/8/8/KPp4r/8/8/8/7k w - c6 0 1')
+    assert 'b5c6' in moveNames('8/8/8/KPp5/8/8/8/7k w - c6 0 1')
+
+def testCastlingThroughAttackedSquaresIsIllegal()->None:
+    #f1 is attacked by the rook on f8
+    names = moveNames('5r1k/8/8/8/8/8/8/R3K2R w KQ - 0 1')
+    assert 'e1g1' not in names and 'e1c1' in names
+    #d1 is attacked by the knight on f2; b1 being attacked does not matter
+    names = moveNames('7k/8/8/8/8/8/5n2/R3K2R w KQ - 0 1')
+    assert 'e1c1' not in names and 'e1g1' in names
+    names = moveNames('1r5k/8/8/8/8/8/8/R3K2R w KQ - 0 1')
+    assert {'e1c1', 'e1g1'} <= names
+
+def testNoMoveLeavesTheMoverInCheck()->None:
+    rng = random.Random(1)
+    for _ in range(20):
+        position = BitboardPosition.fromBoard(STARTING_BOARD, STANDARD)
+        for _ in range(40):
+            moves = position.generateMoves()
+            if not moves:
+                break
+            mover = position.sideToMove
+            for move in moves:
+                position.makeMove(move)
+                assert not position.inCheck(mover), \
+                    moveName(position, move)
+                position.unmakeMove()
+            position.makeMove(rng.choice(moves))
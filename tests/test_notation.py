@@ -0,0 +1,78 @@
+"""
+FEN and PGN round trips: positions written with toFen read back the same
+with fromFen, and games written with gameToPgn replay to the same moves
+and position through readPgn.
+"""
+import copy
+import io
+import random
+import pytest
+from chessgame.bitboard import SIMPLIFIED, STANDARD
+from chessgame.fen import FenError, positionFromFen, positionToFen
+from chessgame.game import ChessGame, STARTING_BOARD
+from chessgame.perft import SUITE
+from chessgame.pgn import gameToPgn, readPgn
+
+#suite positions given by a FEN, with their rules
+SUITE_FENS = [(fen, rules) for fen, rules, counts in SUITE.values()
+              if fen is not None]
+
+def playRandomGame(game:ChessGame, plies:int, seed:int)->ChessGame:
+    """plays up to plies random moves, stopping if the game ends"""
+    rng = random.Random(seed)
+    for _ in range(plies):
+        if game.checkGameOver()[0]:
+            break
+        game.playMove(rng.choice(game.position.generateMoves()))
+    return game
+
+@pytest.mark.parametrize('fen, rules', SUITE_FENS)
+def testFenRoundTrip(fen:str, rules:str)->None:
+    assert positionToFen(positionFromFen(fen, rules)).split()[:5] == \
+        fen.split()[:5]
+    game = ChessGame.fromFen(fen, rules)
+    assert game.toFen() == fen
+    assert ChessGame.fromFen(game.toFen(), rules).toFen() == fen
+
+@pytest.mark.parametrize('rules', (SIMPLIFIED, STANDARD))
+@pytest.mark.parametrize('seed', range(5))
+def testFenRoundTripAfterMoves(rules:str, seed:int)->None:
+    game = playRandomGame(ChessGame(copy.deepcopy(STARTING_BOARD),
+                                    rules=rules), 30, seed)
+    fen = game.toFen()
+    copied = ChessGame.fromFen(fen, rules)
+    assert copied.toFen() == fen
+    assert copied.position.key == game.position.key
+    assert sorted(copied.position.generateMoves()) == \
+        sorted(game.position.generateMoves())
+
+def testFenDefaultsToTheSameRules()->None:
+    fen = SUITE['start'][0]
+    assert positionFromFen(fen).rules == ChessGame.fromFen(fen).rules
+
+@pytest.mark.parametrize('fen', ('', '/', '8/8 w', 'k7/8/8/7K x',
+                                 'k7/8/8/7K w - z9 0 1',
+                                 'k7/8/8/7K w - - 0 1 2',
+                                 'kk6/8/8/7K w', 'k7/8/8/7X w'))
+def testMalformedFenIsRejected(fen:str)->None:
+    with pytest.raises(FenError):
+        ChessGame.fromFen(fen, STANDARD)
+    with pytest.raises(FenError):
+        positionFromFen(fen, STANDARD)
+
+@pytest.mark.parametrize('start', (None, SUITE['kiwipete'][0]))
+@pytest.mark.parametrize('rules', (SIMPLIFIED, STANDARD))
+@pytest.mark.parametrize('seed', range(5))
+def testPgnRoundTrip(start:str, rules:str, seed:int)->None:
+    if start is None:
+        game = ChessGame(copy.deepcopy(STARTING_BOARD), rules=rules)
+    else:
+        game = ChessGame.fromFen(start, rules)
+    playRandomGame(game, 60, seed)
+    pgnGames = list(readPgn(io.StringIO(gameToPgn(game, {'Round': seed}))))
+    assert len(pgnGames) == 1
+    assert pgnGames[0].tags['Round'] == str(seed)
+    replayed = pgnGames[0].replay()
+    assert replayed.moveHistory == game.moveHistory
+    assert replayed.toFen() == game.toFen()
+    assert replayed.checkGameOver() == game.checkGameOver()
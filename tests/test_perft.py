@@ -0,0 +1,29 @@
+"""
+Perft counts of the built-in suite (see chessgame/perft.py), so that a move
+generator change that adds or loses moves fails the tests. Counts are
+checked to depth 3, which takes about a second for the whole suite; run
+python -m chessgame.perft --suite for the deeper ones.
+"""
+import pytest
+from chessgame.perft import SUITE, suitePosition, perft, divide
+
+#deepest count checked per suite position
+MAX_TEST_DEPTH = 3
+
+@pytest.mark.parametrize('name', sorted(SUITE))
+def testSuiteCounts(name:str)->None:
+    position = suitePosition(name)
+    for depth, expected in enumerate(SUITE[name][2][:MAX_TEST_DEPTH], 1):
+        assert perft(position, depth) == expected, f"depth {depth}"
+
+@pytest.mark.parametrize('name', sorted(SUITE))
+def testPositionIsRestored(name:str)->None:
+    position = suitePosition(name)
+    key, fresh = position.key, suitePosition(name)
+    perft(position, 2)
+    assert position.key == key
+    assert position.snapshot() == fresh.snapshot()
+
+def testDivideAddsUpToPerft()->None:
+    position = suitePosition('kiwipete')
+    assert sum(divide(position, 2).values()) == SUITE['kiwipete'][2][1]